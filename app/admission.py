@@ -0,0 +1,223 @@
+"""Admission control: per-user rate limits and overload shedding.
+
+``AdmissionMiddleware`` runs before routing. Every ``/v1`` and ``/api``
+request first passes two global checks, answered with 503 and
+``Retry-After`` when they fail: too many requests already in flight, or an
+event loop running late (``metrics.LOOP_LAG``). Then come token buckets
+(429): one per user across all routes, plus one per user for each expensive
+route in ``ROUTE_LIMITS``. Unauthenticated requests are keyed by client
+address: the peer's, or behind a proxy listed in ``TRUSTED_PROXIES`` the
+right-most ``X-Forwarded-For`` hop that is not itself a trusted proxy.
+Rejections count in ``http_requests_shed_total{reason}``.
+"""
+from __future__ import annotations
+
+import ipaddress
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+from app.auth import decode_subject
+from app.services.rate_limit import BucketStore, Limit
+
+GUARDED_PREFIXES = ("/v1/", "/api/")
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+@dataclass(frozen=True)
+class RouteLimit:
+    method: str
+    # Route template; each ``{param}`` matches one path segment.
+    path: str
+    limit: Limit
+    # Key by client address instead of user, for routes used before login.
+    per_client: bool = False
+    pattern: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        regex = re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(self.path))
+        object.__setattr__(self, "pattern", re.compile(f"{regex}/?"))
+
+    def matches(self, method: str, path: str) -> bool:
+        return method == self.method and self.pattern.fullmatch(path) is not None
+
+
+# Writes that fan out into AI inference, a group commit and a broadcast.
+ROUTE_LIMITS = (
+    RouteLimit("POST", "/v1/tasks", Limit(rate=10, burst=30)),
+    RouteLimit("POST", "/v1/tasks:batch", Limit(rate=2, burst=5)),
+    RouteLimit("POST", "/v1/tasks:reestimate", Limit(rate=1 / 60, burst=2)),
+    RouteLimit("POST", "/v1/tasks/{task_id}/ai-breakdown", Limit(rate=5, burst=10)),
+    RouteLimit("POST", "/v1/tasks/{task_id}/estimate", Limit(rate=5, burst=10)),
+    RouteLimit("POST", "/v1/schedule/optimize", Limit(rate=5, burst=10)),
+    # bcrypt-bound, and the password hasher sheds its own overflow too.
+    RouteLimit("POST", "/api/auth/login", Limit(rate=5, burst=50), per_client=True),
+    RouteLimit("POST", "/api/auth/signup", Limit(rate=5, burst=50), per_client=True),
+)
+
+
+@dataclass(frozen=True)
+class Rejection:
+    status: int
+    reason: str
+    retry_after: float
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        store: BucketStore,
+        user_limit: Limit,
+        route_limits: tuple[RouteLimit, ...] = ROUTE_LIMITS,
+        max_in_flight: int = 512,
+        max_loop_lag: float = 0.25,
+        trusted_proxies: tuple[Network, ...] = (),
+    ) -> None:
+        self.store = store
+        self.user_limit = user_limit
+        self.route_limits = route_limits
+        self.max_in_flight = max_in_flight
+        self.max_loop_lag = max_loop_lag
+        self.trusted_proxies = trusted_proxies
+        self.in_flight = 0
+
+    def client_address(self, scope: dict) -> str:
+        """The address to key per-client limits by; see the module docstring."""
+        peer = scope["client"][0] if scope.get("client") else "unknown"
+        if not self._trusted(peer):
+            return peer
+        hops = [hop.strip() for hop in _header(scope, b"x-forwarded-for").split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not self._trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+    def check(self, method: str, path: str, user: Optional[str], client: str) -> Optional[Rejection]:
+        """``None`` to admit the request, else why not; admitted requests must call ``release``."""
+        rejection = self._overloaded() or self._take_tokens(method, path, user, client)
+        if rejection is None:
+            self.in_flight += 1
+        return rejection
+
+    async def check_async(self, method: str, path: str, user: Optional[str], client: str) -> Optional[Rejection]:
+        """``check`` for the event loop: a store that does I/O is asked from a worker thread."""
+        rejection = self._overloaded()
+        if rejection is not None:
+            return rejection
+        # Hold the slot while the store is asked, so concurrent checks see it.
+        self.in_flight += 1
+        if self.store.blocking:
+            rejection = await run_in_threadpool(self._take_tokens, method, path, user, client)
+        else:
+            rejection = self._take_tokens(method, path, user, client)
+        if rejection is not None:
+            self.in_flight -= 1
+        return rejection
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    def _trusted(self, address: str) -> bool:
+        if not self.trusted_proxies:
+            return False
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def _overloaded(self) -> Optional[Rejection]:
+        if self.in_flight >= self.max_in_flight:
+            return Rejection(503, "in_flight", 1.0)
+        lag = metrics.LOOP_LAG.value()
+        if lag > self.max_loop_lag:
+            return Rejection(503, "loop_lag", max(1.0, lag))
+        return None
+
+    def _take_tokens(self, method: str, path: str, user: Optional[str], client: str) -> Optional[Rejection]:
+        caller = f"user:{user}" if user else f"client:{client}"
+        for rule in self.route_limits:
+            if rule.matches(method, path):
+                key = f"client:{client}" if rule.per_client else caller
+                wait = self.store.take(f"{key}:{rule.method} {rule.path}", rule.limit)
+                if wait:
+                    return Rejection(429, "route_limit", wait)
+                break
+        wait = self.store.take(caller, self.user_limit)
+        if wait:
+            return Rejection(429, "user_limit", wait)
+        return None
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "buckets": self.store.size(),
+        }
+
+
+def create_admission_controller(store: BucketStore) -> AdmissionController:
+    return AdmissionController(
+        store,
+        user_limit=Limit(
+            rate=float(os.getenv("RATE_LIMIT_USER_RPS", "50")),
+            burst=float(os.getenv("RATE_LIMIT_USER_BURST", "100")),
+        ),
+        max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "512")),
+        max_loop_lag=float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "250")) / 1000,
+        trusted_proxies=tuple(
+            ipaddress.ip_network(item.strip(), strict=False)
+            for item in os.getenv("TRUSTED_PROXIES", "").split(",")
+            if item.strip()
+        ),
+    )
+
+
+class AdmissionMiddleware:
+    """Applies an ``AdmissionController`` to every guarded HTTP request."""
+
+    def __init__(self, app: Any, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith(GUARDED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        client = self.controller.client_address(scope)
+        rejection = await self.controller.check_async(scope["method"], path, _bearer_subject(scope), client)
+        if rejection is not None:
+            metrics.REQUESTS_SHED.inc(reason=rejection.reason)
+            detail = "Rate limit exceeded" if rejection.status == 429 else "Server busy, retry shortly"
+            response = JSONResponse(
+                {"detail": detail},
+                status_code=rejection.status,
+                headers={"Retry-After": str(math.ceil(rejection.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+def _bearer_subject(scope: dict) -> Optional[str]:
+    scheme, _, token = _header(scope, b"authorization").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return decode_subject(token)
+    return None
+
+
+def _header(scope: dict, name: bytes) -> str:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return ""
@@ -0,0 +1,153 @@
+"""Fingerprinted, precompressed static assets.
+
+``python -m app.assets`` builds ``static/dist``: each ``.js``/``.css`` file
+copied under a content-hashed name (``js/app.3f9c01d2ab4e.js``), an
+``index.html`` rewritten to those names, ``.gz`` (and, with ``brotli``
+installed, ``.br``) siblings for everything, and ``manifest.json``. Run it
+whenever ``static/`` changes; the app serves the build when it exists and the
+plain files otherwise.
+
+``StaticAssets`` serves the precompressed sibling the client accepts and
+marks fingerprinted files ``immutable``: a changed file gets a new name, so
+browsers never need to revalidate them.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.compression import ENCODINGS, compress, negotiate
+
+DIST = "dist"
+MANIFEST = "manifest.json"
+FINGERPRINT_SUFFIXES = (".js", ".css")
+# Smaller files are not worth a compressed sibling.
+MIN_COMPRESS_SIZE = 256
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{12}\.[a-z0-9]+$")
+
+
+def fingerprint(path: Path) -> str:
+    """``path``'s name with a content hash before the suffix."""
+    digest = hashlib.blake2b(path.read_bytes(), digest_size=6).hexdigest()
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def build_assets(static_dir: Path, url_prefix: str = "/static") -> dict[str, Any]:
+    """Rebuild ``static_dir/dist`` from scratch and return its manifest."""
+    dist = static_dir / DIST
+    if dist.exists():
+        shutil.rmtree(dist)
+    dist.mkdir()
+    assets: dict[str, str] = {}
+    for source in sorted(static_dir.rglob("*")):
+        relative = source.relative_to(static_dir)
+        if relative.parts[0] == DIST or not source.is_file() or source.suffix not in FINGERPRINT_SUFFIXES:
+            continue
+        target = relative.with_name(fingerprint(source))
+        (dist / target).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, dist / target)
+        assets[relative.as_posix()] = target.as_posix()
+
+    index = (static_dir / "index.html").read_text(encoding="utf-8")
+    # Longest first, so no asset path is rewritten inside a longer one.
+    for logical in sorted(assets, key=len, reverse=True):
+        index = index.replace(f"{url_prefix}/{logical}", f"{url_prefix}/{DIST}/{assets[logical]}")
+    (dist / "index.html").write_text(index, encoding="utf-8")
+
+    compressed: dict[str, list[str]] = {}
+    for path in sorted(p for p in dist.rglob("*") if p.is_file()):
+        body = path.read_bytes()
+        if len(body) < MIN_COMPRESS_SIZE:
+            continue
+        for coding in ENCODINGS:
+            # Build time, so the slowest, smallest settings.
+            packed = compress(body, coding, level=11 if coding == "br" else 9)
+            if len(packed) < len(body):
+                path.with_name(path.name + SUFFIXES[coding]).write_bytes(packed)
+                compressed.setdefault(path.relative_to(dist).as_posix(), []).append(coding)
+
+    manifest = {"assets": assets, "compressed": compressed}
+    (dist / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return manifest
+
+
+def load_manifest(static_dir: Path) -> Optional[dict[str, Any]]:
+    path = static_dir / DIST / MANIFEST
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def index_path(static_dir: Path) -> Path:
+    """The built ``index.html`` if there is a build, else the source one."""
+    built = static_dir / DIST / "index.html"
+    return built if built.is_file() else static_dir / "index.html"
+
+
+class StaticAssets(StaticFiles):
+    """``StaticFiles`` that serves ``.br``/``.gz`` siblings from the build and sets ``Cache-Control``."""
+
+    def __init__(self, *, directory: str | os.PathLike[str], **kwargs: Any) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.root = Path(directory).resolve()
+        manifest = load_manifest(self.root) or {}
+        # Absolute file path -> codings with a sibling on disk.
+        self.variants = {
+            str(self.root / DIST / relative): codings for relative, codings in manifest.get("compressed", {}).items()
+        }
+
+    def file_response(
+        self, full_path: str | os.PathLike[str], stat_result: os.stat_result, scope: dict, status_code: int = 200
+    ) -> Response:
+        response = asset_response(
+            Path(full_path), Headers(scope=scope), self.variants.get(str(Path(full_path).resolve()), ()), status_code
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def asset_response(
+    path: Path, request_headers: Headers, codings: Iterable[str] = (), status_code: int = 200
+) -> FileResponse:
+    """``path``, or its precompressed sibling in the best coding the client accepts."""
+    headers = {"Cache-Control": IMMUTABLE if _FINGERPRINTED.search(path.name) else REVALIDATE}
+    media_type = mimetypes.guess_type(path.name)[0] or "text/plain"
+    codings = tuple(codings)
+    if codings:
+        headers["Vary"] = "Accept-Encoding"
+        coding = negotiate(request_headers.get("accept-encoding", ""), [c for c in ENCODINGS if c in codings])
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+            path = path.with_name(path.name + SUFFIXES[coding])
+    # Stat the file actually sent, so ETag and Last-Modified differ per coding.
+    return FileResponse(path, status_code=status_code, headers=headers, media_type=media_type, stat_result=os.stat(path))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--static-dir", type=Path, default=Path(__file__).resolve().parent.parent / "static")
+    args = parser.parse_args()
+    manifest = build_assets(args.static_dir)
+    for logical, hashed in manifest["assets"].items():
+        print(f"{logical} -> {DIST}/{hashed}")
+    for path, codings in manifest["compressed"].items():
+        print(f"{DIST}/{path}: {', '.join(codings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Content-Encoding negotiation and compression of JSON responses.
+
+Brotli is used when the ``brotli`` package is installed (``pip install
+brotli``); gzip always works. ``CompressionMiddleware`` compresses complete
+JSON bodies of at least ``minimum_size`` bytes for clients that accept it.
+Precompressed static files reuse ``negotiate`` (see ``app.assets``).
+"""
+from __future__ import annotations
+
+import gzip
+from typing import Any, Callable, Iterable, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+# Server preference, best first.
+ENCODINGS: tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+# Bodies this large are compressed off the event loop.
+THREADPOOL_MIN_SIZE = 256 * 1024
+
+
+def negotiate(accept_encoding: str, available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """The ``available`` coding the client rates highest in ``Accept-Encoding``, or None for identity."""
+    ratings: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            ratings[name.lower()] = quality
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = ratings.get(coding, ratings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, coding: str, level: Optional[int] = None) -> bytes:
+    """``body`` in ``coding``; the default levels suit per-request compression."""
+    if coding == "br":
+        return brotli.compress(body, quality=5 if level is None else level)
+    if coding == "gzip":
+        # mtime=0 keeps the output a pure function of the input.
+        return gzip.compress(body, compresslevel=6 if level is None else level, mtime=0)
+    raise ValueError(f"Unsupported content coding {coding!r}")
+
+
+class CompressionMiddleware:
+    """Compresses JSON responses of at least ``minimum_size`` bytes.
+
+    Only single-message bodies are touched (every JSON response here is one);
+    streamed responses and ones that already carry a ``Content-Encoding`` pass
+    through. JSON responses always get ``Vary: Accept-Encoding`` so shared
+    caches keep the variants apart.
+    """
+
+    def __init__(
+        self, app: Any, minimum_size: int = 1024, media_types: tuple[str, ...] = ("application/json",)
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.media_types = media_types
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        held: Optional[dict] = None
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal held
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if headers.get("content-type", "").split(";")[0].strip() in self.media_types:
+                    held = message  # wait for the body to decide
+                    return
+            elif message["type"] == "http.response.body" and held is not None:
+                start, held = held, None
+                start.setdefault("headers", [])
+                headers = MutableHeaders(scope=start)
+                headers.add_vary_header("Accept-Encoding")
+                body = message.get("body", b"")
+                if (
+                    coding is not None
+                    and not message.get("more_body", False)
+                    and len(body) >= self.minimum_size
+                    and "content-encoding" not in headers
+                ):
+                    if len(body) >= THREADPOOL_MIN_SIZE:
+                        body = await run_in_threadpool(compress, body, coding)
+                    else:
+                        body = compress(body, coding)
+                    headers["Content-Encoding"] = coding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
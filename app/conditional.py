@@ -0,0 +1,43 @@
+"""ETag / If-None-Match support for per-owner task views.
+
+Every view of an owner's tasks (list pages, single tasks, insights) is a
+function of the rows behind ``TaskService.data_version``, so the version alone
+makes a validator: a revalidation costs one primary-key read of
+``task_stats`` and answers 304 without touching ``tasks``.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response
+
+# Clients may keep the body but must revalidate before reusing it.
+CACHE_CONTROL = "private, no-cache"
+
+
+def entity_tag(owner_id: str, version: int | str) -> str:
+    """Weak ETag for ``owner_id``'s data at ``version``.
+
+    Weak because the same data may be serialized differently (``fields=``,
+    orjson vs pydantic); the owner is hashed in so two users at the same
+    version never share a tag.
+    """
+    owner = hashlib.blake2b(owner_id.encode(), digest_size=6).hexdigest()
+    return f'W/"{owner}-{version}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True if ``If-None-Match`` lists ``etag`` (weak comparison) or is ``*``."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def validator_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag))
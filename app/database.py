@@ -1,33 +1,300 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from typing import Any, AsyncIterator, Callable, TypeVar, Union
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+
+from app.services.rollups import subtree_totals
+from app.services.write_queue import WriteQueue
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'productivity.db'}")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    pool_pre_ping=True,
+# An async driver in DATABASE_URL (e.g. ``sqlite+aiosqlite://``) switches the
+# app to AsyncSession mode; a plain URL keeps the sync engine.
+_url = make_url(DATABASE_URL)
+ASYNC_MODE = _url.get_dialect().is_async
+
+IS_SQLITE = _url.get_backend_name() == "sqlite"
+_FILE_SQLITE = IS_SQLITE and _url.database not in (None, "", ":memory:")
+_connect_args = {"check_same_thread": False} if IS_SQLITE else {}
+# Readers run concurrently under WAL; size the pool for the threadpool, not 5.
+_pool_args = (
+    {"pool_size": int(os.getenv("DB_POOL_SIZE", "10")), "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20"))}
+    if _FILE_SQLITE or not IS_SQLITE
+    else {}
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Applied to every SQLite connection. WAL lets readers proceed while a write
+# is in progress; NORMAL only syncs at checkpoints, which WAL keeps safe
+# against corruption (a power cut can lose the last commits, not the file).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -1024 * int(os.getenv("SQLITE_CACHE_MB", "64")),
+    "mmap_size": 1024 * 1024 * int(os.getenv("SQLITE_MMAP_MB", "256")),
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+if ASYNC_MODE:
+    # aiosqlite runs on NullPool, which takes no sizing arguments.
+    async_engine = create_async_engine(
+        DATABASE_URL, connect_args=_connect_args, pool_pre_ping=True, **({} if IS_SQLITE else _pool_args)
+    )
+    # Proxy of the async engine; good for event listeners, not for direct I/O.
+    engine = async_engine.sync_engine
+else:
+    async_engine = None
+    engine = create_engine(DATABASE_URL, connect_args=_connect_args, pool_pre_ping=True, **_pool_args)
+
+if _FILE_SQLITE:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+
+
+def create_writer_engine(url: str) -> Engine:
+    """Sync engine for ``WriteQueue``: one connection, pragmas, ``BEGIN IMMEDIATE``.
+
+    IMMEDIATE takes the write lock when the group starts, so another process
+    holding it makes us wait ``busy_timeout`` instead of failing mid-group on
+    a read-to-write upgrade. pysqlite's own transaction handling is turned off
+    so the explicit BEGIN (and the per-job SAVEPOINTs) are what SQLite sees.
+    """
+    writer = create_engine(
+        make_url(url).set(drivername="sqlite"), connect_args={"check_same_thread": False}, pool_size=1, max_overflow=0
+    )
+
+    @event.listens_for(writer, "connect")
+    def _connect(dbapi_connection: Any, connection_record: Any) -> None:
+        _apply_sqlite_pragmas(dbapi_connection, connection_record)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer, "begin")
+    def _begin(conn: Connection) -> None:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer
+
+
+# File-backed SQLite funnels writes through one writer thread (see run_write).
+write_queue = (
+    WriteQueue(create_writer_engine(DATABASE_URL), max_batch=int(os.getenv("DB_WRITE_BATCH", "64")))
+    if _FILE_SQLITE and os.getenv("SQLITE_WRITE_QUEUE", "1") == "1"
+    else None
+)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine else None
+)
+
+DBSession = Union[Session, AsyncSession]
+T = TypeVar("T")
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[DBSession]:
+    """Open a session for the configured mode and close it off the event loop."""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
+
+
+async def get_db() -> AsyncIterator[DBSession]:
+    async with session_scope() as db:
+        yield db
+
+
+async def run_db(db: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``fn(session, *args, **kwargs)`` without blocking the event loop.
+
+    Service code stays plain synchronous ORM code. With an ``AsyncSession`` it
+    runs through ``run_sync`` on the async driver; with a sync ``Session`` it
+    runs in the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def run_write(db: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Like ``run_db`` for service calls that write.
+
+    With the SQLite write queue enabled ``fn`` runs on the writer's session,
+    not ``db``, so pass ids rather than objects loaded through ``db``.
+    Otherwise this is ``run_db``.
+    """
+    if write_queue is not None:
+        return await write_queue.submit(fn, *args, **kwargs)
+    return await run_db(db, fn, *args, **kwargs)
+
+
+def _add_missing_columns(conn: Connection) -> list[str]:
+    """ALTER existing tables to add nullable columns introduced since they were created."""
+    inspector = inspect(conn)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _backfill_rollups(conn: Connection) -> None:
+    """Compute ``tasks.subtree_*`` for every existing task from the parent links."""
+    rows = conn.execute(text("SELECT id, parent_task_id, status, estimated_minutes FROM tasks")).all()
+    totals = subtree_totals(rows)
+    if totals:
+        conn.execute(
+            text(
+                "UPDATE tasks SET subtree_tasks = :tasks, subtree_done = :done, subtree_minutes = :minutes "
+                "WHERE id = :id"
+            ),
+            [{"id": task_id, "tasks": t, "done": d, "minutes": m} for task_id, (t, d, m) in totals.items()],
+        )
+
+
+# One-off statements (or callables) run right after the keyed column is first added.
+_BACKFILLS: dict[str, str | Callable[[Connection], None]] = {
+    # Best available guess for tasks finished before completion times were tracked.
+    "tasks.completed_at": "UPDATE tasks SET completed_at = updated_at WHERE status = 'done'",
+    # subtree_done and subtree_minutes are added in the same pass.
+    "tasks.subtree_tasks": _backfill_rollups,
+    "task_stats.version": "UPDATE task_stats SET version = 0",
+    "task_stats.changes_floor": "UPDATE task_stats SET changes_floor = 0",
+}
+
+
+def _migrate_json_tags(conn: Connection) -> None:
+    """Copy tags from the legacy JSON ``tasks.tags`` column into ``task_tags``.
+
+    Migrated rows get ``tags = NULL`` so the copy happens once per row; the
+    column itself is left in place as SQLite can't drop it portably.
+    """
+    if "tags" not in {column["name"] for column in inspect(conn).get_columns("tasks")}:
+        return
+    rows = conn.execute(
+        text("SELECT id, owner_id, tags FROM tasks WHERE tags IS NOT NULL AND tags NOT IN ('', '[]')")
+    ).all()
+    links = []
+    for task_id, owner_id, raw in rows:
+        try:
+            tags = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(tags, list):
+            unique = dict.fromkeys(str(tag) for tag in tags)
+            links += [
+                {"task_id": task_id, "owner_id": owner_id, "tag": tag, "position": position}
+                for position, tag in enumerate(unique)
+            ]
+    if links:
+        conn.execute(
+            text(
+                "INSERT INTO task_tags (task_id, owner_id, tag, position) "
+                "VALUES (:task_id, :owner_id, :tag, :position)"
+            ),
+            links,
+        )
+    conn.execute(text("UPDATE tasks SET tags = NULL WHERE tags IS NOT NULL"))
+
+
+def _create_search_index(conn: Connection) -> None:
+    """Create and fill the FTS5 index behind ``/v1/tasks/search`` (SQLite only).
+
+    ``tasks`` has a string primary key, so its rowid is implicit and a VACUUM
+    may renumber it; index rows are therefore found by ``task_key``, the task
+    id hex-encoded into one token, never by rowid. ``owner_key`` is the owner
+    id without dashes, i.e. one token to AND into every query. An index from
+    before ``task_key`` existed is rebuilt.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    if inspect(conn).has_table("task_search"):
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(task_search)"))}
+        if "task_key" in columns:
+            return
+        conn.execute(text("DROP TABLE task_search"))
+    conn.execute(
+        text(
+            "CREATE VIRTUAL TABLE task_search USING fts5("
+            "title, description, owner_key, task_key, task_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    )
+    conn.execute(
+        text(
+            "INSERT INTO task_search (title, description, owner_key, task_key, task_id) "
+            "SELECT title, coalesce(description, ''), replace(owner_id, '-', ''), lower(hex(id)), id FROM tasks"
+        )
+    )
+
+
+def _create_schema(conn: Connection) -> None:
+    for column in _add_missing_columns(conn):
+        backfill = _BACKFILLS.get(column)
+        if callable(backfill):
+            backfill(conn)
+        elif backfill:
+            conn.execute(text(backfill))
+    Base.metadata.create_all(bind=conn)
+    _migrate_json_tags(conn)
+    _create_search_index(conn)
+    # create_all skips indexes on tables that already exist; add new ones.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
 
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+async def init_db(attempts: int = 3) -> None:
+    for attempt in range(1, attempts + 1):
+        try:
+            if async_engine is not None:
+                async with async_engine.begin() as conn:
+                    await conn.run_sync(_create_schema)
+            else:
+                with engine.begin() as conn:
+                    _create_schema(conn)
+            return
+        except OperationalError:
+            # Several workers starting on one database race to create the
+            # same tables; whoever loses retries against the finished schema.
+            if attempt == attempts:
+                raise
+            await asyncio.sleep(0.2 * attempt)
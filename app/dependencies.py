@@ -1,10 +1,45 @@
-from app.services.ai_service import AIService
+import os
+
+from app.auth import pwd_context
+from app.services.ai_service import BatchedAIService
+from app.services.backplane import create_backplane
 from app.services.behavior_service import BehaviorService
-from app.services.realtime import ConnectionManager
+from app.services.event_recorder import EventRecorder
+from app.services.inference_cache import InferenceCache
+from app.services.model_backend import create_model_backend
+from app.services.password_hasher import PasswordHasher, default_max_pending, default_workers
+from app.services.rate_limit import create_bucket_store
+from app.services.realtime import ConnectionManager, OverflowPolicy
+from app.services.response_cache import ResponseCache
+from app.services.scheduler import Scheduler
 from app.services.task_service import TaskService
 
 
-task_service = TaskService()
-ai_service = AIService()
+event_recorder = EventRecorder(
+    capacity=int(os.getenv("EVENT_BUFFER_SIZE", "10000")),
+    batch_size=int(os.getenv("EVENT_FLUSH_BATCH", "500")),
+    interval=float(os.getenv("EVENT_FLUSH_MS", "200")) / 1000,
+)
+task_service = TaskService(events=event_recorder)
+ai_service = BatchedAIService(
+    InferenceCache(
+        max_size=int(os.getenv("AI_CACHE_SIZE", "4096")),
+        ttl_seconds=float(os.getenv("AI_CACHE_TTL", "86400")),
+        path=os.getenv("AI_CACHE_PATH") or None,
+        disk_max_size=int(os.getenv("AI_CACHE_DISK_SIZE", "65536")),
+    ),
+    backend=create_model_backend(os.getenv("AI_BACKEND", "heuristic")),
+    max_batch_size=int(os.getenv("AI_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.getenv("AI_BATCH_WAIT_MS", "2")),
+)
 behavior_service = BehaviorService()
-realtime_manager = ConnectionManager()
+realtime_manager = ConnectionManager(
+    max_queue=int(os.getenv("REALTIME_QUEUE_SIZE", "256")),
+    overflow=OverflowPolicy(os.getenv("REALTIME_OVERFLOW", OverflowPolicy.DROP_OLDEST.value)),
+    backplane=create_backplane(os.getenv("REALTIME_BACKPLANE", "local"), os.getenv("REALTIME_BACKPLANE_DIR")),
+)
+scheduler = Scheduler()
+rate_limit_store = create_bucket_store(os.getenv("RATE_LIMIT_STORE", "local"), os.getenv("RATE_LIMIT_PATH"))
+response_cache = ResponseCache(max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")))
+_hash_workers = default_workers()
+password_hasher = PasswordHasher(pwd_context, _hash_workers, default_max_pending(_hash_workers))
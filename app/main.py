@@ -1,26 +1,112 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import logging
+import os
+import time
 import traceback
+from datetime import timedelta
 from pathlib import Path
+from typing import Any, AsyncIterator
 
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
-
-from app.database import init_db
-from app.dependencies import realtime_manager
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.auth import decode_subject, load_principal, principal_cache
+from app import metrics
+from app.admission import AdmissionMiddleware, create_admission_controller
+from app.assets import StaticAssets, index_path
+from app.compression import CompressionMiddleware
+from app.database import engine, init_db, run_db, run_write, session_scope, write_queue
+from app.dependencies import (
+    ai_service,
+    behavior_service,
+    event_recorder,
+    password_hasher,
+    rate_limit_store,
+    realtime_manager,
+    response_cache,
+    task_service,
+)
 from app.routers import ai, auth, insights, schedule, tasks
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CHANGELOG_RETENTION = timedelta(hours=float(os.getenv("CHANGELOG_RETENTION_HOURS", "168")))
+CHANGELOG_COMPACT_SECONDS = float(os.getenv("CHANGELOG_COMPACT_SECONDS", "3600"))
+ACTIVITY_ROLLUP_SECONDS = float(os.getenv("ACTIVITY_ROLLUP_SECONDS", "60"))
+
 # Resolve project root (works in any deployment CWD)
 BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_DIR = BASE_DIR / "static"
 
-app = FastAPI(title="AI Productivity OS", version="1.0.0", redirect_slashes=False)
+_background: set[asyncio.Task] = set()
+
+
+async def compact_change_log() -> None:
+    while True:
+        await asyncio.sleep(CHANGELOG_COMPACT_SECONDS)
+        try:
+            async with session_scope() as db:
+                removed = await run_write(db, task_service.compact_changes, CHANGELOG_RETENTION)
+            logger.info("Compacted %d task change log rows", removed)
+        except Exception:
+            logger.exception("Task change log compaction failed")
+
+
+async def roll_up_activity() -> None:
+    # Runs at startup too, so the first run's seeding from tasks happens early.
+    while True:
+        try:
+            async with session_scope() as db:
+                folded = await run_write(db, behavior_service.roll_up_activity)
+            if folded:
+                logger.info("Rolled up %d task events", folded)
+        except Exception:
+            logger.exception("Activity rollup failed")
+        await asyncio.sleep(ACTIVITY_ROLLUP_SECONDS)
+
+
+async def write_task_events(rows: list[dict[str, Any]]) -> None:
+    started = time.perf_counter()
+    async with session_scope() as db:
+        await run_write(db, task_service.store_events, rows)
+    metrics.EVENT_FLUSH_LATENCY.observe(time.perf_counter() - started)
+    metrics.EVENT_FLUSH_SIZE.observe(len(rows))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await init_db()
+    await realtime_manager.start()
+    _background.add(asyncio.create_task(metrics.monitor_loop_lag()))
+    _background.add(asyncio.create_task(event_recorder.run(write_task_events)))
+    _background.add(asyncio.create_task(compact_change_log()))
+    _background.add(asyncio.create_task(roll_up_activity()))
+    logger.info(f"Static dir: {STATIC_DIR} (exists={STATIC_DIR.exists()})")
+    logger.info(f"DB dir: {BASE_DIR}")
+    yield
+    for task in _background:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    _background.clear()
+    # Before the write queue closes: buffered events still need the writer.
+    flushed = await event_recorder.flush(write_task_events)
+    if flushed:
+        logger.info("Flushed %d buffered task events on shutdown", flushed)
+    password_hasher.shutdown()
+    ai_service.close()
+    if write_queue is not None:
+        write_queue.close()
+    rate_limit_store.close()
+    await realtime_manager.close()
+
+
+app = FastAPI(title="AI Productivity OS", version="1.0.0", redirect_slashes=False, lifespan=lifespan)
 
 
 @app.exception_handler(Exception)
@@ -32,6 +118,11 @@ async def global_exception_handler(request: Request, exc: Exception):
         content={"detail": f"Internal server error: {str(exc)}"},
     )
 
+# Inside CORS, so 429/503 responses still carry CORS headers for the browser.
+admission = create_admission_controller(rate_limit_store)
+if os.getenv("ADMISSION_CONTROL", "1") == "1":
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # CORS - allow all origins for development
 app.add_middleware(
     CORSMiddleware,
@@ -39,7 +130,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-DB-Queries", "ETag", "Retry-After"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")))
+# Outermost, so latency covers CORS handling and compression too.
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+if write_queue is not None:
+    metrics.instrument_engine(write_queue.engine)
+metrics.collectors.update(
+    principal_cache=principal_cache.stats,
+    realtime=realtime_manager.stats,
+    inference_cache=ai_service.cache.stats,
+    inference=ai_service.stats,
+    password_hasher=password_hasher.stats,
+    response_cache=response_cache.stats,
+    admission=admission.stats,
+    event_recorder=event_recorder.stats,
+)
+if write_queue is not None:
+    metrics.collectors["db_writer"] = write_queue.stats
 
 # Include routers FIRST (before static mount)
 app.include_router(auth.router)
@@ -49,16 +159,14 @@ app.include_router(insights.router)
 app.include_router(schedule.router)
 
 
-@app.on_event("startup")
-async def startup_event():
-    init_db()
-    logger.info(f"Static dir: {STATIC_DIR} (exists={STATIC_DIR.exists()})")
-    logger.info(f"DB dir: {BASE_DIR}")
+# Serves the ``python -m app.assets`` build from static/dist when there is one.
+static_files = StaticAssets(directory=str(STATIC_DIR))
 
 
 @app.get("/")
-async def serve_frontend():
-    return FileResponse(str(STATIC_DIR / "index.html"))
+async def serve_frontend(request: Request):
+    path = index_path(STATIC_DIR)
+    return static_files.file_response(path, path.stat(), request.scope)
 
 
 @app.get("/health")
@@ -66,15 +174,58 @@ async def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/caches")
+async def cache_stats() -> dict[str, dict[str, Any]]:
+    return {
+        "principals": principal_cache.stats(),
+        "realtime": realtime_manager.stats(),
+        "inference": ai_service.cache.stats(),
+        "batching": ai_service.stats(),
+        "responses": response_cache.stats(),
+        "writer": write_queue.stats() if write_queue is not None else {},
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.websocket("/v1/realtime")
-async def realtime_updates(websocket: WebSocket) -> None:
-    await realtime_manager.connect(websocket)
+async def realtime_updates(websocket: WebSocket, token: str = "", cursor: str | None = None) -> None:
+    # Browsers can't set headers on a WebSocket handshake, so the JWT comes as ?token=.
+    # With ?cursor= (from /v1/tasks/changes) the first message is a "tasks.changes"
+    # delta covering whatever happened while the client was away.
+    user_id = decode_subject(token) if token else None
+    principal = None
+    if user_id is not None:
+        async with session_scope() as db:
+            principal = await load_principal(db, user_id)
+    if principal is None or not principal.is_active:
+        await websocket.close(code=1008)
+        return
+    await realtime_manager.connect(websocket, principal.id)
+    if cursor is not None:
+        # Registered first, so no event can fall between the delta and the live stream.
+        realtime_manager.send(websocket, await _resume_message(principal.id, cursor))
     try:
         while True:
             await websocket.receive_text()
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
         realtime_manager.disconnect(websocket)
 
 
+async def _resume_message(owner_id: str, cursor: str) -> dict[str, Any]:
+    try:
+        since = int(cursor)
+        async with session_scope() as db:
+            delta = await run_db(db, task_service.changes_since, owner_id, since)
+    except (ValueError, LookupError):
+        return {"type": "tasks.resync", "payload": {"reason": "cursor_expired"}}
+    return {"type": "tasks.changes", "payload": delta.model_dump(mode="json")}
+
+
 # Mount static LAST so it doesn't shadow API routes
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+app.mount("/static", static_files, name="static")
@@ -0,0 +1,284 @@
+"""Prometheus metrics for the API, without a client library dependency.
+
+``MetricsMiddleware`` times every HTTP request by route template and counts
+the SQL statements it issues (via engine events and a context variable that
+follows the request into threadpool and writer threads). ``render`` produces
+the text exposition format served at ``GET /metrics``; component stats
+(caches, realtime, writer) are sampled at scrape time by ``collectors``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Requests issuing more statements than this get an X-DB-Queries header and a
+# warning log line: almost always a per-row query in a loop (N+1).
+QUERY_WARN_THRESHOLD = int(os.getenv("METRICS_QUERY_WARN", "25"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100, 250)
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> Labels:
+        return tuple((name, str(labels[name])) for name in self.label_names)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (+Inf last), sum.
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in self._series.items():
+                cumulative = 0
+                for bound, count in zip((*self.buckets, math.inf), counts):
+                    cumulative += count
+                    le = 'le="' + ("+Inf" if math.isinf(bound) else _format_value(float(bound))) + '"'
+                    lines.append(f"{self.name}_bucket{_format_labels(key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.", ("method",))
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements issued per HTTP request.", ("route",), QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per HTTP request.", ("route",), LATENCY_BUCKETS
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed.")
+DB_QUERY_TIME = Counter("db_query_seconds_total", "Time spent executing SQL statements.")
+QUERY_HEAVY_REQUESTS = Counter(
+    "http_requests_query_heavy_total", "Requests issuing more SQL statements than METRICS_QUERY_WARN.", ("route",)
+)
+REQUESTS_SHED = Counter(
+    "http_requests_shed_total", "Requests rejected by admission control before routing.", ("reason",)
+)
+EVENT_FLUSH_LATENCY = Histogram(
+    "event_flush_duration_seconds", "Time to write one batch of buffered task events.", (), LATENCY_BUCKETS
+)
+EVENT_FLUSH_SIZE = Histogram(
+    "event_flush_batch_size", "Task events written per buffered flush.", (), BATCH_SIZE_BUCKETS
+)
+LOOP_LAG = Gauge("event_loop_lag_seconds", "How late the last event loop lag probe woke up.")
+LOOP_LAG_MAX = Gauge("event_loop_lag_max_seconds", "Worst event loop lag seen since start.")
+
+METRICS: list[_Metric] = [
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    REQUEST_QUERIES,
+    REQUEST_DB_TIME,
+    DB_QUERIES,
+    DB_QUERY_TIME,
+    QUERY_HEAVY_REQUESTS,
+    REQUESTS_SHED,
+    EVENT_FLUSH_LATENCY,
+    EVENT_FLUSH_SIZE,
+    LOOP_LAG,
+    LOOP_LAG_MAX,
+]
+
+# name prefix -> stats() callable; numeric entries become gauges at scrape time.
+collectors: dict[str, Callable[[], dict[str, Any]]] = {}
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in METRICS:
+        lines += metric.header() + metric.samples()
+    for prefix, stats in collectors.items():
+        for name, value in _flatten(prefix, stats()):
+            lines += [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+    return "\n".join(lines) + "\n"
+
+
+def _flatten(prefix: str, stats: dict[str, Any]) -> Iterable[tuple[str, float]]:
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+# Set per request by the middleware. The object is shared, not copied, so
+# statements run in threadpool or writer threads (which get a copy of the
+# context) still add to the request's totals.
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement ``engine`` executes."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES.inc()
+        DB_QUERY_TIME.inc(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+class MetricsMiddleware:
+    """Records latency, in-flight requests and SQL per request for every HTTP call."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if stats.queries > QUERY_WARN_THRESHOLD:
+                    message.setdefault("headers", []).append((b"x-db-queries", str(stats.queries).encode()))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(method=method)
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method=method, route=route, status=str(status))
+            REQUEST_QUERIES.observe(stats.queries, route=route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, route=route)
+            if stats.queries > QUERY_WARN_THRESHOLD:
+                QUERY_HEAVY_REQUESTS.inc(route=route)
+                logger.warning(
+                    "%s %s issued %d SQL statements (%.1f ms); likely N+1",
+                    method, route, stats.queries, stats.db_seconds * 1000,
+                )
+
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """Sleep ``interval`` repeatedly; oversleeping means the loop was blocked."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        LOOP_LAG.set(lag)
+        if lag > LOOP_LAG_MAX.value():
+            LOOP_LAG_MAX.set(lag)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, String, Float, Integer, Date, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -40,9 +40,130 @@ class TaskModel(Base):
     due_at = Column(DateTime, nullable=True)
     predicted_due_at = Column(DateTime, nullable=True)
     parent_task_id = Column(String(36), nullable=True)
-    tags = Column(Text, default="[]")
     owner_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    # Cached rollups over this task and all its descendants, kept current by
+    # TaskService whenever a task in the subtree changes.
+    subtree_tasks = Column(Integer, default=1)
+    subtree_done = Column(Integer, default=0)
+    subtree_minutes = Column(Integer, default=30)
 
     owner = relationship("User", back_populates="tasks")
+    tag_links = relationship(
+        "TaskTag",
+        order_by="TaskTag.position",
+        cascade="all, delete-orphan",
+        lazy="selectin",
+    )
+
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) within one owner.
+        Index("ix_tasks_owner_created", "owner_id", "created_at", "id"),
+        Index("ix_tasks_owner_status", "owner_id", "status"),
+        Index("ix_tasks_parent", "parent_task_id"),
+    )
+
+
+class TaskTag(Base):
+    """One row per (task, tag); replaces the old JSON ``tasks.tags`` column."""
+
+    __tablename__ = "task_tags"
+
+    task_id = Column(String(36), ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String(100), primary_key=True)
+    owner_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_task_tags_owner_tag", "owner_id", "tag", "task_id"),)
+
+
+class TaskStats(Base):
+    """Per-owner task counters kept in step with TaskService mutations.
+
+    Status columns are named after ``TaskStatus`` values. ``version`` goes up
+    on every committed change to the owner's tasks and backs HTTP ETags.
+    """
+
+    __tablename__ = "task_stats"
+
+    owner_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    todo = Column(Integer, nullable=False, default=0)
+    in_progress = Column(Integer, nullable=False, default=0)
+    done = Column(Integer, nullable=False, default=0)
+    blocked = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0)
+    # Highest change-log seq compacted away; older delta cursors must resync.
+    changes_floor = Column(Integer, nullable=False, default=0)
+
+
+class TaskChangeModel(Base):
+    """Append-only log of task writes, one row per task per mutation; read by delta sync.
+
+    ``seq`` is AUTOINCREMENT so compaction never lets a sequence number come back.
+    """
+
+    __tablename__ = "task_changes"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    owner_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    task_id = Column(String(36), nullable=False)
+    # "upsert" or "delete"
+    op = Column(String(10), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_task_changes_owner_seq", "owner_id", "seq"),
+        Index("ix_task_changes_task_seq", "task_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+class TaskEventModel(Base):
+    """One row per task status transition; ``from_status`` is NULL when the task is created.
+
+    Folded into ``activity_hourly``/``activity_daily`` by ``BehaviorService.roll_up_activity``.
+    """
+
+    __tablename__ = "task_events"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    owner_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    task_id = Column(String(36), nullable=False)
+    from_status = Column(String(20), nullable=True)
+    to_status = Column(String(20), nullable=False)
+    at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_task_events_owner_seq", "owner_id", "seq"), {"sqlite_autoincrement": True})
+
+
+class ActivityHourly(Base):
+    """Completions per owner and hour of day (UTC), across all time: at most 24 rows per owner."""
+
+    __tablename__ = "activity_hourly"
+
+    owner_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    completed = Column(Integer, nullable=False, default=0)
+
+
+class ActivityDaily(Base):
+    """Tasks created and completed per owner and UTC day."""
+
+    __tablename__ = "activity_daily"
+
+    owner_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    created = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """Last ``task_events.seq`` folded into the aggregates by the rollup named ``name``."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    seq = Column(Integer, nullable=False, default=0)
@@ -1,12 +1,9 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-
-from app.auth import get_current_user
-from app.database import get_db
+from app.auth import Principal, get_current_user
+from app.database import DBSession, get_db, run_db, run_write
 from app.dependencies import ai_service, task_service
-from app.models import User
 from app.schemas import TaskBreakdownResponse, TaskEstimationResponse
 
 router = APIRouter(prefix="/v1/tasks", tags=["ai"])
@@ -15,29 +12,28 @@ router = APIRouter(prefix="/v1/tasks", tags=["ai"])
 @router.post("/{task_id}/ai-breakdown", response_model=TaskBreakdownResponse)
 async def ai_breakdown(
     task_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     try:
-        db_task = task_service.get(db, task_id, current_user.id)
+        db_task = await run_db(db, task_service.get, task_id, current_user.id)
         task = task_service.to_schema(db_task)
     except Exception as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    return TaskBreakdownResponse(task_id=task.id, generated_subtasks=ai_service.generate_subtasks(task))
+    return TaskBreakdownResponse(task_id=task.id, generated_subtasks=await ai_service.generate_subtasks_async(task))
 
 
 @router.post("/{task_id}/estimate", response_model=TaskEstimationResponse)
 async def estimate_task(
     task_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     try:
-        db_task = task_service.get(db, task_id, current_user.id)
+        db_task = await run_db(db, task_service.get, task_id, current_user.id)
         task = task_service.to_schema(db_task)
     except Exception as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    minutes, confidence = ai_service.estimate_effort(task)
-    db_task.estimated_minutes = minutes
-    db.commit()
+    minutes, confidence = await ai_service.estimate_effort_async(task)
+    await run_write(db, task_service.apply_estimates, task.id, current_user.id, minutes)
     return TaskEstimationResponse(task_id=task.id, estimated_minutes=minutes, confidence=confidence)
@@ -5,48 +5,60 @@ import traceback
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import User
-from app.auth import get_password_hash, verify_password, create_access_token
+from app.database import DBSession, get_db, run_db, run_write
+from app.auth import (
+    Principal,
+    create_access_token,
+    create_user,
+    decode_subject,
+    get_user_by_email,
+    get_user_by_username,
+    load_principal,
+    principal_cache,
+    update_password_hash,
+)
+from app.dependencies import password_hasher
+from app.services.password_hasher import PasswordHasherBusy
 from app.schemas import UserCreate, UserLogin, UserResponse, Token
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
+def _busy(exc: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
 @router.post("/signup/", response_model=Token, status_code=status.HTTP_201_CREATED, include_in_schema=False)
-async def signup(payload: UserCreate, db: Session = Depends(get_db)):
+async def signup(payload: UserCreate, db: DBSession = Depends(get_db)):
     try:
         # Check existing username
-        existing_user = db.query(User).filter(User.username == payload.username).first()
+        existing_user = await run_db(db, get_user_by_username, payload.username)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Username already taken",
             )
         # Check existing email
-        existing_email = db.query(User).filter(User.email == payload.email).first()
+        existing_email = await run_db(db, get_user_by_email, payload.email)
         if existing_email:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Email already registered",
             )
 
-        hashed = get_password_hash(payload.password)
-        user = User(
-            username=payload.username,
-            email=payload.email,
-            full_name=payload.full_name,
-            hashed_password=hashed,
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        hashed = await password_hasher.hash(payload.password)
+        user = await run_write(db, create_user, payload.username, payload.email, payload.full_name, hashed)
 
         access_token = create_access_token(data={"sub": user.id})
+        # The client's next call will present this token; warm its principal.
+        principal_cache.put(Principal.from_user(user))
         user_resp = UserResponse(
             id=user.id,
             username=user.username,
@@ -58,9 +70,10 @@ async def signup(payload: UserCreate, db: Session = Depends(get_db)):
         return Token(access_token=access_token, user=user_resp)
     except HTTPException:
         raise
+    except PasswordHasherBusy as exc:
+        raise _busy(exc) from exc
     except Exception as exc:
         logger.error(f"Signup error: {traceback.format_exc()}")
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Account creation failed: {str(exc)}",
@@ -69,17 +82,25 @@ async def signup(payload: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 @router.post("/login/", response_model=Token, include_in_schema=False)
-async def login(payload: UserLogin, db: Session = Depends(get_db)):
+async def login(payload: UserLogin, db: DBSession = Depends(get_db)):
     try:
-        user = db.query(User).filter(User.username == payload.username).first()
-        if not user or not verify_password(payload.password, user.hashed_password):
+        user = await run_db(db, get_user_by_username, payload.username)
+        valid, new_hash = (False, None)
+        if user:
+            valid, new_hash = await password_hasher.verify_and_update(payload.password, user.hashed_password)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        if new_hash:
+            # pwd_context settings changed since this hash was stored
+            await run_write(db, update_password_hash, user.id, new_hash)
 
         access_token = create_access_token(data={"sub": user.id})
+        # The client's next call will present this token; warm its principal.
+        principal_cache.put(Principal.from_user(user))
         user_resp = UserResponse(
             id=user.id,
             username=user.username,
@@ -91,6 +112,8 @@ async def login(payload: UserLogin, db: Session = Depends(get_db)):
         return Token(access_token=access_token, user=user_resp)
     except HTTPException:
         raise
+    except PasswordHasherBusy as exc:
+        raise _busy(exc) from exc
     except Exception as exc:
         logger.error(f"Login error: {traceback.format_exc()}")
         raise HTTPException(
@@ -102,25 +125,18 @@ async def login(payload: UserLogin, db: Session = Depends(get_db)):
 @router.get("/me", response_model=UserResponse)
 @router.get("/me/", response_model=UserResponse, include_in_schema=False)
 async def get_me(
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     token: str = None,
 ):
     """Get current user info from token passed as query param."""
-    from jose import JWTError, jwt
-    from app.auth import SECRET_KEY, ALGORITHM
-
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    try:
-        decoded = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = decoded.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
+    user_id = decode_subject(token)
+    if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await load_principal(db, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
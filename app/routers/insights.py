@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from datetime import datetime
 
-from app.auth import get_current_user
-from app.database import get_db
-from app.dependencies import behavior_service, task_service
-from app.models import User
+from fastapi import APIRouter, Depends, Request, Response
+from app.auth import Principal, get_current_user
+from app.conditional import entity_tag, not_modified, not_modified_response, validator_headers
+from app.database import DBSession, get_db, run_db
+from app.dependencies import behavior_service, response_cache, task_service
 from app.schemas import BehaviorInsights
 
 router = APIRouter(prefix="/v1/insights", tags=["insights"])
@@ -14,7 +14,25 @@ router = APIRouter(prefix="/v1/insights", tags=["insights"])
 
 @router.get("/behavior", response_model=BehaviorInsights)
 async def behavior_insights(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    return behavior_service.generate_insights(task_service, db, current_user.id)
+    """Derived from the owner's tasks, their stored events and the date; cached per all three with an ``ETag``."""
+    version = await run_db(
+        db, lambda session: behavior_service.data_version(task_service, session, current_user.id)
+    )
+    # The forecast window moves at midnight UTC even when no task changes.
+    version_today = f"{version}.{datetime.utcnow().date().isoformat()}"
+    etag = entity_tag(current_user.id, version_today)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    key = (current_user.id, version_today, "insights")
+    cached = response_cache.get(key)
+    if cached is None:
+        insights = await run_db(
+            db, lambda session: behavior_service.generate_insights(task_service, session, current_user.id)
+        )
+        cached = (insights.model_dump_json().encode(), {})
+        response_cache.put(key, *cached)
+    return Response(cached[0], media_type="application/json", headers=validator_headers(etag))
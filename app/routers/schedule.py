@@ -1,15 +1,13 @@
 from __future__ import annotations
 
-from datetime import timedelta
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-
-from app.auth import get_current_user
-from app.database import get_db
-from app.dependencies import task_service
-from app.models import User
-from app.schemas import ScheduleBlock, ScheduleRequest, ScheduleResponse
+from app.auth import Principal, get_current_user
+from app.database import DBSession, get_db, run_db
+from app.dependencies import scheduler, task_service
+from app.schemas import ScheduleRequest, ScheduleResponse
+from app.services.scheduler import SchedulableTask, WorkingHours
 
 router = APIRouter(prefix="/v1/schedule", tags=["schedule"])
 
@@ -17,26 +15,20 @@ router = APIRouter(prefix="/v1/schedule", tags=["schedule"])
 @router.post("/optimize", response_model=ScheduleResponse)
 async def optimize_schedule(
     payload: ScheduleRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    cursor = payload.start_at
-    blocks: list[ScheduleBlock] = []
-    for task_id in payload.tasks:
-        db_task = task_service.get(db, str(task_id), current_user.id)
-        task = task_service.to_schema(db_task)
-        duration = max(task.estimated_minutes, 25)
-        block = ScheduleBlock(
-            task_id=task.id,
-            starts_at=cursor,
-            ends_at=cursor + timedelta(minutes=duration),
-            confidence=0.78,
-            explanation={
-                "strategy": "priority_and_energy_fit",
-                "priority_score": task.priority_score,
-                "estimated_minutes": task.estimated_minutes,
-            },
-        )
-        blocks.append(block)
-        cursor = block.ends_at + timedelta(minutes=5)
-    return ScheduleResponse(blocks=blocks)
+    db_tasks = await run_db(db, task_service.get_schedulable, payload.tasks, current_user.id)
+    found = {task.id for task in db_tasks}
+    missing = [task_id for task_id in payload.tasks if task_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Task {missing[0]} not found")
+    hours = WorkingHours(
+        start_hour=payload.work_start_hour,
+        end_hour=payload.work_end_hour,
+        break_minutes=payload.break_minutes,
+        max_block_minutes=payload.max_block_minutes,
+    )
+    blocks = scheduler.plan([SchedulableTask.from_model(t) for t in db_tasks], payload.start_at, hours)
+    # Plain dicts straight to orjson; ``response_model`` documents the shape.
+    return ORJSONResponse({"blocks": blocks})
@@ -1,82 +1,267 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Literal
 
-from app.auth import get_current_user
-from app.database import get_db
-from app.dependencies import ai_service, realtime_manager, task_service
-from app.models import User
-from app.schemas import Task, TaskCreate, TaskUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from app.auth import Principal, get_current_user
+from app.conditional import entity_tag, not_modified, not_modified_response, validator_headers
+from app.database import DBSession, get_db, run_db, run_write
+from app.dependencies import ai_service, event_recorder, realtime_manager, response_cache, task_service
+from app.schemas import (
+    TagCount,
+    Task,
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskChanges,
+    TaskCreate,
+    TaskListFilters,
+    TaskReestimateResult,
+    TaskSearchHit,
+    TaskStatus,
+    TaskTreeNode,
+    TaskUpdate,
+)
+from app.services.task_service import TASK_FIELDS
 
 router = APIRouter(prefix="/v1/tasks", tags=["tasks"])
 
 
 @router.get("", response_model=list[Task])
 async def list_tasks(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    status: list[TaskStatus] | None = Query(None),
+    parent_task_id: str | None = None,
+    due_after: datetime | None = None,
+    due_before: datetime | None = None,
+    min_priority: float | None = None,
+    max_priority: float | None = None,
+    tag: list[str] | None = Query(None),
+    tag_mode: Literal["all", "any"] = "all",
+    fields: str | None = Query(None, description="Comma-separated subset of task fields"),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    tasks = task_service.list_all(db, current_user.id)
-    return [task_service.to_schema(t) for t in tasks]
+    """List tasks newest first; follow ``X-Next-Cursor`` for the next page.
+
+    Sends an ``ETag``; a matching ``If-None-Match`` gets 304 without a task query.
+    """
+    filters = TaskListFilters(
+        status=status,
+        parent_task_id=parent_task_id,
+        due_after=due_after,
+        due_before=due_before,
+        min_priority=min_priority,
+        max_priority=max_priority,
+        tags=tag,
+        tag_mode=tag_mode,
+    )
+    selected = list(TASK_FIELDS)
+    if fields:
+        selected = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(selected) - set(TASK_FIELDS))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # Read the version before the page, so the body is never older than its tag.
+    version = await run_db(db, task_service.data_version, current_user.id)
+    etag = entity_tag(current_user.id, version)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    key = (current_user.id, version, "tasks", request.url.query)
+    cached = response_cache.get(key)
+    if cached is not None:
+        body, headers = cached
+        return Response(body, media_type="application/json", headers={**headers, **validator_headers(etag)})
+    try:
+        # Column tuples straight to orjson: rows are not validated twice
+        # (``to_schema`` and ``response_model``) on the hottest endpoint.
+        items, next_cursor = await run_db(
+            db, task_service.list_page_fields, current_user.id, filters, limit, selected, cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    response = ORJSONResponse(items, headers={**headers, **validator_headers(etag)})
+    response_cache.put(key, response.body, headers)
+    return response
 
 
 @router.post("", response_model=Task)
 async def create_task(
     payload: TaskCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    db_task = task_service.create(db, payload, current_user.id)
+    # Predict up front so the row is written once, AI fields included.
+    draft = Task(**payload.model_dump(), owner_id=current_user.id)
+    [(minutes, predicted_due_at)] = await ai_service.predict_batch_async([draft])
+    await event_recorder.wait_for_space()
+    db_task = await run_write(db, task_service.create, payload, current_user.id, minutes, predicted_due_at)
     task = task_service.to_schema(db_task)
-    task.predicted_due_at = ai_service.predict_deadline(task)
-    minutes, _ = ai_service.estimate_effort(task)
-    task.estimated_minutes = minutes
-    # Update DB with AI predictions
-    db_task.predicted_due_at = task.predicted_due_at
-    db_task.estimated_minutes = minutes
-    db.commit()
-    await realtime_manager.broadcast({"type": "task.created", "payload": task.model_dump(mode="json")})
+    realtime_manager.broadcast(
+        current_user.id, {"type": "task.created", "payload": task.model_dump(mode="json")}
+    )
     return task
 
 
+@router.post(":batch", response_model=TaskBatchResponse)
+async def batch_tasks(
+    payload: TaskBatchRequest,
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Apply up to 1000 create/update/delete operations in one transaction."""
+    creates = [(index, op) for index, op in enumerate(payload.operations) if op.op == "create"]
+    drafts = [Task(**op.data.model_dump(), owner_id=current_user.id) for _, op in creates]
+    predictions = await ai_service.predict_batch_async(drafts)
+    estimates = {index: prediction for (index, _), prediction in zip(creates, predictions)}
+    await event_recorder.wait_for_space()
+    results = await run_write(db, task_service.apply_batch, current_user.id, payload.operations, estimates)
+
+    event: dict[str, list] = {"created": [], "updated": [], "deleted": []}
+    for result in results:
+        if result.op == "create" and result.task:
+            event["created"].append(result.task.model_dump(mode="json"))
+        elif result.op == "update" and result.task:
+            event["updated"].append(result.task.model_dump(mode="json"))
+        elif result.op == "delete" and result.status == 204:
+            event["deleted"].append(result.task_id)
+    if any(event.values()):
+        realtime_manager.broadcast(current_user.id, {"type": "tasks.batch", "payload": event})
+    return TaskBatchResponse(results=results)
+
+
+@router.post(":reestimate", response_model=TaskReestimateResult)
+async def reestimate_tasks(
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Re-score every open task with the current estimator, in chunks.
+
+    Each chunk is read on the request's session, scored on the inference
+    thread and written as its own write job together with its rollup
+    deltas, so other writes interleave and the SQLite write lock is never
+    held across inference. The reads share one transaction, so a single
+    read snapshot stays open for the whole request and holds back WAL
+    checkpoints until it returns.
+    """
+    scanned = updated = 0
+    after = ""
+    while rows := await run_db(db, task_service.open_tasks_after, current_user.id, after):
+        changes = task_service.estimate_changes(rows, await ai_service.predict_many_async(rows))
+        if changes:
+            await run_write(db, task_service.write_estimates, current_user.id, changes)
+        scanned += len(rows)
+        updated += len(changes)
+        after = rows[-1].id
+    result = TaskReestimateResult(scanned=scanned, updated=updated)
+    if result.updated:
+        realtime_manager.broadcast(current_user.id, {"type": "tasks.resync", "payload": result.model_dump()})
+    return result
+
+
+@router.get("/search", response_model=list[TaskSearchHit])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Ranked full-text search over titles and descriptions; each word matches as a prefix."""
+    return await run_db(db, task_service.search, current_user.id, q, limit)
+
+
+@router.get("/changes", response_model=TaskChanges)
+async def task_changes(
+    since: str | None = Query(None, description="Cursor from a previous response; omit to get the current one"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Tasks created, updated or deleted after ``since``; 410 means refetch the full list."""
+    try:
+        cursor = int(since) if since is not None else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    try:
+        return await run_db(db, task_service.changes_since, current_user.id, cursor, limit)
+    except LookupError as exc:
+        raise HTTPException(status_code=410, detail=str(exc)) from exc
+
+
+@router.get("/tags", response_model=list[TagCount])
+async def tag_counts(
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Number of tasks per tag, most used first."""
+    return await run_db(db, task_service.tag_counts, current_user.id)
+
+
 @router.get("/{task_id}", response_model=Task)
 async def get_task(
     task_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
+    version = await run_db(db, task_service.data_version, current_user.id)
+    etag = entity_tag(current_user.id, version)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
     try:
-        db_task = task_service.get(db, task_id, current_user.id)
-        return task_service.to_schema(db_task)
+        db_task = await run_db(db, task_service.get, task_id, current_user.id)
+        task = task_service.to_schema(db_task)
     except Exception as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    response.headers.update(validator_headers(etag))
+    return task
+
+
+@router.get("/{task_id}/tree", response_model=TaskTreeNode)
+async def get_task_tree(
+    task_id: str,
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """The task with all of its subtasks nested under ``children``, each with rollups."""
+    try:
+        return await run_db(db, task_service.tree, task_id, current_user.id)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
 
 
 @router.patch("/{task_id}", response_model=Task)
 async def update_task(
     task_id: str,
     payload: TaskUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
+    await event_recorder.wait_for_space()
     try:
-        db_task = task_service.update(db, task_id, current_user.id, payload)
+        db_task = await run_write(db, task_service.update, task_id, current_user.id, payload)
     except Exception as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     task = task_service.to_schema(db_task)
-    await realtime_manager.broadcast({"type": "task.updated", "payload": task.model_dump(mode="json")})
+    realtime_manager.broadcast(
+        current_user.id, {"type": "task.updated", "payload": task.model_dump(mode="json")}
+    )
     return task
 
 
 @router.delete("/{task_id}", status_code=204)
 async def delete_task(
     task_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     try:
-        task_service.delete(db, task_id, current_user.id)
+        await run_write(db, task_service.delete, task_id, current_user.id)
     except Exception as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    await realtime_manager.broadcast({"type": "task.deleted", "payload": {"task_id": task_id}})
+    realtime_manager.broadcast(current_user.id, {"type": "task.deleted", "payload": {"task_id": task_id}})
@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Any, Optional
+from typing import Annotated, Any, Literal, Optional, Union
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, model_validator
 
 
 # ── Auth Schemas ──────────────────────────────────────────────
@@ -84,6 +84,102 @@ class Task(TaskBase):
         from_attributes = True
 
 
+class TaskBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: TaskCreate
+
+
+class TaskBatchUpdate(BaseModel):
+    op: Literal["update"]
+    task_id: str
+    data: TaskUpdate
+
+
+class TaskBatchDelete(BaseModel):
+    op: Literal["delete"]
+    task_id: str
+
+
+TaskBatchOperation = Annotated[Union[TaskBatchCreate, TaskBatchUpdate, TaskBatchDelete], Field(discriminator="op")]
+
+
+class TaskBatchRequest(BaseModel):
+    operations: list[TaskBatchOperation] = Field(min_length=1, max_length=1000)
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    task_id: str | None = None
+    task: Task | None = None
+    error: str | None = None
+
+
+class TaskBatchResponse(BaseModel):
+    results: list[TaskBatchResult]
+
+
+class TaskListFilters(BaseModel):
+    status: list[TaskStatus] | None = None
+    parent_task_id: str | None = None
+    due_after: datetime | None = None
+    due_before: datetime | None = None
+    min_priority: float | None = None
+    max_priority: float | None = None
+    tags: list[str] | None = None
+    # "all": task carries every tag in ``tags``; "any": at least one.
+    tag_mode: Literal["all", "any"] = "all"
+
+
+class TaskRollup(BaseModel):
+    """Totals over a task and all of its descendants."""
+
+    task_count: int
+    done_count: int
+    estimated_minutes: int
+    done_ratio: float
+
+
+class TaskReestimateResult(BaseModel):
+    scanned: int
+    updated: int
+
+
+class TaskChange(BaseModel):
+    """Latest state of one task: the full task, or a tombstone if it was deleted."""
+
+    op: Literal["upsert", "delete"]
+    task_id: str
+    task: Task | None = None
+
+
+class TaskChanges(BaseModel):
+    """Tasks changed after a cursor; pass ``cursor`` back as ``since`` for the next delta."""
+
+    cursor: str
+    changes: list[TaskChange]
+    has_more: bool = False
+
+
+class TaskTreeNode(Task):
+    rollup: TaskRollup
+    children: list[TaskTreeNode] = Field(default_factory=list)
+
+
+class TaskSearchHit(BaseModel):
+    task: Task
+    score: float
+    # Matched words are wrapped in <mark>…</mark>; the rest is raw task text.
+    title_snippet: str
+    description_snippet: str | None = None
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+
 class TaskBreakdownResponse(BaseModel):
     task_id: str
     generated_subtasks: list[str]
@@ -113,6 +209,16 @@ class ScheduleBlock(BaseModel):
 class ScheduleRequest(BaseModel):
     tasks: list[str]
     start_at: datetime
+    work_start_hour: int = Field(default=9, ge=0, le=23)
+    work_end_hour: int = Field(default=17, ge=1, le=24)
+    break_minutes: int = Field(default=5, ge=0, le=120)
+    max_block_minutes: int = Field(default=90, ge=15, le=480)
+
+    @model_validator(mode="after")
+    def _check_window(self) -> "ScheduleRequest":
+        if self.work_end_hour <= self.work_start_hour:
+            raise ValueError("work_end_hour must be after work_start_hour")
+        return self
 
 
 class ScheduleResponse(BaseModel):
@@ -1,52 +1,175 @@
 from __future__ import annotations
 
+import asyncio
 import math
-import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence
 
 from app.schemas import Task
-
-KEYWORD_RE = re.compile(r"\b[a-zA-Z]{4,}\b")
+from app.services import model_backend
+from app.services.inference_cache import InferenceCache, content_key
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_backend import ModelBackend
 
 
 class AIService:
-    """Lightweight heuristics that mimic AI endpoints.
+    """AI endpoints on top of a batched ``ModelBackend``.
 
-    Swap these methods with model calls once model serving is available.
+    The default backend is a lightweight heuristic; set ``AI_BACKEND`` (see
+    ``model_backend.create_model_backend``) to swap in a real model.
     """
 
+    def __init__(self, backend: Optional[ModelBackend] = None) -> None:
+        self.backend = backend or ModelBackend()
+
+    @property
+    def model_version(self) -> str:
+        return self.backend.version
+
     def summarize(self, description: str) -> str:
-        if len(description) <= 140:
-            return description
-        return description[:137].rstrip() + "..."
+        return model_backend.summarize(description)
 
     def extract_keywords(self, text: str, limit: int = 5) -> list[str]:
-        counts: dict[str, int] = {}
-        for token in KEYWORD_RE.findall(text.lower()):
-            counts[token] = counts.get(token, 0) + 1
-        ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
-        return [word for word, _ in ranked[:limit]]
+        return model_backend.extract_keywords(text, limit)
 
     def generate_subtasks(self, task: Task) -> list[str]:
-        seeds = [
-            "Define acceptance criteria",
-            "Break work into 30-minute focus blocks",
-            "Schedule first execution block",
-            "Review and refine output",
-        ]
-        if task.description:
-            seeds[0] = f"Clarify: {self.summarize(task.description)}"
-        return seeds
+        return self.backend.generate_subtasks([task])[0]
 
     def estimate_effort(self, task: Task) -> tuple[int, float]:
-        text = " ".join(filter(None, [task.title, task.description or ""]))
-        complexity = max(1, len(self.extract_keywords(text, limit=10)))
-        minutes = min(8 * 60, 20 + complexity * 18)
-        confidence = max(0.35, min(0.92, 1.0 - (1 / (complexity + 2))))
-        return minutes, round(confidence, 3)
+        return self.backend.estimate_effort([task])[0]
+
+    def estimate_effort_many(self, tasks: Sequence[Any]) -> list[tuple[int, float]]:
+        """``estimate_effort`` for many tasks (anything with ``title``/``description``) in one model call."""
+        return self.backend.estimate_effort(tasks) if tasks else []
 
     def predict_deadline(self, task: Task) -> datetime | None:
         if task.due_at:
             return task.due_at
         minutes, _ = self.estimate_effort(task)
-        return datetime.utcnow() + timedelta(minutes=math.ceil(minutes * 1.15))
+        return self._deadline_after(datetime.utcnow(), minutes)
+
+    def predict_batch(self, tasks: list[Task]) -> list[tuple[int, datetime | None]]:
+        """``(estimated_minutes, predicted_due_at)`` per task, estimating each task once."""
+        now = datetime.utcnow()
+        predictions = []
+        for task in tasks:
+            minutes, _ = self.estimate_effort(task)
+            predictions.append((minutes, task.due_at or self._deadline_after(now, minutes)))
+        return predictions
+
+    def predict_many(self, tasks: Sequence[Any]) -> list[tuple[int, datetime | None]]:
+        """``predict_batch`` on ``estimate_effort_many``, for bulk re-scoring.
+
+        Never memoized: re-estimation exists to replace earlier results.
+        """
+        now = datetime.utcnow()
+        return [
+            (minutes, task.due_at or self._deadline_after(now, minutes))
+            for task, (minutes, _) in zip(tasks, self.estimate_effort_many(tasks))
+        ]
+
+    @staticmethod
+    def _deadline_after(now: datetime, minutes: int) -> datetime:
+        return now + timedelta(minutes=math.ceil(minutes * 1.15))
+
+
+class MemoizedAIService(AIService):
+    """``AIService`` that caches each inference by a hash of the content it reads.
+
+    ``predict_deadline`` and ``predict_batch`` go through ``estimate_effort``
+    and so share its cache; an unchanged task never runs inference twice.
+    """
+
+    def __init__(self, cache: InferenceCache, backend: Optional[ModelBackend] = None) -> None:
+        super().__init__(backend)
+        self.cache = cache
+
+    def estimate_effort(self, task: Task) -> tuple[int, float]:
+        key = self._effort_key(task)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached[0], cached[1]
+        minutes, confidence = super().estimate_effort(task)
+        self.cache.put(key, [minutes, confidence])
+        return minutes, confidence
+
+    def generate_subtasks(self, task: Task) -> list[str]:
+        key = self._subtasks_key(task)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        subtasks = super().generate_subtasks(task)
+        self.cache.put(key, subtasks)
+        return subtasks
+
+    def _effort_key(self, task: Task) -> str:
+        return content_key(self.model_version, "estimate_effort", task.title, task.description or "")
+
+    def _subtasks_key(self, task: Task) -> str:
+        return content_key(self.model_version, "generate_subtasks", task.description or "")
+
+
+class BatchedAIService(MemoizedAIService):
+    """``MemoizedAIService`` with async variants for request handlers.
+
+    Cache hits return immediately; misses from concurrent requests are
+    coalesced by a ``MicroBatcher`` into one backend call per batch, run on a
+    single inference thread so the event loop is never blocked by a model.
+    """
+
+    def __init__(
+        self,
+        cache: InferenceCache,
+        backend: Optional[ModelBackend] = None,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ) -> None:
+        super().__init__(cache, backend)
+        # One thread: batches queue behind each other like on a model server,
+        # and requests arriving meanwhile fill the next batch.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._effort = MicroBatcher(self.backend.estimate_effort, self._executor, max_batch_size, max_wait_ms)
+        self._subtasks = MicroBatcher(self.backend.generate_subtasks, self._executor, max_batch_size, max_wait_ms)
+
+    async def estimate_effort_async(self, task: Task) -> tuple[int, float]:
+        key = self._effort_key(task)
+        cached = await self.cache.get_async(key)
+        if cached is not None:
+            return cached[0], cached[1]
+        minutes, confidence = await self._effort.submit(task)
+        self.cache.put(key, [minutes, confidence])
+        return minutes, confidence
+
+    async def predict_many_async(self, tasks: Sequence[Any]) -> list[tuple[int, datetime | None]]:
+        """``predict_many`` on the inference thread, queued like any other batch."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.predict_many, tasks)
+
+    async def generate_subtasks_async(self, task: Task) -> list[str]:
+        key = self._subtasks_key(task)
+        cached = await self.cache.get_async(key)
+        if cached is not None:
+            return cached
+        subtasks = await self._subtasks.submit(task)
+        self.cache.put(key, subtasks)
+        return subtasks
+
+    async def predict_batch_async(self, tasks: list[Task]) -> list[tuple[int, datetime | None]]:
+        """``predict_batch``; a whole request's misses land in the same micro-batch."""
+        estimates = await asyncio.gather(*(self.estimate_effort_async(task) for task in tasks))
+        now = datetime.utcnow()
+        return [
+            (minutes, task.due_at or self._deadline_after(now, minutes))
+            for task, (minutes, _) in zip(tasks, estimates)
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "estimate_effort": self._effort.stats(),
+            "generate_subtasks": self._subtasks.stats(),
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import errno
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# (owner_id, serialized message) -> None
+Deliver = Callable[[str, str], None]
+
+# Sent instead of an event too large for one datagram; clients refetch.
+RESYNC_EVENT = json.dumps({"type": "tasks.resync", "payload": {}})
+
+
+class Backplane:
+    """Carries realtime events between worker processes.
+
+    ``ConnectionManager`` delivers to its own sockets directly and calls
+    ``publish`` so every *other* worker can deliver to theirs. ``publish``
+    must not block. A Redis pub/sub adapter would implement these three
+    methods with a channel per deployment.
+    """
+
+    async def start(self, deliver: Deliver) -> None:
+        pass
+
+    def publish(self, owner_id: str, text: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        return {}
+
+
+class UnixSocketBackplane(Backplane):
+    """Peer-to-peer fan-out over Unix datagram sockets on one host.
+
+    Each worker binds ``<directory>/<pid>-<id>.sock`` and publishes by sending
+    one datagram to every other socket in the directory. There is no broker
+    process; sockets left behind by dead workers are unlinked the first time
+    a send to them is refused.
+    """
+
+    PEER_REFRESH_SECONDS = 1.0
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        self._sock: socket.socket | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._deliver: Deliver | None = None
+        self._peers: list[str] = []
+        self._peers_at = 0.0
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+
+    async def start(self, deliver: Deliver) -> None:
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(str(self.path))
+        self._sock = sock
+        self._deliver = deliver
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+
+    def publish(self, owner_id: str, text: str) -> None:
+        if self._sock is None:
+            return
+        data = f"{owner_id}\n{text}".encode()
+        for peer in self._current_peers():
+            self._send(peer, data, owner_id)
+
+    async def close(self) -> None:
+        if self._sock is None:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        self.path.unlink(missing_ok=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "peers": len(self._peers),
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+        }
+
+    def _send(self, peer: str, data: bytes, owner_id: str) -> None:
+        try:
+            self._sock.sendto(data, peer)
+            self.published += 1
+        except BlockingIOError:
+            # Peer's receive buffer is full; never stall the publisher.
+            self.dropped += 1
+        except (ConnectionRefusedError, FileNotFoundError):
+            Path(peer).unlink(missing_ok=True)
+            self._peers_at = 0.0
+        except OSError as exc:
+            if exc.errno != errno.EMSGSIZE:
+                raise
+            self._send(peer, f"{owner_id}\n{RESYNC_EVENT}".encode(), owner_id)
+
+    def _current_peers(self) -> list[str]:
+        now = time.monotonic()
+        if now - self._peers_at > self.PEER_REFRESH_SECONDS:
+            own = str(self.path)
+            self._peers = [
+                str(entry) for entry in self.directory.glob("*.sock") if str(entry) != own
+            ]
+            self._peers_at = now
+        return self._peers
+
+    def _on_readable(self) -> None:
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(1 << 20)
+            except BlockingIOError:
+                return
+            owner_id, _, text = data.decode().partition("\n")
+            self.received += 1
+            try:
+                self._deliver(owner_id, text)
+            except Exception:
+                logger.exception("Delivering backplane event failed")
+
+
+def create_backplane(kind: str, directory: str | None = None) -> Backplane:
+    if kind == "local":
+        return Backplane()
+    if kind == "unix":
+        return UnixSocketBackplane(directory or Path(tempfile.gettempdir()) / "productivity-realtime")
+    raise ValueError(f"Unknown realtime backplane {kind!r}")
@@ -1,20 +1,214 @@
 from __future__ import annotations
 
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import Table, extract, func, insert, select, update
 from sqlalchemy.orm import Session
 
-from app.schemas import BehaviorInsights
+from app.models import ActivityDaily, ActivityHourly, RollupWatermark, TaskEventModel, TaskModel
+from app.schemas import BehaviorInsights, TaskStatus
 from app.services.task_service import TaskService
 
+# Used until an owner has completed tasks to learn from.
+DEFAULT_PEAK_HOURS = [9, 10, 11, 15]
+PEAK_HOUR_COUNT = 4
+# Days of history behind the forecast, ending yesterday (today is still partial).
+FORECAST_WINDOW_DAYS = 28
+SMOOTHING = 0.3
+# Rolled-up events are kept this long for debugging, then pruned.
+EVENT_RETENTION = timedelta(days=90)
+ROLLUP_NAME = "activity"
+
+_events = TaskEventModel.__table__
+_hourly = ActivityHourly.__table__
+_daily = ActivityDaily.__table__
+_DONE = TaskStatus.DONE.value
+
+
+def forecast_week(daily_completions: dict[date, int], today: date) -> list[float]:
+    """Expected completions for each weekday, Monday first, over the coming week.
+
+    Simple exponential smoothing gives the current level of the last
+    ``FORECAST_WINDOW_DAYS`` days; each weekday adds its average offset from
+    the window mean, so a user who never works weekends gets low weekends.
+    """
+    days = [today - timedelta(days=n) for n in range(FORECAST_WINDOW_DAYS, 0, -1)]
+    series = [daily_completions.get(day, 0) for day in days]
+    level = float(series[0])
+    for value in series[1:]:
+        level = SMOOTHING * value + (1 - SMOOTHING) * level
+    mean = sum(series) / len(series)
+    by_weekday: dict[int, list[int]] = {}
+    for day, value in zip(days, series):
+        by_weekday.setdefault(day.weekday(), []).append(value)
+    return [
+        round(max(0.0, level + sum(by_weekday[weekday]) / len(by_weekday[weekday]) - mean), 2)
+        for weekday in range(7)
+    ]
+
 
 class BehaviorService:
-    def generate_insights(self, task_service: TaskService, db: Session, owner_id: str) -> BehaviorInsights:
-        completion_rate = task_service.completion_rate(db, owner_id)
-        all_tasks = task_service.list_all(db, owner_id)
+    def generate_insights(
+        self, task_service: TaskService, db: Session, owner_id: str, today: Optional[date] = None
+    ) -> BehaviorInsights:
+        """Served from counters and per-owner rollups: cost does not grow with the number of tasks."""
+        today = today or datetime.utcnow().date()
+        counts = task_service.status_counts(db, owner_id)
+        total = counts["total"]
+        completion_rate = counts[TaskStatus.DONE.value] / total if total else 0.0
         procrastination_risk = round(max(0.0, 0.9 - completion_rate), 3)
-        burnout_risk = round(min(1.0, 0.25 + len(all_tasks) / 100), 3)
+        burnout_risk = round(min(1.0, 0.25 + total / 100), 3)
+        hourly, daily = self.activity(db, owner_id, today - timedelta(days=FORECAST_WINDOW_DAYS))
+        busiest = sorted(hourly.items(), key=lambda item: (-item[1], item[0]))[:PEAK_HOUR_COUNT]
+        peak = sorted(hour for hour, _ in busiest)
         return BehaviorInsights(
-            peak_hours=[9, 10, 11, 15],
+            peak_hours=peak or DEFAULT_PEAK_HOURS,
             procrastination_risk=procrastination_risk,
             burnout_risk=burnout_risk,
-            weekly_productivity_forecast=[round(50 + completion_rate * 10 + i * 0.8, 2) for i in range(7)],
+            weekly_productivity_forecast=forecast_week(daily, today),
         )
+
+    def data_version(self, task_service: TaskService, db: Session, owner_id: str) -> str:
+        """Validator for ``generate_insights``: the task ``version`` plus the owner's newest stored event.
+
+        Task events are written behind the request (see ``EventRecorder``), after
+        the commit that bumped the version, so the version alone would keep
+        serving insights computed before the events landed.
+        """
+        version = task_service.data_version(db, owner_id)
+        last_event = db.scalar(select(func.max(_events.c.seq)).where(_events.c.owner_id == owner_id)) or 0
+        return f"{version}.{last_event}"
+
+    def activity(self, db: Session, owner_id: str, since: date) -> tuple[dict[int, int], dict[date, int]]:
+        """``({hour: completions}, {day: completions})`` for ``owner_id``, days from ``since`` on.
+
+        The rollup tables plus this owner's events not yet rolled up, so
+        results are current without waiting for the job. The watermark is
+        read again at the end; if the job committed meanwhile, read again
+        rather than count a batch twice or not at all.
+        """
+        while True:
+            watermark = self._watermark(db)
+            hourly = dict(
+                db.execute(
+                    select(_hourly.c.hour, _hourly.c.completed).where(_hourly.c.owner_id == owner_id)
+                ).all()
+            )
+            daily = dict(
+                db.execute(
+                    select(_daily.c.day, _daily.c.completed).where(
+                        _daily.c.owner_id == owner_id, _daily.c.day >= since
+                    )
+                ).all()
+            )
+            pending = db.execute(
+                select(_events.c.at).where(
+                    _events.c.owner_id == owner_id, _events.c.seq > watermark, _events.c.to_status == _DONE
+                )
+            ).all()
+            if self._watermark(db) == watermark:
+                break
+        for (at,) in pending:
+            hourly[at.hour] = hourly.get(at.hour, 0) + 1
+            daily[at.date()] = daily.get(at.date(), 0) + 1
+        return hourly, daily
+
+    def roll_up_activity(self, db: Session, chunk_size: int = 5000) -> int:
+        """Fold new ``task_events`` into the hourly and daily tables; returns events folded.
+
+        Incremental: each chunk's aggregates and the advanced watermark
+        commit together, so a crash never counts an event twice. The first
+        run seeds the tables from ``tasks`` so existing history counts.
+        """
+        watermark = db.get(RollupWatermark, ROLLUP_NAME)
+        if watermark is None:
+            watermark = RollupWatermark(name=ROLLUP_NAME, seq=db.scalar(select(func.max(_events.c.seq))) or 0)
+            db.add(watermark)
+            self._seed_from_tasks(db)
+            db.commit()
+        folded = 0
+        while True:
+            rows = db.execute(
+                select(_events.c.seq, _events.c.owner_id, _events.c.from_status, _events.c.to_status, _events.c.at)
+                .where(_events.c.seq > watermark.seq)
+                .order_by(_events.c.seq)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            hourly: Counter[tuple[str, int]] = Counter()
+            daily: dict[tuple[str, date], Counter[str]] = {}
+            for row in rows:
+                counts = daily.setdefault((row.owner_id, row.at.date()), Counter())
+                if row.from_status is None:
+                    counts["created"] += 1
+                if row.to_status == _DONE:
+                    counts["completed"] += 1
+                    hourly[(row.owner_id, row.at.hour)] += 1
+            for (owner_id, hour), n in hourly.items():
+                _increment(db, _hourly, {"owner_id": owner_id, "hour": hour}, {"completed": n})
+            for (owner_id, day), counts in daily.items():
+                _increment(db, _daily, {"owner_id": owner_id, "day": day}, counts)
+            watermark.seq = rows[-1].seq
+            db.commit()
+            folded += len(rows)
+        pruned = (
+            _events.delete()
+            .where(_events.c.seq <= watermark.seq, _events.c.at < datetime.utcnow() - EVENT_RETENTION)
+        )
+        db.execute(pruned)
+        db.commit()
+        return folded
+
+    @staticmethod
+    def _watermark(db: Session) -> int:
+        return db.scalar(select(RollupWatermark.seq).where(RollupWatermark.name == ROLLUP_NAME)) or 0
+
+    @staticmethod
+    def _seed_from_tasks(db: Session) -> None:
+        """Aggregate existing tasks by ``created_at``/``completed_at`` (deleted tasks are gone)."""
+        tasks = TaskModel.__table__
+        daily: dict[tuple[str, date], dict[str, Any]] = {}
+        for column, field in ((tasks.c.created_at, "created"), (tasks.c.completed_at, "completed")):
+            day = func.date(column)
+            for owner_id, value, n in db.execute(
+                select(tasks.c.owner_id, day, func.count()).where(column.isnot(None)).group_by(tasks.c.owner_id, day)
+            ):
+                key = (owner_id, _as_date(value))
+                daily.setdefault(key, {"owner_id": key[0], "day": key[1], "created": 0, "completed": 0})[field] = n
+        hour = extract("hour", tasks.c.completed_at)
+        hourly = [
+            {"owner_id": owner_id, "hour": int(value), "completed": n}
+            for owner_id, value, n in db.execute(
+                select(tasks.c.owner_id, hour, func.count())
+                .where(tasks.c.completed_at.isnot(None))
+                .group_by(tasks.c.owner_id, hour)
+            )
+        ]
+        if daily:
+            db.execute(insert(_daily), list(daily.values()))
+        if hourly:
+            db.execute(insert(_hourly), hourly)
+
+
+def _increment(db: Session, table: Table, key: dict[str, Any], amounts: Any) -> None:
+    """``col = col + n`` on the row at ``key``, inserting it if missing."""
+    amounts = {column: n for column, n in dict(amounts).items() if n}
+    if not amounts:
+        return
+    result = db.execute(
+        update(table)
+        .where(*(table.c[column] == value for column, value in key.items()))
+        .values({table.c[column]: table.c[column] + n for column, n in amounts.items()})
+    )
+    if result.rowcount == 0:
+        db.execute(insert(table).values(**key, **amounts))
+
+
+def _as_date(value: Any) -> date:
+    """A ``func.date()`` result: SQLite returns ``'YYYY-MM-DD'`` text, other backends a ``date``."""
+    if isinstance(value, datetime):
+        return value.date()
+    return value if isinstance(value, date) else date.fromisoformat(value)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+Row = dict[str, Any]
+Writer = Callable[[list[Row]], Awaitable[None]]
+
+# Session.info key for rows waiting on their transaction.
+_PENDING = "event_recorder.pending"
+
+
+class EventRecorder:
+    """Write-behind buffer for append-only event rows.
+
+    Mutations hand rows to ``record`` (from any thread) instead of inserting
+    them in their own transaction; ``run`` flushes the buffer with one
+    ``executemany`` insert per ``batch_size`` rows, every ``interval`` seconds
+    or as soon as a full batch is waiting. Rows are lost if the process dies
+    before a flush, so this suits activity tracking, not audit trails that
+    must survive a crash.
+
+    Nothing is ever dropped: producers on the event loop must
+    ``await wait_for_space()`` before writing, which holds them while the
+    buffer is at or above ``high_water`` (three quarters of ``capacity``), so
+    writes slow to the flush rate instead. ``record`` itself never blocks, as
+    it runs on the writer thread the flush needs; the buffer only passes
+    ``capacity`` by what writes already admitted add.
+    """
+
+    def __init__(self, capacity: int = 10_000, batch_size: int = 500, interval: float = 0.2) -> None:
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.interval = interval
+        self.high_water = max(1, capacity * 3 // 4)
+        self._buffer: deque[Row] = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Condition] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.recorded = 0
+        self.flushed = 0
+        self.waits = 0
+        self.failed_flushes = 0
+        self.flushes = 0
+        self.largest_batch = 0
+        self._avg_flush = 0.0
+
+    def record(self, rows: Iterable[Row]) -> None:
+        """Buffer ``rows`` for the next flush; never blocks."""
+        with self._lock:
+            before = len(self._buffer)
+            self._buffer.extend(rows)
+            size = len(self._buffer)
+            self.recorded += size - before
+        # Wake the flusher once, when a full batch first becomes available.
+        if before < self.batch_size <= size:
+            self._notify()
+
+    def record_on_commit(self, db: Session, rows: list[Row]) -> None:
+        """``record`` once ``db``'s transaction commits; a rollback discards them.
+
+        A session joined to an outer transaction on its connection (each
+        ``WriteQueue`` job runs in a SAVEPOINT) only commits that savepoint;
+        its rows wait on the connection until ``release_pending`` is called
+        after the real COMMIT, or ``discard_pending`` after a failure.
+        """
+        if rows:
+            db.info.setdefault(_PENDING, []).append((self, rows))
+
+    def size(self) -> int:
+        return len(self._buffer)
+
+    async def wait_for_space(self) -> None:
+        """Return once the buffer is below ``high_water``; immediate when it already is."""
+        if self.size() < self.high_water or self._drained is None:
+            return
+        self.waits += 1
+        async with self._drained:
+            await self._drained.wait_for(lambda: self.size() < self.high_water)
+
+    async def run(self, write: Writer) -> None:
+        """Flush forever: every ``interval`` seconds, or sooner when a full batch is waiting."""
+        self._bind()
+        assert self._wake is not None
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            self._wake.clear()
+            await self.flush(write)
+
+    async def flush(self, write: Writer) -> int:
+        """Write everything buffered, ``batch_size`` rows per call; returns rows written.
+
+        A failed batch goes back to the front of the buffer and the flush
+        stops, to be retried on the next tick.
+        """
+        self._bind()
+        assert self._flush_lock is not None and self._drained is not None
+        written = 0
+        async with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    break
+                started = time.perf_counter()
+                try:
+                    await write(batch)
+                except Exception:
+                    logger.exception("Flushing %d events failed; will retry", len(batch))
+                    self.failed_flushes += 1
+                    with self._lock:
+                        self._buffer.extendleft(reversed(batch))
+                    break
+                elapsed = time.perf_counter() - started
+                self.flushes += 1
+                self.flushed += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self._avg_flush = 0.8 * self._avg_flush + 0.2 * elapsed
+                written += len(batch)
+            async with self._drained:
+                self._drained.notify_all()
+        return written
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "buffered": self.size(),
+            "capacity": self.capacity,
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "producer_waits": self.waits,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "mean_batch_size": round(self.flushed / self.flushes, 2) if self.flushes else 0.0,
+            "largest_batch": self.largest_batch,
+            "avg_flush_ms": round(self._avg_flush * 1000, 3),
+        }
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wake = asyncio.Event()
+            self._drained = asyncio.Condition()
+            self._flush_lock = asyncio.Lock()
+
+    def _notify(self) -> None:
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # the loop has closed; the shutdown flush picks the rows up
+
+
+def release_pending(info: dict) -> None:
+    """Record the rows parked in a connection's ``info`` once its transaction committed."""
+    for recorder, rows in info.pop(_PENDING, ()):
+        recorder.record(rows)
+
+
+def discard_pending(info: dict) -> None:
+    """Drop the rows parked in a connection's ``info``; its transaction did not commit."""
+    info.pop(_PENDING, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    bind = session.bind
+    if isinstance(bind, Connection) and bind.in_transaction():
+        # Only a SAVEPOINT was released; wait for the outer COMMIT.
+        bind.info.setdefault(_PENDING, []).extend(pending)
+        return
+    for recorder, rows in pending:
+        recorder.record(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING, None)
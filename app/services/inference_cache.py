@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+# Writer-thread queue items besides (key, value, expires_at) rows.
+_STOP = object()
+_CLEAR = object()
+# ``get`` result for "not in memory", since None is a cache miss.
+_MISSING = object()
+# Rows per disk transaction, and rows written between prunes of the file.
+_WRITE_BATCH = 500
+_PRUNE_EVERY = 1000
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hash of the inputs an inference reads; equal content, equal key."""
+    raw = json.dumps(parts, separators=(",", ":"), sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class InferenceCache:
+    """LRU of JSON-serialisable inference results keyed by ``content_key``.
+
+    Entries expire after ``ttl_seconds``. With ``path`` set, every result is
+    also written to a small SQLite file and misses fall back to it, so a
+    restarted worker starts warm; memory stays bounded by ``max_size``.
+
+    Disk writes are write-behind: ``put`` queues the row for a writer thread
+    that commits whatever has queued up in one transaction and keeps the file
+    to ``disk_max_size`` unexpired rows (default ``16 * max_size``), dropping
+    the ones closest to expiry first. Callers on the event loop use
+    ``get_async``, which reads the file in a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        ttl_seconds: float = 86_400.0,
+        path: str | Path | None = None,
+        disk_max_size: Optional[int] = None,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.path = Path(path) if path else None
+        self.disk_max_size = disk_max_size if disk_max_size is not None else max_size * 16
+        # Values are kept as JSON text so callers can't mutate a cached result.
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        # Inference runs in threadpool workers as well as on the loop.
+        self._lock = threading.Lock()
+        # Readers share one connection; the writer thread has its own.
+        self._disk_lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._writes: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_writes = 0
+        self.disk_evictions = 0
+        if self.path is not None:
+            writer_conn = self._open_disk(self.path)
+            self._prune(writer_conn)
+            self._disk = sqlite3.connect(self.path, check_same_thread=False)
+            self._writer = threading.Thread(
+                target=self._write_behind, args=(writer_conn,), name="inference-cache-writer", daemon=True
+            )
+            self._writer.start()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Memory, then the disk file; blocks on disk I/O, so not for the event loop."""
+        value = self._get_memory(key)
+        if value is _MISSING:
+            value = self._load(key, self._read_disk(key))
+        return value
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """``get`` with the disk fallback run in a worker thread."""
+        value = self._get_memory(key)
+        if value is _MISSING:
+            row = await asyncio.to_thread(self._read_disk, key) if self._disk is not None else None
+            value = self._load(key, row)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store ``value`` in memory; the disk copy is written behind, never blocking."""
+        text = json.dumps(value)
+        with self._lock:
+            self._remember(key, text)
+        if self._writer is not None:
+            self._writes.put((key, text, time.time() + self.ttl_seconds))
+
+    def flush(self) -> None:
+        """Block until every queued disk write is committed."""
+        if self._writer is not None:
+            done = threading.Event()
+            self._writes.put(done)
+            done.wait()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._writer is not None:
+            self._writes.put(_CLEAR)
+            self.flush()
+
+    def close(self) -> None:
+        """Commit queued writes and close the file."""
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(_STOP)
+            writer.join()
+        with self._disk_lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk_writes": self.disk_writes,
+                "disk_pending": self._writes.qsize(),
+                "disk_evictions": self.disk_evictions,
+            }
+
+    def _get_memory(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            return _MISSING
+
+    def _load(self, key: str, row: Optional[tuple[str, float]]) -> Optional[Any]:
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            text, expires_at = row
+            self.disk_hits += 1
+            self._remember(key, text, expires_at - time.time())
+            return json.loads(text)
+
+    def _remember(self, key: str, text: str, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (time.monotonic() + (self.ttl_seconds if ttl is None else ttl), text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[tuple[str, float]]:
+        with self._disk_lock:
+            if self._disk is None:
+                return None
+            return self._disk.execute(
+                "SELECT value, expires_at FROM inference WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+
+    def _write_behind(self, conn: sqlite3.Connection) -> None:
+        """Writer thread: commit queued rows in batches, pruning as the file grows."""
+        since_prune = 0
+        stopping = False
+        while not stopping:
+            items = [self._writes.get()]
+            while len(items) < _WRITE_BATCH:
+                try:
+                    items.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            rows: list[tuple[str, str, float]] = []
+            waiters: list[threading.Event] = []
+            for item in items:
+                if item is _STOP:
+                    stopping = True
+                elif item is _CLEAR:
+                    # Rows queued before the clear must not outlive it.
+                    rows.clear()
+                    conn.execute("DELETE FROM inference")
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.append(item)
+            if rows:
+                conn.executemany("INSERT OR REPLACE INTO inference (key, value, expires_at) VALUES (?, ?, ?)", rows)
+                self.disk_writes += len(rows)
+                since_prune += len(rows)
+            if since_prune >= _PRUNE_EVERY or (stopping and since_prune):
+                self._prune(conn)
+                since_prune = 0
+            conn.commit()
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Drop expired rows, then the rows nearest expiry beyond ``disk_max_size``."""
+        conn.execute("DELETE FROM inference WHERE expires_at < ?", (time.time(),))
+        excess = conn.execute("SELECT COUNT(*) FROM inference").fetchone()[0] - self.disk_max_size
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM inference WHERE key IN (SELECT key FROM inference ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+            self.disk_evictions += excess
+        conn.commit()
+
+    @staticmethod
+    def _open_disk(path: Path) -> sqlite3.Connection:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS inference (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS inference_expires_at ON inference (expires_at)")
+        conn.commit()
+        return conn
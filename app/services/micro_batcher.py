@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesces concurrent single-item calls into batched calls of ``fn``.
+
+    ``submit`` queues an item and waits for its result. A batch is dispatched
+    as soon as ``max_batch_size`` items are waiting, or ``max_wait_ms`` after
+    the first of them arrived, whichever is sooner. ``fn`` takes a list and
+    returns one result per item, in order; it runs on ``executor`` so the
+    event loop keeps accepting requests (and filling the next batch) while a
+    batch is being computed. If ``fn`` raises, every item in that batch fails
+    with the same exception.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list[T]], list[R]],
+        executor: Executor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ) -> None:
+        self._fn = fn
+        self._executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        # Only touched from the event loop thread.
+        self._pending: list[tuple[T, asyncio.Future[R], float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._avg_wait = 0.0
+        self._avg_run = 0.0
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return await future
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "avg_wait_ms": round(self._avg_wait * 1000, 3),
+            "avg_run_ms": round(self._avg_run * 1000, 3),
+        }
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[: self.max_batch_size], self._pending[self.max_batch_size :]
+        if self._pending:
+            # Overflow from a burst starts its own wait window.
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._dispatch)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future[R], float]]) -> None:
+        started = time.perf_counter()
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self._avg_wait = 0.8 * self._avg_wait + 0.2 * (started - batch[0][2])
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._fn, [item for item, _, _ in batch]
+            )
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._avg_run = 0.8 * self._avg_run + 0.2 * (time.perf_counter() - started)
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,117 @@
+"""Batched model inference behind ``AIService``.
+
+A backend takes a list of tasks (anything with ``title``, ``description``)
+and returns one result per task, so a model server can run a whole batch in
+a single forward pass. ``ModelBackend`` itself is the keyword heuristic the
+app shipped with; an ONNX/Triton client would subclass it and override
+``estimate_effort`` (and ``generate_subtasks`` once there is a model for it).
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Any, Sequence
+
+KEYWORD_RE = re.compile(r"\b[a-zA-Z]{4,}\b")
+# Effort is driven by at most this many distinct keywords.
+MAX_COMPLEXITY = 10
+
+
+def extract_keywords(text: str, limit: int = 5) -> list[str]:
+    counts: dict[str, int] = {}
+    for token in KEYWORD_RE.findall(text.lower()):
+        counts[token] = counts.get(token, 0) + 1
+    ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [word for word, _ in ranked[:limit]]
+
+
+def summarize(description: str) -> str:
+    if len(description) <= 140:
+        return description
+    return description[:137].rstrip() + "..."
+
+
+def effort_for(complexity: int) -> tuple[int, float]:
+    """``(estimated_minutes, confidence)`` for a task with ``complexity`` distinct keywords."""
+    minutes = min(8 * 60, 20 + complexity * 18)
+    confidence = max(0.35, min(0.92, 1.0 - (1 / (complexity + 2))))
+    return minutes, round(confidence, 3)
+
+
+# ``effort_for`` by number of distinct keywords (0 counts as 1).
+EFFORT_TABLE = [effort_for(max(1, count)) for count in range(MAX_COMPLEXITY + 1)]
+
+
+class ModelBackend:
+    """Keyword heuristic; the reference every other backend is measured against."""
+
+    name = "heuristic"
+    # Part of every memoization key; bump it whenever inference output changes
+    # so results persisted by ``MemoizedAIService`` are not reused.
+    version = "heuristic-1"
+
+    def estimate_effort(self, tasks: Sequence[Any]) -> list[tuple[int, float]]:
+        # Complexity is the number of distinct keywords, so a set does the
+        # work ``extract_keywords`` would do with counting and sorting.
+        texts = (f"{task.title} {task.description or ''}".lower() for task in tasks)
+        return [EFFORT_TABLE[min(MAX_COMPLEXITY, len(set(KEYWORD_RE.findall(text))))] for text in texts]
+
+    def generate_subtasks(self, tasks: Sequence[Any]) -> list[list[str]]:
+        results = []
+        for task in tasks:
+            seeds = [
+                "Define acceptance criteria",
+                "Break work into 30-minute focus blocks",
+                "Schedule first execution block",
+                "Review and refine output",
+            ]
+            if task.description:
+                seeds[0] = f"Clarify: {summarize(task.description)}"
+            results.append(seeds)
+        return results
+
+
+class NumpyBackend(ModelBackend):
+    """The heuristic as a dense linear model over hashed keyword features.
+
+    Each batch becomes a ``(batch, features)`` presence matrix and one matrix
+    product, which is the shape of work a real model does; it exists to
+    exercise batching locally and as a template for a learned model (swap
+    ``weights``). Keywords are hashed into ``features`` buckets, so rare
+    collisions can make it score a task one keyword lower than the heuristic.
+    Needs ``numpy``, which is not a core requirement.
+    """
+
+    name = "numpy"
+    version = "numpy-linear-1"
+
+    def __init__(self, features: int = 4096) -> None:
+        import numpy as np
+
+        self._np = np
+        self.features = features
+        self.weights = np.ones(features, dtype=np.float32)
+        self._minutes = np.array([minutes for minutes, _ in EFFORT_TABLE])
+        self._confidence = np.array([confidence for _, confidence in EFFORT_TABLE])
+
+    def estimate_effort(self, tasks: Sequence[Any]) -> list[tuple[int, float]]:
+        np = self._np
+        if not tasks:
+            return []
+        rows, columns = [], []
+        for row, task in enumerate(tasks):
+            for token in set(KEYWORD_RE.findall(f"{task.title} {task.description or ''}".lower())):
+                rows.append(row)
+                columns.append(zlib.crc32(token.encode()) % self.features)
+        presence = np.zeros((len(tasks), self.features), dtype=np.float32)
+        presence[rows, columns] = 1.0
+        complexity = np.clip((presence @ self.weights).astype(np.int64), 0, MAX_COMPLEXITY)
+        return list(zip(self._minutes[complexity].tolist(), self._confidence[complexity].tolist()))
+
+
+def create_model_backend(kind: str) -> ModelBackend:
+    if kind == "heuristic":
+        return ModelBackend()
+    if kind == "numpy":
+        return NumpyBackend()
+    raise ValueError(f"Unknown AI backend {kind!r}")
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from passlib.context import CryptContext
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Password hashing capacity exhausted")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs bcrypt work on a small dedicated pool instead of the event loop.
+
+    At most ``max_pending`` hash/verify calls may be running or queued; beyond
+    that new calls fail fast with ``PasswordHasherBusy`` so a login burst
+    cannot starve the default threadpool that serves database work.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int, max_pending: int) -> None:
+        self._context = context
+        self._workers = max_workers
+        self._max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self._avg_seconds = 0.25  # seeded with the cost of 12 bcrypt rounds
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self._context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit(self._context.verify, password, hashed)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """Verify ``password``; also return a fresh hash if ``hashed`` uses outdated settings."""
+        return await self._submit(self._context.verify_and_update, password, hashed)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._pending * self._avg_seconds / self._workers))
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "workers": self._workers,
+            "max_pending": self._max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "avg_seconds": round(self._avg_seconds, 4),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, fn: Callable[..., T], *args: Any) -> T:
+        # Only touched from the event loop thread, so a plain counter is safe.
+        if self._pending >= self._max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy(self.retry_after())
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._timed, fn, *args)
+        finally:
+            self._pending -= 1
+
+    def _timed(self, fn: Callable[..., T], *args: Any) -> T:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            # Service time only (queue wait excluded) feeds the Retry-After estimate.
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.perf_counter() - started)
+
+
+def default_workers() -> int:
+    return int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def default_max_pending(workers: int) -> int:
+    return int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(workers * 8)))
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Token bucket: refills at ``rate`` tokens per second up to ``burst``; one request takes one."""
+
+    rate: float
+    burst: float
+
+
+class BucketStore:
+    """Token buckets held in this process.
+
+    Each worker enforces its own share, so with ``uvicorn --workers N`` a
+    client gets up to N times the limit. ``SQLiteBucketStore`` shares the
+    buckets between workers on one host; a Redis adapter would implement
+    ``take`` with a Lua script.
+    """
+
+    # Idle buckets are swept once the store holds this many.
+    max_buckets = 100_000
+    # ``take`` does I/O that may wait on a lock, so callers on an event loop
+    # must call it from a thread.
+    blocking = False
+
+    def __init__(self) -> None:
+        # key -> (tokens, updated, seconds to refill from empty)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit) -> float:
+        """Take a token from ``key``'s bucket: 0.0 if granted, else seconds until one is due."""
+        now = time.monotonic()
+        refill = limit.burst / limit.rate
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (limit.burst, now, refill))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, refill)
+                return (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens - 1, now, refill)
+            if len(self._buckets) > self.max_buckets:
+                self._sweep(now)
+        return 0.0
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+    def close(self) -> None:
+        pass
+
+    def _sweep(self, now: float) -> None:
+        # A bucket idle long enough to have refilled is the same as no bucket.
+        self._buckets = {key: entry for key, entry in self._buckets.items() if now - entry[1] < entry[2]}
+
+
+class SQLiteBucketStore(BucketStore):
+    """Buckets in a small SQLite file, shared by every worker on the host.
+
+    One upsert per request decides and debits atomically; the file is in WAL
+    mode with ``synchronous=OFF`` because losing the buckets in a crash only
+    forgives some requests. ``take`` can wait up to a second on another
+    worker's lock, hence ``blocking``.
+    """
+
+    blocking = True
+
+    _TAKE = (
+        "INSERT INTO buckets (key, tokens, updated) VALUES (:key, :burst - 1, :now) "
+        "ON CONFLICT (key) DO UPDATE SET "
+        "tokens = min(:burst, tokens + (:now - updated) * :rate) - 1, updated = :now "
+        "WHERE min(:burst, tokens + (:now - updated) * :rate) >= 1 "
+        "RETURNING tokens"
+    )
+
+    def __init__(self, path: str | Path) -> None:
+        super().__init__()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=1.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._takes = 0
+
+    def take(self, key: str, limit: Limit) -> float:
+        # Wall clock: monotonic clocks are not comparable across processes.
+        now = time.time()
+        params = {"key": key, "burst": limit.burst, "rate": limit.rate, "now": now}
+        with self._lock:
+            self._takes += 1
+            if self._takes % self.max_buckets == 0:
+                # Every limit here refills within an hour; older rows are full buckets.
+                self._conn.execute("DELETE FROM buckets WHERE updated < ?", (now - 3600,))
+            if self._conn.execute(self._TAKE, params).fetchone() is not None:
+                return 0.0
+            row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+        tokens = min(limit.burst, row[0] + (now - row[1]) * limit.rate)
+        # Another worker may have taken the token between the two statements.
+        return max((1 - tokens) / limit.rate, 0.001)
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM buckets").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def create_bucket_store(kind: str, path: str | None = None) -> BucketStore:
+    if kind == "local":
+        return BucketStore()
+    if kind == "sqlite":
+        return SQLiteBucketStore(path or Path(tempfile.gettempdir()) / "productivity-ratelimit.db")
+    raise ValueError(f"Unknown rate limit store {kind!r}")
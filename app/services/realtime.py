@@ -1,26 +1,148 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+from enum import Enum
+
 from fastapi import WebSocket
 
+from app.services.backplane import Backplane
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    DISCONNECT = "disconnect"
+
+
+class _Client:
+    """One socket with its own bounded outbound queue, drained by a writer task."""
+
+    def __init__(self, websocket: WebSocket, owner_id: str, max_queue: int) -> None:
+        self.websocket = websocket
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue)
+        self.writer: asyncio.Task | None = None
+        self.dropped = 0
+
 
 class ConnectionManager:
-    def __init__(self) -> None:
-        self._connections: list[WebSocket] = []
+    """Routes events to the sockets of the owning user only.
+
+    ``broadcast`` never awaits a socket: it serialises the message once and
+    enqueues it per recipient. A writer task per connection does the sends,
+    so a slow client only ever backs up its own queue; when that queue is
+    full the overflow policy either drops its oldest message or disconnects it.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 256,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        backplane: Backplane | None = None,
+    ) -> None:
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.backplane = backplane or Backplane()
+        self._owners: dict[str, set[_Client]] = {}
+        self._sockets: dict[WebSocket, _Client] = {}
+        self.dropped_messages = 0
+        self.slow_disconnects = 0
+        # Strong references to close tasks, which the loop only holds weakly.
+        self._closing: set[asyncio.Task] = set()
 
-    async def connect(self, websocket: WebSocket) -> None:
+    async def connect(self, websocket: WebSocket, owner_id: str) -> None:
         await websocket.accept()
-        self._connections.append(websocket)
+        client = _Client(websocket, owner_id, self.max_queue)
+        self._sockets[websocket] = client
+        self._owners.setdefault(owner_id, set()).add(client)
+        client.writer = asyncio.create_task(self._write(client))
 
     def disconnect(self, websocket: WebSocket) -> None:
-        if websocket in self._connections:
-            self._connections.remove(websocket)
-
-    async def broadcast(self, message: dict) -> None:
-        stale: list[WebSocket] = []
-        for connection in self._connections:
-            try:
-                await connection.send_json(message)
-            except RuntimeError:
-                stale.append(connection)
-        for connection in stale:
-            self.disconnect(connection)
+        client = self._sockets.pop(websocket, None)
+        if client is None:
+            return
+        peers = self._owners.get(client.owner_id)
+        if peers is not None:
+            peers.discard(client)
+            if not peers:
+                del self._owners[client.owner_id]
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    async def start(self) -> None:
+        await self.backplane.start(self.deliver_local)
+
+    async def close(self) -> None:
+        await self.backplane.close()
+
+    def broadcast(self, owner_id: str, message: dict) -> int:
+        """Enqueue ``message`` for every socket of ``owner_id`` in every worker.
+
+        Returns the number of recipients in this process.
+        """
+        text = json.dumps(message)
+        self.backplane.publish(owner_id, text)
+        return self.deliver_local(owner_id, text)
+
+    def send(self, websocket: WebSocket, message: dict) -> None:
+        """Enqueue ``message`` for one socket only, in order with its broadcasts."""
+        client = self._sockets.get(websocket)
+        if client is not None:
+            self._enqueue(client, json.dumps(message))
+
+    def deliver_local(self, owner_id: str, text: str) -> int:
+        clients = self._owners.get(owner_id)
+        if not clients:
+            return 0
+        for client in list(clients):
+            self._enqueue(client, text)
+        return len(clients)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "connections": len(self._sockets),
+            "owners": len(self._owners),
+            "queued_messages": sum(client.queue.qsize() for client in self._sockets.values()),
+            "dropped_messages": self.dropped_messages,
+            "slow_disconnects": self.slow_disconnects,
+            **{f"backplane_{key}": value for key, value in self.backplane.stats().items()},
+        }
+
+    def _enqueue(self, client: _Client, text: str) -> None:
+        try:
+            client.queue.put_nowait(text)
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.overflow is OverflowPolicy.DISCONNECT:
+            self.slow_disconnects += 1
+            self.disconnect(client.websocket)
+            closing = asyncio.create_task(self._close(client.websocket, code=1013))
+            self._closing.add(closing)
+            closing.add_done_callback(self._closing.discard)
+            return
+        client.queue.get_nowait()
+        client.queue.put_nowait(text)
+        client.dropped += 1
+        self.dropped_messages += 1
+
+    async def _write(self, client: _Client) -> None:
+        try:
+            while True:
+                text = await client.queue.get()
+                await client.websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket went away mid-send; the receive loop will notice too.
+            self.disconnect(client.websocket)
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            logger.debug("Close of slow websocket failed", exc_info=True)
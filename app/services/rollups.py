@@ -0,0 +1,31 @@
+"""Subtree rollups (``tasks.subtree_*``) computed from scratch."""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+# Used for tasks without an estimate, as in ``TaskService``.
+DEFAULT_MINUTES = 30
+
+
+def subtree_totals(
+    rows: Iterable[tuple[str, Optional[str], str, Optional[int]]],
+) -> dict[str, tuple[int, int, int]]:
+    """``(task count, done count, estimated minutes)`` per task over its subtree.
+
+    ``rows`` are ``(id, parent_task_id, status, estimated_minutes)`` for every
+    task that can appear in a subtree; parents outside ``rows`` are ignored.
+    """
+    rows = list(rows)
+    parents = {task_id: parent_id for task_id, parent_id, _, _ in rows}
+    totals = {task_id: [0, 0, 0] for task_id in parents}
+    for task_id, _, status, minutes in rows:
+        node, seen = task_id, set()
+        # Credit the task to itself and every ancestor; ``seen`` stops at cycles.
+        while node in totals and node not in seen:
+            seen.add(node)
+            total = totals[node]
+            total[0] += 1
+            total[1] += status == "done"
+            total[2] += minutes or DEFAULT_MINUTES
+            node = parents[node]
+    return {task_id: (t, d, m) for task_id, (t, d, m) in totals.items()}
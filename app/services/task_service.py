@@ -1,29 +1,133 @@
 from __future__ import annotations
 
+import base64
 import json
-from datetime import datetime
-from typing import Iterable
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable, Optional, Sequence
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, bindparam, delete, func, insert, or_, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session, aliased
+from sqlalchemy.sql.selectable import CTE
 
-from app.models import TaskModel
-from app.schemas import Task, TaskCreate, TaskStatus, TaskUpdate
+from app.models import TaskChangeModel, TaskEventModel, TaskModel, TaskStats, TaskTag
+from app.schemas import (
+    TagCount,
+    Task,
+    TaskBatchOperation,
+    TaskBatchResult,
+    TaskChange,
+    TaskChanges,
+    TaskCreate,
+    TaskListFilters,
+    TaskReestimateResult,
+    TaskRollup,
+    TaskSearchHit,
+    TaskStatus,
+    TaskTreeNode,
+    TaskUpdate,
+)
+from app.services import text_search
+from app.services.event_recorder import EventRecorder
+from app.services.rollups import DEFAULT_MINUTES
+
+# Fields a client may request via ``fields=``; each is a TaskModel column
+# except ``tags``, which is read from ``task_tags``.
+TASK_FIELDS = tuple(Task.model_fields)
+STATUS_VALUES = tuple(status.value for status in TaskStatus)
+
+# ``task_search`` rows are found by ``task_key``, never by rowid (see ``_create_search_index``).
+_UNINDEX_TASKS = text(
+    "DELETE FROM task_search WHERE rowid IN (SELECT rowid FROM task_search WHERE task_search MATCH :match)"
+)
+_INDEX_TASKS = text(
+    "INSERT INTO task_search (title, description, owner_key, task_key, task_id) "
+    "SELECT title, coalesce(description, ''), replace(owner_id, '-', ''), lower(hex(id)), id "
+    "FROM tasks WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+# Every match is ranked; on equal rank the most recently indexed comes first.
+_SEARCH_RANKED = text(
+    "SELECT task_id, title, description, bm25(task_search, {}) AS rank FROM task_search "
+    "WHERE task_search MATCH :match ORDER BY rank, rowid DESC LIMIT :limit".format(
+        ", ".join(map(str, text_search.BM25_WEIGHTS))
+    )
+)
+
+# ``INSERT ... ON CONFLICT DO UPDATE`` per dialect; others fall back to a SAVEPOINT retry.
+_UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# Core executemany statements for bulk rewrites; ORM bulk UPDATE by primary
+# key spends more time building per-row commands than SQLite does writing.
+_tasks = TaskModel.__table__
+_SET_ESTIMATES = (
+    update(_tasks)
+    .where(_tasks.c.id == bindparam("task_id"))
+    .values(estimated_minutes=bindparam("minutes"), predicted_due_at=bindparam("due"))
+)
+_ADD_SUBTREE_MINUTES = (
+    update(_tasks)
+    .where(_tasks.c.id == bindparam("task_id"))
+    .values(subtree_minutes=_tasks.c.subtree_minutes + bindparam("delta"))
+)
+_changes = TaskChangeModel.__table__
+_LOG_CHANGES = insert(_changes)
+_LOG_TRANSITIONS = insert(TaskEventModel.__table__)
+_later_change = _changes.alias("later")
+# A row is superseded once the same task has a later one.
+_DROP_SUPERSEDED = delete(_changes).where(
+    _changes.c.seq
+    < select(func.max(_later_change.c.seq)).where(_later_change.c.task_id == _changes.c.task_id).scalar_subquery()
+)
+_SET_CHANGES_FLOOR = (
+    update(TaskStats.__table__)
+    .where(TaskStats.__table__.c.owner_id == bindparam("owner"))
+    .values(changes_floor=bindparam("floor"))
+)
+
+
+def encode_cursor(created_at: datetime, task_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), task_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Inverse of ``encode_cursor``; raises ``ValueError`` on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, task_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(task_id)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
 
 
 class TaskService:
-    """Database-backed task service."""
+    """Database-backed task service.
 
-    def create(self, db: Session, payload: TaskCreate, owner_id: str) -> TaskModel:
-        tags_json = json.dumps(payload.tags) if payload.tags else "[]"
-        task = TaskModel(
-            title=payload.title,
-            description=payload.description,
-            due_at=payload.due_at,
-            parent_task_id=payload.parent_task_id,
-            tags=tags_json,
-            owner_id=owner_id,
-        )
+    With an ``events`` recorder, status transitions are written behind the
+    request in batches (see ``store_events``) rather than in its transaction.
+    """
+
+    def __init__(self, events: Optional[EventRecorder] = None) -> None:
+        self.events = events
+
+    def create(
+        self,
+        db: Session,
+        payload: TaskCreate,
+        owner_id: str,
+        estimated_minutes: int | None = None,
+        predicted_due_at: datetime | None = None,
+    ) -> TaskModel:
+        task = self._new_task(payload, owner_id, estimated_minutes, predicted_due_at)
         db.add(task)
+        db.flush()
+        self._index_search(db, [task.id])
+        self._adjust_stats(db, owner_id, {"total": 1, TaskStatus.TODO.value: 1})
+        self._log_changes(db, owner_id, upserted=[task.id])
+        self._log_transitions(db, owner_id, [(task.id, None, TaskStatus.TODO.value)])
+        if task.parent_task_id:
+            self._bump_rollups(db, owner_id, task.parent_task_id, 1, 0, task.subtree_minutes)
         db.commit()
         db.refresh(task)
         return task
@@ -36,6 +140,109 @@ class TaskService:
             .all()
         )
 
+    def list_page(
+        self,
+        db: Session,
+        owner_id: str,
+        filters: TaskListFilters,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[TaskModel], Optional[str]]:
+        """One page ordered by ``(created_at, id)`` descending, plus the next cursor."""
+        rows = self._page_query(db.query(TaskModel), owner_id, filters, cursor).limit(limit + 1).all()
+        return self._split_page(rows, limit)
+
+    def list_page_fields(
+        self,
+        db: Session,
+        owner_id: str,
+        filters: TaskListFilters,
+        limit: int,
+        fields: list[str],
+        cursor: Optional[str] = None,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """Like ``list_page`` but selects only ``fields`` and returns plain dicts.
+
+        Rows are fetched as column tuples, so no ORM objects or Pydantic models
+        are built; with every field selected the dicts match ``to_schema``
+        output field for field and can be encoded straight to JSON.
+        """
+        selected = list(dict.fromkeys([*(f for f in fields if f != "tags"), "created_at", "id"]))
+        columns = [getattr(TaskModel, name) for name in selected]
+        rows = self._page_query(db.query(*columns), owner_id, filters, cursor).limit(limit + 1).all()
+        rows, next_cursor = self._split_page(rows, limit)
+        tags = self._tags_for(db, [row.id for row in rows]) if "tags" in fields else {}
+        return [self._project(row, fields, tags) for row in rows], next_cursor
+
+    def _page_query(self, query: Query, owner_id: str, filters: TaskListFilters, cursor: Optional[str]) -> Query:
+        query = query.filter(TaskModel.owner_id == owner_id)
+        if filters.status:
+            query = query.filter(TaskModel.status.in_([s.value for s in filters.status]))
+        if filters.parent_task_id is not None:
+            query = query.filter(TaskModel.parent_task_id == filters.parent_task_id)
+        if filters.due_after is not None:
+            query = query.filter(TaskModel.due_at >= filters.due_after)
+        if filters.due_before is not None:
+            query = query.filter(TaskModel.due_at < filters.due_before)
+        if filters.min_priority is not None:
+            query = query.filter(TaskModel.priority_score >= filters.min_priority)
+        if filters.max_priority is not None:
+            query = query.filter(TaskModel.priority_score <= filters.max_priority)
+        if filters.tags:
+            query = query.filter(TaskModel.id.in_(self._tagged_ids(owner_id, filters.tags, filters.tag_mode)))
+        if cursor:
+            created_at, task_id = decode_cursor(cursor)
+            query = query.filter(
+                or_(
+                    TaskModel.created_at < created_at,
+                    and_(TaskModel.created_at == created_at, TaskModel.id < task_id),
+                )
+            )
+        return query.order_by(TaskModel.created_at.desc(), TaskModel.id.desc())
+
+    @staticmethod
+    def _tagged_ids(owner_id: str, tags: list[str], mode: str):
+        """Subquery of task ids carrying all (``mode="all"``) or any of ``tags``."""
+        wanted = list(dict.fromkeys(tags))
+        query = select(TaskTag.task_id).where(TaskTag.owner_id == owner_id, TaskTag.tag.in_(wanted))
+        if mode == "all":
+            query = query.group_by(TaskTag.task_id).having(func.count() == len(wanted))
+        return query
+
+    @staticmethod
+    def _tags_for(db: Session, task_ids: list[str]) -> dict[str, list[str]]:
+        tags: dict[str, list[str]] = {}
+        if not task_ids:
+            return tags
+        rows = (
+            db.query(TaskTag.task_id, TaskTag.tag)
+            .filter(TaskTag.task_id.in_(task_ids))
+            .order_by(TaskTag.task_id, TaskTag.position)
+            .all()
+        )
+        for task_id, tag in rows:
+            tags.setdefault(task_id, []).append(tag)
+        return tags
+
+    @staticmethod
+    def _split_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    @staticmethod
+    def _project(row: Any, fields: list[str], tags: dict[str, list[str]]) -> dict[str, Any]:
+        item = {name: tags.get(row.id, []) if name == "tags" else getattr(row, name) for name in fields}
+        # Same fallbacks as ``to_schema``.
+        if "status" in item:
+            item["status"] = item["status"] or TaskStatus.TODO.value
+        if "priority_score" in item:
+            item["priority_score"] = item["priority_score"] or 50.0
+        if "estimated_minutes" in item:
+            item["estimated_minutes"] = item["estimated_minutes"] or 30
+        return item
+
     def get(self, db: Session, task_id: str, owner_id: str) -> TaskModel:
         task = (
             db.query(TaskModel)
@@ -46,45 +253,658 @@ class TaskService:
             raise KeyError(f"Task {task_id} not found")
         return task
 
+    def get_many(self, db: Session, task_ids: Iterable[str], owner_id: str) -> list[TaskModel]:
+        """Load several tasks in one query; ids that don't exist are simply absent."""
+        ids = list(dict.fromkeys(task_ids))
+        if not ids:
+            return []
+        # Look up by primary key only: with ``owner_id`` in the WHERE clause SQLite
+        # picks an owner index and walks every task the owner has.
+        tasks = db.query(TaskModel).filter(TaskModel.id.in_(ids)).all()
+        return [task for task in tasks if task.owner_id == owner_id]
+
+    def get_schedulable(self, db: Session, task_ids: Iterable[str], owner_id: str) -> list[Any]:
+        """``get_many`` as bare rows of only the columns ``SchedulableTask.from_model`` reads.
+
+        No ORM objects and no ``selectin`` tag query: for thousands of tasks
+        building full models cost more than planning them.
+        """
+        ids = list(dict.fromkeys(task_ids))
+        if not ids:
+            return []
+        rows = db.execute(
+            select(
+                TaskModel.id,
+                TaskModel.owner_id,
+                TaskModel.priority_score,
+                TaskModel.estimated_minutes,
+                TaskModel.due_at,
+                TaskModel.predicted_due_at,
+            ).where(TaskModel.id.in_(ids))
+        ).all()
+        return [row for row in rows if row.owner_id == owner_id]
+
     def update(self, db: Session, task_id: str, owner_id: str, payload: TaskUpdate) -> TaskModel:
         task = self.get(db, task_id, owner_id)
-        changes = payload.model_dump(exclude_unset=True)
-        for field, value in changes.items():
-            if field == "tags":
-                setattr(task, field, json.dumps(value))
-            elif field == "status":
-                setattr(task, field, value.value if hasattr(value, "value") else value)
-            else:
-                setattr(task, field, value)
-        task.updated_at = datetime.utcnow()
+        before = _rollup_inputs(task)
+        deltas = self._apply_update(task, payload)
+        self._adjust_stats(db, owner_id, deltas)
+        self._log_changes(db, owner_id, upserted=[task.id])
+        self._log_transitions(db, owner_id, [_transition(task.id, deltas)] if deltas else [])
+        self._propagate_rollups(db, owner_id, task, before)
+        if _touches_text(payload):
+            self._index_search(db, [task.id], replace=True)
         db.commit()
         db.refresh(task)
         return task
 
+    def apply_estimates(
+        self,
+        db: Session,
+        task_id: str,
+        owner_id: str,
+        estimated_minutes: int,
+        predicted_due_at: datetime | None = None,
+    ) -> TaskModel:
+        task = self.get(db, task_id, owner_id)
+        before = _rollup_inputs(task)
+        task.estimated_minutes = estimated_minutes
+        if predicted_due_at is not None:
+            task.predicted_due_at = predicted_due_at
+        self._propagate_rollups(db, task.owner_id, task, before)
+        self._adjust_stats(db, owner_id, {})
+        self._log_changes(db, owner_id, upserted=[task.id])
+        db.commit()
+        return task
+
+    def reestimate(
+        self,
+        db: Session,
+        owner_id: str,
+        predict: Callable[[Sequence[Any]], list[tuple[int, datetime | None]]],
+        chunk_size: int = 2000,
+    ) -> TaskReestimateResult:
+        """Re-run ``predict`` over every open task of ``owner_id``, on one session.
+
+        For scripts and benchmarks. The HTTP route drives the same steps
+        (``open_tasks_after``, ``estimate_changes``, ``write_estimates``) with
+        inference off the DB writer and one write job per chunk, so the write
+        lock is released between chunks.
+        """
+        scanned = updated = 0
+        after = ""
+        while rows := self.open_tasks_after(db, owner_id, after, chunk_size):
+            changes = self.estimate_changes(rows, predict(rows))
+            if changes:
+                self.write_estimates(db, owner_id, changes)
+            scanned += len(rows)
+            updated += len(changes)
+            after = rows[-1].id
+        return TaskReestimateResult(scanned=scanned, updated=updated)
+
+    def open_tasks_after(self, db: Session, owner_id: str, after: str, limit: int = 2000) -> list[Any]:
+        """Up to ``limit`` open tasks with ids above ``after``, in id order, as bare column rows."""
+        return db.execute(
+            select(
+                TaskModel.id,
+                TaskModel.title,
+                TaskModel.description,
+                TaskModel.due_at,
+                TaskModel.estimated_minutes,
+                TaskModel.predicted_due_at,
+            )
+            .where(
+                TaskModel.owner_id == owner_id,
+                TaskModel.status != TaskStatus.DONE.value,
+                TaskModel.id > after,
+            )
+            .order_by(TaskModel.id)
+            .limit(limit)
+        ).all()
+
+    @staticmethod
+    def estimate_changes(
+        rows: Sequence[Any], predictions: Sequence[tuple[int, datetime | None]]
+    ) -> list[dict[str, Any]]:
+        """``_SET_ESTIMATES`` parameters for rows whose estimate moved; an unchanged one keeps its due date.
+
+        ``delta`` is the change in the minutes the task adds to rollups.
+        """
+        return [
+            {
+                "task_id": row.id,
+                "minutes": minutes,
+                "due": predicted_due_at,
+                "delta": (minutes or DEFAULT_MINUTES) - (row.estimated_minutes or DEFAULT_MINUTES),
+            }
+            for row, (minutes, predicted_due_at) in zip(rows, predictions)
+            if minutes != row.estimated_minutes or row.predicted_due_at is None
+        ]
+
+    def write_estimates(self, db: Session, owner_id: str, changes: list[dict[str, Any]]) -> None:
+        """One chunk of ``estimate_changes`` as a single executemany UPDATE plus its rollup deltas, committed."""
+        db.execute(_SET_ESTIMATES, changes)
+        self._shift_subtree_minutes(db, owner_id, {change["task_id"]: change["delta"] for change in changes})
+        self._adjust_stats(db, owner_id, {})
+        self._log_changes(db, owner_id, upserted=[change["task_id"] for change in changes])
+        db.commit()
+
     def delete(self, db: Session, task_id: str, owner_id: str) -> None:
         task = self.get(db, task_id, owner_id)
-        # Delete children first
-        children = (
+        removed_ids, deltas = self._delete_tasks(db, owner_id, [task])
+        self._adjust_stats(db, owner_id, deltas)
+        self._log_changes(db, owner_id, deleted=removed_ids)
+        db.commit()
+
+    def apply_batch(
+        self,
+        db: Session,
+        owner_id: str,
+        operations: list[TaskBatchOperation],
+        estimates: dict[int, tuple[int, datetime | None]],
+    ) -> list[TaskBatchResult]:
+        """Apply mixed create/update/delete operations in a single transaction.
+
+        ``estimates`` maps the index of each create operation to its
+        ``(estimated_minutes, predicted_due_at)``. Operations on unknown ids
+        are reported as 404 and skipped; everything else commits together.
+        """
+        targets = {
+            task.id: task
+            for task in self.get_many(db, [op.task_id for op in operations if op.op != "create"], owner_id)
+        }
+        deltas: dict[str, int] = {}
+        results: list[TaskBatchResult] = []
+        written: list[tuple[TaskBatchResult, TaskModel]] = []
+        reindex: list[TaskModel] = []
+        # Rollup changes wait for the flush below; ``None`` marks a new task.
+        # An updated task is listed once, with its state before the batch, so
+        # several updates to it propagate their combined change exactly once.
+        rollups: list[tuple[TaskModel, Optional[tuple[int, int]]]] = []
+        updated_ids: set[str] = set()
+        removed_ids: set[str] = set()
+        transitions: list[tuple[str, Optional[str], str]] = []
+        for index, op in enumerate(operations):
+            if op.op == "create":
+                task = self._new_task(op.data, owner_id, *estimates.get(index, (None, None)))
+                db.add(task)
+                _merge_deltas(deltas, {"total": 1, TaskStatus.TODO.value: 1})
+                result = TaskBatchResult(index=index, op=op.op, status=201)
+                written.append((result, task))
+                reindex.append(task)
+                rollups.append((task, None))
+            elif (task := targets.get(op.task_id)) is None:
+                result = TaskBatchResult(
+                    index=index, op=op.op, status=404, task_id=op.task_id, error=f"Task {op.task_id} not found"
+                )
+            elif op.op == "update":
+                if task.id not in updated_ids:
+                    updated_ids.add(task.id)
+                    rollups.append((task, _rollup_inputs(task)))
+                changed = self._apply_update(task, op.data)
+                if changed:
+                    transitions.append(_transition(task.id, changed))
+                _merge_deltas(deltas, changed)
+                result = TaskBatchResult(index=index, op=op.op, status=200, task_id=task.id)
+                written.append((result, task))
+                if _touches_text(op.data):
+                    reindex.append(task)
+            else:
+                removed, removed_deltas = self._delete_tasks(db, owner_id, [task])
+                _merge_deltas(deltas, removed_deltas)
+                removed_ids.update(removed)
+                for removed_id in removed:
+                    targets.pop(removed_id, None)
+                result = TaskBatchResult(index=index, op=op.op, status=204, task_id=task.id)
+            results.append(result)
+        # One flush turns every pending create into a single executemany INSERT.
+        db.flush()
+        for task, before in rollups:
+            if task.id in removed_ids:
+                continue
+            if before is None:
+                if task.parent_task_id:
+                    self._bump_rollups(db, owner_id, task.parent_task_id, 1, 0, task.subtree_minutes)
+            else:
+                self._propagate_rollups(db, owner_id, task, before)
+        # Tasks deleted later in the batch no longer exist and index nothing.
+        self._index_search(db, [task.id for task in reindex], replace=True)
+        for result, task in written:
+            result.task_id = task.id
+            result.task = self.to_schema(task)
+        self._adjust_stats(db, owner_id, deltas)
+        self._log_changes(
+            db,
+            owner_id,
+            upserted=[task.id for _, task in written if task.id not in removed_ids],
+            deleted=removed_ids,
+        )
+        created = [(task.id, None, TaskStatus.TODO.value) for result, task in written if result.op == "create"]
+        self._log_transitions(db, owner_id, created + transitions)
+        db.commit()
+        return results
+
+    def search(self, db: Session, owner_id: str, query: str, limit: int = 20) -> list[TaskSearchHit]:
+        """Tasks whose title or description contain every word of ``query``, best first.
+
+        The last word also matches as a prefix. Every match is ranked with
+        FTS5's ``bm25()``, a title hit weighing ten times a description hit,
+        so an old task matching exactly still beats newer, weaker matches.
+        """
+        if not _has_search_index(db):
+            return self._search_like(db, owner_id, query, limit)
+        terms = text_search.search_terms(query)
+        match = text_search.build_match(terms, owner_id)
+        if match is None:
+            return []
+        rows = db.execute(_SEARCH_RANKED, {"match": match, "limit": limit}).all()
+        tasks = {task.id: task for task in self.get_many(db, [row.task_id for row in rows], owner_id)}
+        return [
+            TaskSearchHit(
+                task=self.to_schema(tasks[row.task_id]),
+                # bm25() is lower-is-better; the API reports higher-is-better.
+                score=-row.rank,
+                title_snippet=text_search.highlight(row.title, terms),
+                description_snippet=(
+                    text_search.highlight(row.description, terms, text_search.SNIPPET_WORDS)
+                    if row.description
+                    else None
+                ),
+            )
+            for row in rows
+            if row.task_id in tasks
+        ]
+
+    def _search_like(self, db: Session, owner_id: str, query: str, limit: int) -> list[TaskSearchHit]:
+        # Databases without FTS5: unranked substring match, no highlighting.
+        terms = text_search.search_terms(query)
+        if not terms:
+            return []
+        q = db.query(TaskModel).filter(TaskModel.owner_id == owner_id)
+        for term in terms:
+            pattern = f"%{term}%"
+            q = q.filter(or_(TaskModel.title.ilike(pattern), TaskModel.description.ilike(pattern)))
+        tasks = q.order_by(TaskModel.created_at.desc()).limit(limit).all()
+        return [
+            TaskSearchHit(
+                task=self.to_schema(task),
+                score=0.0,
+                title_snippet=task.title,
+                description_snippet=task.description,
+            )
+            for task in tasks
+        ]
+
+    @staticmethod
+    def _index_search(db: Session, task_ids: list[str], replace: bool = False) -> None:
+        """(Re)write the search rows of ``task_ids`` from their current task rows."""
+        if not task_ids or not _has_search_index(db):
+            return
+        db.flush()
+        if replace:
+            db.execute(_UNINDEX_TASKS, {"match": text_search.build_task_match(task_ids)})
+        db.execute(_INDEX_TASKS, {"ids": task_ids})
+
+    @staticmethod
+    def _unindex_search(db: Session, task_ids: list[str]) -> None:
+        if task_ids and _has_search_index(db):
+            db.execute(_UNINDEX_TASKS, {"match": text_search.build_task_match(task_ids)})
+
+    def tree(self, db: Session, task_id: str, owner_id: str) -> TaskTreeNode:
+        """``task_id`` and all of its descendants, nested, loaded with one recursive CTE."""
+        subtree = self._subtree([task_id], owner_id)
+        tasks = (
             db.query(TaskModel)
-            .filter(TaskModel.parent_task_id == task_id, TaskModel.owner_id == owner_id)
+            .join(subtree, TaskModel.id == subtree.c.id)
+            .order_by(TaskModel.created_at, TaskModel.id)
             .all()
         )
-        for child in children:
-            db.delete(child)
-        db.delete(task)
-        db.commit()
+        nodes = {task.id: self._tree_node(task) for task in tasks}
+        if task_id not in nodes:
+            raise KeyError(f"Task {task_id} not found")
+        for task in tasks:
+            if task.id != task_id and task.parent_task_id in nodes:
+                nodes[task.parent_task_id].children.append(nodes[task.id])
+        return nodes[task_id]
+
+    def _tree_node(self, task: TaskModel) -> TaskTreeNode:
+        count = task.subtree_tasks or 1
+        done = task.subtree_done or 0
+        rollup = TaskRollup(
+            task_count=count,
+            done_count=done,
+            estimated_minutes=task.subtree_minutes or 0,
+            done_ratio=round(done / count, 4),
+        )
+        return TaskTreeNode(**self.to_schema(task).model_dump(), rollup=rollup)
+
+    @staticmethod
+    def _subtree(root_ids: list[str], owner_id: str) -> CTE:
+        """Recursive CTE of the ids of ``root_ids`` and all their descendants."""
+        tree = (
+            select(TaskModel.id)
+            .where(TaskModel.id.in_(root_ids), TaskModel.owner_id == owner_id)
+            .cte("subtree", recursive=True)
+        )
+        child = aliased(TaskModel)
+        # UNION (not UNION ALL) so a corrupted parent cycle still terminates.
+        return tree.union(
+            select(child.id).where(child.parent_task_id == tree.c.id, child.owner_id == owner_id)
+        )
+
+    @staticmethod
+    def _ancestors(task_ids: list[str], owner_id: str) -> CTE:
+        """Recursive CTE of ``task_ids`` and every task above them."""
+        chain = (
+            select(TaskModel.id, TaskModel.parent_task_id)
+            .where(TaskModel.id.in_(task_ids), TaskModel.owner_id == owner_id)
+            .cte("ancestors", recursive=True)
+        )
+        parent = aliased(TaskModel)
+        return chain.union(
+            select(parent.id, parent.parent_task_id).where(
+                parent.id == chain.c.parent_task_id, parent.owner_id == owner_id
+            )
+        )
+
+    def _bump_rollups(
+        self, db: Session, owner_id: str, task_id: str, tasks: int, done: int, minutes: int
+    ) -> None:
+        """Add the deltas to the rollups of ``task_id`` and all of its ancestors."""
+        if not (tasks or done or minutes):
+            return
+        chain = self._ancestors([task_id], owner_id)
+        db.execute(
+            update(TaskModel)
+            .where(TaskModel.id.in_(select(chain.c.id)))
+            .values(
+                subtree_tasks=TaskModel.subtree_tasks + tasks,
+                subtree_done=TaskModel.subtree_done + done,
+                subtree_minutes=TaskModel.subtree_minutes + minutes,
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+
+    def _propagate_rollups(self, db: Session, owner_id: str, task: TaskModel, before: tuple[int, int]) -> None:
+        """Carry one task's status/estimate change up to itself and its ancestors."""
+        old_done, old_minutes = before
+        done, minutes = _rollup_inputs(task)
+        if (done, minutes) != (old_done, old_minutes):
+            db.flush()
+            self._bump_rollups(db, owner_id, task.id, 0, done - old_done, minutes - old_minutes)
+
+    def _shift_subtree_minutes(self, db: Session, owner_id: str, deltas: dict[str, int]) -> None:
+        """Add each task's minutes delta to its own and its ancestors' ``subtree_minutes``.
+
+        One query loads the ancestor chains of all of ``deltas``; the sums per
+        task are then written with one executemany, touching only those chains.
+        """
+        deltas = {task_id: delta for task_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        chain = self._ancestors(list(deltas), owner_id)
+        parents = dict(db.execute(select(chain.c.id, chain.c.parent_task_id)).all())
+        totals: dict[str, int] = {}
+        for task_id, delta in deltas.items():
+            node, seen = task_id, set()
+            # ``seen`` stops at a corrupted parent cycle, as in ``subtree_totals``.
+            while node in parents and node not in seen:
+                seen.add(node)
+                totals[node] = totals.get(node, 0) + delta
+                node = parents[node]
+        rows = [{"task_id": task_id, "delta": total} for task_id, total in totals.items() if total]
+        if rows:
+            db.execute(_ADD_SUBTREE_MINUTES, rows)
 
     def completion_rate(self, db: Session, owner_id: str) -> float:
-        tasks = self.list_all(db, owner_id)
-        if not tasks:
+        counts = self.status_counts(db, owner_id)
+        if not counts["total"]:
             return 0.0
-        done = sum(1 for t in tasks if t.status == "done")
-        return done / len(tasks)
+        return counts[TaskStatus.DONE.value] / counts["total"]
+
+    def changes_since(self, db: Session, owner_id: str, since: Optional[int], limit: int = 500) -> TaskChanges:
+        """Latest state of each task ``owner_id`` changed after cursor ``since``, in change order.
+
+        Without ``since``, returns no changes and the current cursor, to pair
+        with a full list fetched afterwards. At most ``limit`` log rows are
+        read per call; ``has_more`` says to call again with the new cursor.
+        Raises ``LookupError`` if compaction already dropped changes after
+        ``since``: the client must refetch everything.
+        """
+        owned = _changes.c.owner_id == owner_id
+        if since is None:
+            latest = db.scalar(select(func.max(_changes.c.seq)).where(owned)) or 0
+            return TaskChanges(cursor=str(max(latest, self._changes_floor(db, owner_id))), changes=[])
+        rows = db.execute(
+            select(_changes.c.seq, _changes.c.task_id, _changes.c.op)
+            .where(owned, _changes.c.seq > since)
+            .order_by(_changes.c.seq)
+            .limit(limit + 1)
+        ).all()
+        # Read after the rows: a compaction that ran before them shows up here.
+        if since < self._changes_floor(db, owner_id):
+            raise LookupError("Cursor is older than the retained change history")
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        latest_ops: dict[str, str] = {}
+        for row in rows:
+            latest_ops.pop(row.task_id, None)
+            latest_ops[row.task_id] = row.op
+        upserted = [task_id for task_id, op in latest_ops.items() if op == "upsert"]
+        current = {task.id: task for task in self.get_many(db, upserted, owner_id)}
+        changes = [
+            TaskChange(op="upsert", task_id=task_id, task=self.to_schema(current[task_id]))
+            if task_id in current
+            # Deleted after the rows above were read; its tombstone is next.
+            else TaskChange(op="delete", task_id=task_id)
+            for task_id in latest_ops
+        ]
+        return TaskChanges(cursor=str(rows[-1].seq if rows else since), changes=changes, has_more=has_more)
+
+    def compact_changes(self, db: Session, retention: timedelta) -> int:
+        """Shrink the change log; returns the number of rows removed.
+
+        Superseded rows go first, which loses nothing: any cursor before one
+        also sees the task's later row. Then every row older than
+        ``retention`` goes, and each affected owner's ``changes_floor`` rises
+        to its newest removed seq, so older cursors get told to resync.
+        """
+        removed = db.execute(_DROP_SUPERSEDED).rowcount
+        cutoff = datetime.utcnow() - retention
+        # seq follows commit order, so the first row inside the window bounds everything older.
+        boundary = db.scalar(
+            select(_changes.c.seq).where(_changes.c.created_at >= cutoff).order_by(_changes.c.seq).limit(1)
+        )
+        if boundary is None:
+            boundary = (db.scalar(select(func.max(_changes.c.seq))) or 0) + 1
+        floors = db.execute(
+            select(_changes.c.owner_id, func.max(_changes.c.seq))
+            .where(_changes.c.seq < boundary)
+            .group_by(_changes.c.owner_id)
+        ).all()
+        if floors:
+            db.execute(_SET_CHANGES_FLOOR, [{"owner": owner, "floor": seq} for owner, seq in floors])
+            removed += db.execute(delete(_changes).where(_changes.c.seq < boundary)).rowcount
+        db.commit()
+        return removed
+
+    def _changes_floor(self, db: Session, owner_id: str) -> int:
+        return db.scalar(select(TaskStats.changes_floor).where(TaskStats.owner_id == owner_id)) or 0
+
+    @staticmethod
+    def _log_changes(
+        db: Session, owner_id: str, upserted: Iterable[str] = (), deleted: Iterable[str] = ()
+    ) -> None:
+        """Append to ``task_changes`` in the caller's transaction, so a change is logged iff it commits."""
+        now = datetime.utcnow()
+        rows = [
+            {"owner_id": owner_id, "task_id": task_id, "op": op, "created_at": now}
+            for op, task_ids in (("upsert", upserted), ("delete", deleted))
+            for task_id in task_ids
+        ]
+        if rows:
+            db.execute(_LOG_CHANGES, rows)
+
+    def _log_transitions(self, db: Session, owner_id: str, transitions: list[tuple[str, Optional[str], str]]) -> None:
+        """Record ``(task_id, from_status, to_status)`` status changes as ``task_events`` rows."""
+        if not transitions:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {"owner_id": owner_id, "task_id": task_id, "from_status": old, "to_status": new, "at": now}
+            for task_id, old, new in transitions
+        ]
+        if self.events is not None:
+            self.events.record_on_commit(db, rows)
+        else:
+            db.execute(_LOG_TRANSITIONS, rows)
+
+    def store_events(self, db: Session, rows: list[dict[str, Any]]) -> None:
+        """Insert a batch of buffered ``task_events`` rows in one ``executemany``."""
+        db.execute(_LOG_TRANSITIONS, rows)
+        db.commit()
+
+    def data_version(self, db: Session, owner_id: str) -> int:
+        """Counter bumped by every committed change to ``owner_id``'s tasks; 0 before the first."""
+        return db.scalar(select(TaskStats.version).where(TaskStats.owner_id == owner_id)) or 0
+
+    def status_counts(self, db: Session, owner_id: str) -> dict[str, int]:
+        """``{"total": n, <status>: n, ...}`` from the counter row, or GROUP BY if not seeded yet."""
+        stats = db.get(TaskStats, owner_id)
+        if stats is None:
+            return self._count_statuses(db, owner_id)
+        return {"total": stats.total, **{status: getattr(stats, status) for status in STATUS_VALUES}}
+
+    def tag_counts(self, db: Session, owner_id: str) -> list[TagCount]:
+        """Tasks per tag for ``owner_id``, most used first; served from ``ix_task_tags_owner_tag``."""
+        rows = (
+            db.query(TaskTag.tag, func.count())
+            .filter(TaskTag.owner_id == owner_id)
+            .group_by(TaskTag.tag)
+            .order_by(func.count().desc(), TaskTag.tag)
+            .all()
+        )
+        return [TagCount(tag=tag, count=count) for tag, count in rows]
+
+    @staticmethod
+    def _new_task(
+        payload: TaskCreate,
+        owner_id: str,
+        estimated_minutes: int | None = None,
+        predicted_due_at: datetime | None = None,
+    ) -> TaskModel:
+        task = TaskModel(
+            title=payload.title,
+            description=payload.description,
+            due_at=payload.due_at,
+            parent_task_id=payload.parent_task_id,
+            owner_id=owner_id,
+            predicted_due_at=predicted_due_at,
+        )
+        if estimated_minutes is not None:
+            task.estimated_minutes = estimated_minutes
+        task.subtree_tasks = 1
+        task.subtree_done = 0
+        task.subtree_minutes = task.estimated_minutes or 30
+        TaskService._set_tags(task, payload.tags or [])
+        return task
+
+    @staticmethod
+    def _set_tags(task: TaskModel, tags: list[str]) -> None:
+        """Replace the task's tags, keeping rows for tags it already had."""
+        existing = {link.tag: link for link in task.tag_links}
+        links = []
+        for position, tag in enumerate(dict.fromkeys(tags)):
+            link = existing.get(tag) or TaskTag(tag=tag, owner_id=task.owner_id)
+            link.position = position
+            links.append(link)
+        task.tag_links = links
+
+    @staticmethod
+    def _apply_update(task: TaskModel, payload: TaskUpdate) -> dict[str, int]:
+        """Apply ``payload`` to ``task`` in memory and return the counter deltas."""
+        old_status = task.status or TaskStatus.TODO.value
+        changes = payload.model_dump(exclude_unset=True)
+        for field, value in changes.items():
+            if field == "tags":
+                TaskService._set_tags(task, value or [])
+            elif field == "status":
+                setattr(task, field, value.value if hasattr(value, "value") else value)
+            else:
+                setattr(task, field, value)
+        task.updated_at = datetime.utcnow()
+        new_status = task.status or TaskStatus.TODO.value
+        if new_status == old_status:
+            return {}
+        task.completed_at = task.updated_at if new_status == TaskStatus.DONE.value else None
+        return {old_status: -1, new_status: 1}
+
+    def _delete_tasks(self, db: Session, owner_id: str, tasks: list[TaskModel]) -> tuple[list[str], dict[str, int]]:
+        """Delete ``tasks`` and all their descendants; return removed ids and counter deltas."""
+        # Flush first so statuses read back below match in-memory edits.
+        db.flush()
+        subtree = self._subtree([task.id for task in tasks], owner_id)
+        removed = db.query(TaskModel.id, TaskModel.status).join(subtree, TaskModel.id == subtree.c.id).all()
+        removed_ids = [row.id for row in removed]
+        deltas = {"total": -len(removed)}
+        for row in removed:
+            status = row.status or TaskStatus.TODO.value
+            deltas[status] = deltas.get(status, 0) - 1
+        for task in tasks:
+            if task.parent_task_id and task.parent_task_id not in removed_ids:
+                moved = (task.subtree_tasks or 1, task.subtree_done or 0, task.subtree_minutes or 0)
+                self._bump_rollups(db, owner_id, task.parent_task_id, *(-n for n in moved))
+        db.query(TaskTag).filter(TaskTag.task_id.in_(removed_ids)).delete(synchronize_session=False)
+        self._unindex_search(db, removed_ids)
+        # The whole subtree goes in one recursive DELETE.
+        db.query(TaskModel).filter(TaskModel.id.in_(select(subtree.c.id))).delete(synchronize_session=False)
+        return removed_ids, deltas
+
+    def _count_statuses(self, db: Session, owner_id: str) -> dict[str, int]:
+        status = func.coalesce(TaskModel.status, TaskStatus.TODO.value)
+        rows = db.query(status, func.count()).filter(TaskModel.owner_id == owner_id).group_by(status).all()
+        counts = {"total": sum(n for _, n in rows), **{value: 0 for value in STATUS_VALUES}}
+        for value, n in rows:
+            if value in counts:
+                counts[value] += n
+        return counts
+
+    def _adjust_stats(self, db: Session, owner_id: str, deltas: dict[str, int]) -> None:
+        """Apply counter deltas as ``col = col + n`` so concurrent writers never lose updates.
+
+        Every mutation calls this, even with no deltas, because it also bumps
+        the owner's ``version``.
+        """
+        deltas = {column: n for column, n in deltas.items() if n and hasattr(TaskStats, column)}
+        deltas["version"] = 1
+        increments = {c: getattr(TaskStats, c) + n for c, n in deltas.items()}
+        db.flush()
+        result = db.execute(
+            update(TaskStats)
+            .where(TaskStats.owner_id == owner_id)
+            .values({getattr(TaskStats, c): value for c, value in increments.items()})
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
+        # First mutation for this owner: seed from the already-flushed task
+        # table. A concurrent first writer (no write queue) may insert the
+        # row first; then only this mutation's deltas are added to it.
+        seed = {"owner_id": owner_id, "version": 1, **self._count_statuses(db, owner_id)}
+        upsert = _UPSERTS.get(db.get_bind().dialect.name)
+        if upsert is not None:
+            db.execute(
+                upsert(TaskStats).values(seed).on_conflict_do_update(index_elements=["owner_id"], set_=increments)
+            )
+            return
+        try:
+            with db.begin_nested():
+                db.execute(insert(TaskStats).values(seed))
+        except IntegrityError:
+            db.execute(update(TaskStats).where(TaskStats.owner_id == owner_id).values(increments))
 
     def to_schema(self, task: TaskModel) -> Task:
         """Convert a DB model to a Pydantic schema."""
-        import json as _json
-        tags = _json.loads(task.tags) if task.tags else []
         return Task(
             id=task.id,
             title=task.title,
@@ -95,8 +915,33 @@ class TaskService:
             due_at=task.due_at,
             predicted_due_at=task.predicted_due_at,
             parent_task_id=task.parent_task_id,
-            tags=tags,
+            tags=[link.tag for link in task.tag_links],
             owner_id=task.owner_id,
             created_at=task.created_at,
             updated_at=task.updated_at,
         )
+
+
+def _transition(task_id: str, deltas: dict[str, int]) -> tuple[str, str, str]:
+    """``(task_id, from_status, to_status)`` from the ``{old: -1, new: 1}`` deltas of ``_apply_update``."""
+    old = next(status for status, n in deltas.items() if n < 0)
+    new = next(status for status, n in deltas.items() if n > 0)
+    return task_id, old, new
+
+
+def _rollup_inputs(task: TaskModel) -> tuple[int, int]:
+    """``(done, estimated_minutes)`` one task contributes to its own and its ancestors' rollups."""
+    return int(task.status == TaskStatus.DONE.value), task.estimated_minutes or 30
+
+
+def _has_search_index(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def _touches_text(payload: TaskUpdate) -> bool:
+    return bool({"title", "description"} & payload.model_fields_set)
+
+
+def _merge_deltas(total: dict[str, int], deltas: dict[str, int]) -> None:
+    for key, value in deltas.items():
+        total[key] = total.get(key, 0) + value
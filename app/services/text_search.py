@@ -0,0 +1,81 @@
+"""Query building, ranking and highlighting for the ``task_search`` FTS5 index."""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Optional
+
+SNIPPET_OPEN, SNIPPET_CLOSE = "<mark>", "</mark>"
+MAX_SEARCH_TERMS = 16
+SNIPPET_WORDS = 24
+
+# Same word boundaries as FTS5's unicode61 tokenizer: letters and digits only.
+_WORD = re.compile(r"[^\W_]+")
+
+# bm25() weight per ``task_search`` column: title, description, then the
+# owner_key, task_key and task_id columns, which never rank.
+BM25_WEIGHTS = (10.0, 1.0, 0.0, 0.0, 0.0)
+
+
+def owner_key(owner_id: str) -> str:
+    """``owner_id`` as a single FTS5 token (UUID dashes would split it into five)."""
+    return owner_id.replace("-", "")
+
+
+def task_key(task_id: str) -> str:
+    """``task_id`` hex-encoded: one FTS5 token whatever characters the id holds."""
+    return task_id.encode().hex()
+
+
+def build_task_match(task_ids: list[str]) -> str:
+    """FTS5 MATCH expression for the index rows of ``task_ids``."""
+    return "task_key : ({})".format(" OR ".join(f'"{task_key(task_id)}"' for task_id in task_ids))
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents, matching ``remove_diacritics`` in the index."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def search_terms(query: str) -> list[str]:
+    return _WORD.findall(fold(query))[:MAX_SEARCH_TERMS]
+
+
+def build_match(terms: list[str], owner_id: str) -> Optional[str]:
+    """FTS5 MATCH expression: every term must appear, the last one as a prefix.
+
+    Completed words match exactly and only the word still being typed is a
+    prefix; long prefixes make FTS5 merge whole doclists, exact terms don't.
+    Terms are quoted so user input can never inject FTS5 syntax.
+    """
+    if not terms:
+        return None
+    words = " ".join(f'"{term}"' for term in terms[:-1])
+    words = f'{words} "{terms[-1]}"*'.strip()
+    return f"owner_key : {owner_key(owner_id)} AND {{title description}} : ({words})"
+
+
+def _matches(word: str, terms: list[str]) -> bool:
+    *exact, prefix = terms
+    return word.startswith(prefix) or word in exact
+
+
+def highlight(text: str, terms: list[str], max_words: Optional[int] = None) -> str:
+    """Wrap matched words in ``<mark>``; with ``max_words``, cut a window around the first match."""
+    spans = list(_WORD.finditer(text))
+    if max_words is not None and len(spans) > max_words:
+        first = next((i for i, m in enumerate(spans) if _matches(fold(m.group()), terms)), 0)
+        start = max(0, min(first - max_words // 4, len(spans) - max_words))
+        end = start + max_words
+        prefix = "…" if start else ""
+        suffix = "…" if end < len(spans) else ""
+        window = text[spans[start].start():spans[end - 1].end()]
+        return prefix + highlight(window, terms) + suffix
+    return _WORD.sub(
+        lambda m: f"{SNIPPET_OPEN}{m.group()}{SNIPPET_CLOSE}" if _matches(fold(m.group()), terms) else m.group(),
+        text,
+    )
+
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.services.event_recorder import discard_pending, release_pending
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    # The caller's context, so per-request instrumentation sees the job's queries.
+    context: contextvars.Context
+
+    def settle(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        def apply() -> None:
+            if self.future.done():
+                return
+            if error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+
+        try:
+            self.loop.call_soon_threadsafe(apply)
+        except RuntimeError:
+            pass  # the caller's loop has closed; nobody is waiting
+
+
+class WriteQueue:
+    """Serialises every database write through one thread with group commit.
+
+    SQLite allows one writer at a time; letting request threads race for the
+    lock means ``database is locked`` errors and retry storms. Here ``submit``
+    queues ``fn(session, *args)`` and a single thread runs queued jobs back to
+    back inside one ``BEGIN IMMEDIATE`` transaction (at most ``max_batch`` of
+    them), then commits once for the whole group. Each job gets its own
+    session joined to that transaction through a SAVEPOINT, so service code
+    keeps calling ``db.commit()`` and ``db.rollback()`` as usual and a failing
+    job only rolls back its own changes. Callers are answered after the group
+    commit, so an acknowledged write is a committed write.
+
+    Results are ORM objects detached from a closed session: attributes loaded
+    before the job returned stay readable, anything lazy does not.
+    """
+
+    def __init__(self, engine: Engine, max_batch: int = 64) -> None:
+        self.engine = engine
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue[Optional[_Job]] = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.groups = 0
+        self.jobs = 0
+        self.failed = 0
+        self.largest_group = 0
+        self._avg_commit = 0.0
+
+    async def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(session, *args, **kwargs)`` on the writer; a cancelled caller does not cancel the write."""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_Job(fn, args, kwargs, loop, future, contextvars.copy_context()))
+        return await future
+
+    def close(self) -> None:
+        """Finish queued jobs, then stop the writer thread."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "max_batch": self.max_batch,
+            "queued": self._queue.qsize(),
+            "groups": self.groups,
+            "jobs": self.jobs,
+            "failed": self.failed,
+            "mean_group_size": round(self.jobs / self.groups, 2) if self.groups else 0.0,
+            "largest_group": self.largest_group,
+            "avg_commit_ms": round(self._avg_commit * 1000, 3),
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            group, stop = [job], False
+            # Whatever queued up while the previous group was committing joins this one.
+            while len(group) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                group.append(job)
+            self._commit_group(group)
+            if stop:
+                return
+
+    def _commit_group(self, group: list[_Job]) -> None:
+        started = time.perf_counter()
+        outcomes: list[tuple[_Job, Any, Optional[BaseException]]] = []
+        try:
+            with self.engine.connect() as conn:
+                try:
+                    with conn.begin():
+                        for job in group:
+                            db = Session(
+                                bind=conn,
+                                join_transaction_mode="create_savepoint",
+                                autoflush=False,
+                                expire_on_commit=False,
+                            )
+                            try:
+                                result = job.context.run(job.fn, db, *job.args, **job.kwargs)
+                                db.commit()
+                                outcomes.append((job, result, None))
+                            except Exception as exc:
+                                db.rollback()
+                                outcomes.append((job, None, exc))
+                            finally:
+                                db.close()
+                except BaseException:
+                    discard_pending(conn.info)
+                    raise
+                # Jobs' write-behind events wait for the group COMMIT, not their SAVEPOINT.
+                release_pending(conn.info)
+        except Exception as exc:
+            # BEGIN or COMMIT failed, so nothing from this group was written.
+            logger.exception("Write group of %d jobs failed", len(group))
+            outcomes = [(job, None, exc) for job in group]
+        self.groups += 1
+        self.jobs += len(group)
+        self.largest_group = max(self.largest_group, len(group))
+        self._avg_commit = 0.8 * self._avg_commit + 0.2 * (time.perf_counter() - started)
+        for job, result, error in outcomes:
+            self.failed += error is not None
+            job.settle(result, error)
@@ -0,0 +1,383 @@
+"""End-to-end API load suite with a stored baseline.
+
+For each ``--sizes`` value, seeds a SQLite database with that many tasks spread
+over ``size // 100`` users (5..10k), then drives the app with ``--concurrency``
+async clients in each ``--modes``:
+
+* ``asgi``:   in-process through ``httpx.ASGITransport`` (app cost only);
+* ``socket``: a real ``uvicorn`` process over TCP, plus a WebSocket fan-out
+  scenario (``--ws-clients`` sockets for one user, time from ``POST /v1/tasks``
+  to the ``task.created`` event on every socket).
+
+Scenarios: ``list``, ``search``, ``create``, ``schedule`` (20-task
+``/v1/schedule/optimize``) and ``login`` (bcrypt-bound, a tenth of the
+requests, at most 4 in flight so the hasher's queue limit does not turn the
+run into a 503 count). Each (size, mode) runs in a fresh process on a copy of
+the seeded file, so runs start from identical data. On a shared or small
+machine use ``--repeat 3``: each scenario keeps its best run of the three,
+which filters out most scheduling noise.
+
+``--save FILE`` stores the results as a baseline; ``--compare FILE`` flags a
+scenario whose p95 grew, or whose throughput fell, by more than
+``--tolerance`` and exits with status 1 if any did.
+
+Usage:
+    python -m benchmarks.bench_api [--sizes 100 10000] [--modes asgi socket]
+    python -m benchmarks.bench_api --sizes 1000000 --data-dir /var/tmp/bench   # keep the slow seed
+    python -m benchmarks.bench_api --repeat 3 --compare benchmarks/baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+PASSWORD = "bench-password"
+QUERIES = ["report", "rev", "quarterly budget", "mig", "invoice te"]
+# Below this p95 difference (ms) a change is treated as noise, whatever the ratio.
+NOISE_FLOOR_MS = 2.0
+
+
+def users_for(size: int) -> int:
+    return max(5, min(10_000, size // 100))
+
+
+def seed(path: Path, size: int) -> None:
+    """Bulk-load ``size`` tasks through the app's own schema, bypassing the ORM."""
+    from sqlalchemy import create_engine, text
+
+    from app.auth import pwd_context
+    from app.database import _create_schema
+    from app.models import TaskModel, TaskTag, User
+    from benchmarks.bench_search import FILLER, NOUNS, VERBS
+
+    rng = random.Random(size)
+    engine = create_engine(f"sqlite:///{path}")
+    hashed = pwd_context.hash(PASSWORD)
+    owners = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(users_for(size))]
+    start = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        _create_schema(conn)
+        conn.execute(
+            User.__table__.insert(),
+            [
+                {"id": o, "username": f"bench{i:05d}", "email": f"bench{i:05d}@example.com", "hashed_password": hashed}
+                for i, o in enumerate(owners)
+            ],
+        )
+        for offset in range(0, size, 50_000):
+            tasks, tags = [], []
+            for i in range(offset, min(size, offset + 50_000)):
+                task_id = str(uuid.UUID(int=rng.getrandbits(128)))
+                created = start + timedelta(seconds=i)
+                tasks.append(
+                    {
+                        "id": task_id,
+                        "title": f"{rng.choice(VERBS).title()} {rng.choice(NOUNS)} {rng.choice(FILLER)}",
+                        "description": " ".join(rng.choice(FILLER + NOUNS) for _ in range(rng.randint(0, 15))) or None,
+                        "status": rng.choice(["todo", "todo", "in_progress", "done"]),
+                        "priority_score": round(rng.uniform(0, 100), 1),
+                        "estimated_minutes": rng.choice([30, 45, 60, 90]),
+                        "due_at": created + timedelta(days=rng.randint(1, 30)) if rng.random() < 0.5 else None,
+                        "owner_id": owners[i % len(owners)],
+                        "created_at": created,
+                        "updated_at": created,
+                    }
+                )
+                if rng.random() < 0.3:
+                    tags.append({"task_id": task_id, "owner_id": owners[i % len(owners)], "tag": "work", "position": 0})
+            conn.execute(TaskModel.__table__.insert(), tasks)
+            if tags:
+                conn.execute(TaskTag.__table__.insert(), tags)
+        conn.execute(
+            text(
+                "INSERT INTO task_search (title, description, owner_key, task_key, task_id) "
+                "SELECT title, coalesce(description, ''), replace(owner_id, '-', ''), lower(hex(id)), id FROM tasks"
+            )
+        )
+    engine.dispose()
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, float]:
+    ordered = sorted(latencies) or [0.0]
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 2)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50": round(statistics.median(ordered), 2),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+    }
+
+
+async def drive(
+    total: int, concurrency: int, request: Callable[[int], Awaitable[bool]], warmup: int = 0
+) -> dict[str, float]:
+    """Issue ``total`` calls of ``request(n)`` from ``concurrency`` workers; it returns success.
+
+    The first ``warmup`` calls (connection setup, caches, lazy imports) are not timed.
+    """
+    for n in range(min(warmup, total)):
+        try:
+            await request(n)
+        except Exception:
+            pass
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for n in counter:
+            began = time.perf_counter()
+            try:
+                ok = await request(n)
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - began) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_scenarios(client, db_path: Path, args: argparse.Namespace, ws_url: str | None) -> dict[str, dict]:
+    from app.auth import create_access_token
+
+    with sqlite3.connect(db_path) as conn:
+        users = conn.execute("SELECT id, username FROM users ORDER BY username").fetchall()
+        sample = users[: min(len(users), 50)]
+        schedule_ids = {
+            owner: [row[0] for row in conn.execute("SELECT id FROM tasks WHERE owner_id = ? LIMIT 20", (owner,))]
+            for owner, _ in sample
+        }
+    headers = {owner: {"Authorization": f"Bearer {create_access_token({'sub': owner})}"} for owner, _ in sample}
+    rng = random.Random(1)
+    picks = [rng.choice(sample)[0] for _ in range(args.requests)]
+
+    scenarios: dict[str, Callable[[int], Awaitable[bool]]] = {
+        "list": lambda n: _check(client.get("/v1/tasks?limit=50", headers=headers[picks[n]])),
+        "search": lambda n: _check(
+            client.get("/v1/tasks/search", params={"q": QUERIES[n % len(QUERIES)]}, headers=headers[picks[n]])
+        ),
+        "create": lambda n: _check(
+            client.post("/v1/tasks", json={"title": f"Bench task {n}", "tags": ["bench"]}, headers=headers[picks[n]])
+        ),
+        "schedule": lambda n: _check(
+            client.post(
+                "/v1/schedule/optimize",
+                json={"tasks": schedule_ids[picks[n]], "start_at": "2026-03-02T09:00:00"},
+                headers=headers[picks[n]],
+            )
+        ),
+    }
+    results = {}
+    for name, request in scenarios.items():
+        results[name] = await drive(args.requests, args.concurrency, request, args.warmup)
+    usernames = [username for _, username in sample]
+    results["login"] = await drive(
+        max(10, args.requests // 10),
+        min(4, args.concurrency),
+        lambda n: _check(
+            client.post("/api/auth/login", json={"username": usernames[n % len(usernames)], "password": PASSWORD})
+        ),
+    )
+    if ws_url is not None:
+        owner = sample[0][0]
+        results["ws_fanout"] = await ws_fanout(client, ws_url, owner, headers[owner], args)
+    return results
+
+
+async def _check(pending) -> bool:
+    response = await pending
+    return response.status_code < 400
+
+
+async def ws_fanout(client, ws_url: str, owner: str, headers: dict, args: argparse.Namespace) -> dict[str, float]:
+    import websockets
+
+    token = headers["Authorization"].split()[1]
+    sent: dict[str, float] = {}
+    latencies: list[float] = []
+    expected = args.ws_clients * args.ws_events
+    done = asyncio.Event()
+
+    async def listen(ws) -> None:
+        async for raw in ws:
+            message = json.loads(raw)
+            title = message.get("payload", {}).get("title", "")
+            if message.get("type") == "task.created" and title in sent:
+                latencies.append((time.perf_counter() - sent[title]) * 1000)
+                if len(latencies) >= expected:
+                    done.set()
+
+    sockets = [await websockets.connect(f"{ws_url}/v1/realtime?token={token}") for _ in range(args.ws_clients)]
+    listeners = [asyncio.create_task(listen(ws)) for ws in sockets]
+    await asyncio.sleep(0.2)  # let the server register every socket
+    started = time.perf_counter()
+    for n in range(args.ws_events):
+        title = f"Fan-out {n}"
+        sent[title] = time.perf_counter()
+        await client.post("/v1/tasks", json={"title": title}, headers=headers)
+    try:
+        await asyncio.wait_for(done.wait(), timeout=30)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - started
+    for task in listeners:
+        task.cancel()
+    for ws in sockets:
+        await ws.close()
+    return summarize(latencies, expected - len(latencies), elapsed)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def worker_main(args: argparse.Namespace) -> dict[str, dict]:
+    import httpx
+
+    if args.mode == "asgi":
+        from app.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                return await run_scenarios(client, args.db, args, ws_url=None)
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=os.environ.copy(),
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base, timeout=60, limits=limits) as client:
+            for _ in range(100):
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            return await run_scenarios(client, args.db, args, ws_url=f"ws://127.0.0.1:{port}")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    regressions = []
+    print(f"\n{'scenario':<28}{'p95 ms':>10}{'base':>10}{'Δ':>8}{'rps':>10}{'base':>10}{'Δ':>8}")
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        p95_delta = (current["p95"] - base["p95"]) / base["p95"] if base["p95"] else 0.0
+        rps_delta = (current["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        slower = p95_delta > tolerance and current["p95"] - base["p95"] > NOISE_FLOOR_MS
+        flag = "  REGRESSION" if slower or rps_delta < -tolerance else ""
+        if flag:
+            regressions.append(key)
+        print(
+            f"{key:<28}{current['p95']:>10.2f}{base['p95']:>10.2f}{p95_delta:>+8.0%}"
+            f"{current['rps']:>10.1f}{base['rps']:>10.1f}{rps_delta:>+8.0%}{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000])
+    parser.add_argument("--modes", nargs="+", choices=["asgi", "socket"], default=["asgi", "socket"])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per (size, mode); the best p95 is kept")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests before each scenario")
+    parser.add_argument("--ws-clients", type=int, default=50)
+    parser.add_argument("--ws-events", type=int, default=20)
+    parser.add_argument("--data-dir", type=Path, help="Keep seeded databases here and reuse them")
+    parser.add_argument("--save", type=Path, help="Write results as a baseline")
+    parser.add_argument("--compare", type=Path, help="Baseline to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--worker", choices=["asgi", "socket"], dest="mode", help=argparse.SUPPRESS)
+    parser.add_argument("--db", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Worker process: DATABASE_URL was set by the parent before any app import.
+        print(json.dumps(asyncio.run(worker_main(args))))
+        return
+
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or Path(tmp)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        for size in args.sizes:
+            pristine = data_dir / f"tasks-{size}.db"
+            if not pristine.exists():
+                started = time.perf_counter()
+                seed(pristine, size)
+                print(f"seeded {size:,} tasks / {users_for(size):,} users in {time.perf_counter() - started:.1f}s")
+            for mode, _ in itertools.product(args.modes, range(args.repeat)):
+                working = Path(tmp) / f"run-{size}-{mode}.db"
+                shutil.copyfile(pristine, working)
+                command = [
+                    sys.executable, "-m", "benchmarks.bench_api", "--worker", mode, "--db", str(working),
+                    "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                    "--warmup", str(args.warmup), "--ws-clients", str(args.ws_clients),
+                    "--ws-events", str(args.ws_events),
+                ]
+                # Measures capacity, so per-user rate limits (a few seeded users
+                # take all the load) must not turn requests into cheap 429s.
+                env = {**os.environ, "DATABASE_URL": f"sqlite:///{working}", "ADMISSION_CONTROL": "0"}
+                output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+                for scenario, stats in json.loads(output.stdout.strip().splitlines()[-1]).items():
+                    key = f"{size}/{mode}/{scenario}"
+                    if key not in results or stats["p95"] < results[key]["p95"]:
+                        results[key] = stats
+
+    print(f"{'scenario':<28}{'reqs':>7}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for key, r in results.items():
+        print(
+            f"{key:<28}{r['requests']:>7}{r['errors']:>5}{r['rps']:>9.1f}"
+            f"{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}"
+        )
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline written to {args.save}")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nno regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
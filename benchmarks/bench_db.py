@@ -0,0 +1,154 @@
+"""Concurrent mixed read/write latency: blocking sync calls vs. run_db paths.
+
+Compares three ways of driving ``TaskService`` from coroutines:
+
+* ``inline``     -- sync ``Session`` called directly on the event loop (old routers)
+* ``threadpool`` -- sync ``Session`` through ``run_db`` (default sync mode)
+* ``async``      -- ``AsyncSession`` on aiosqlite through ``run_db``
+
+Usage: python -m benchmarks.bench_db [--clients 32] [--ops 40] [--seed 2000] [--interval-ms 50]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import _create_schema, run_db
+from app.models import TaskModel, User
+from app.schemas import TaskCreate
+from app.services.task_service import TaskService
+
+OWNER = "bench-owner"
+service = TaskService()
+
+
+def _seed(path: Path, count: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        _create_schema(conn)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(id=OWNER, username=OWNER, email=f"{OWNER}@example.com", hashed_password="x"))
+        db.add_all(TaskModel(title=f"Seed task {i}", owner_id=OWNER) for i in range(count))
+        db.commit()
+    engine.dispose()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _client(
+    open_session, mode: str, ops: int, interval: float, rng: random.Random, latencies: list[float]
+) -> None:
+    # Open-loop arrivals: latency is measured from the scheduled start, so time
+    # spent waiting behind a blocked event loop counts against the request.
+    scheduled = time.perf_counter() + rng.random() * interval
+    for _ in range(ops):
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        write = rng.random() < 0.2
+        async with open_session() as db:
+            if mode == "inline":
+                if write:
+                    service.create(db, TaskCreate(title="Bench write"), OWNER)
+                else:
+                    service.list_all(db, OWNER)
+            elif write:
+                await run_db(db, service.create, TaskCreate(title="Bench write"), OWNER)
+            else:
+                await run_db(db, service.list_all, OWNER)
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+        scheduled += interval
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list[float], interval: float = 0.005) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def run_mode(mode: str, path: Path, clients: int, ops: int, interval: float) -> dict[str, float]:
+    if mode == "async":
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        open_session = factory
+    else:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        factory = sessionmaker(bind=engine, expire_on_commit=False)
+        open_session = _SyncScope(factory)
+
+    latencies: list[float] = []
+    lags: list[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(_client(open_session, mode, ops, interval, random.Random(i), latencies) for i in range(clients))
+    )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    if mode == "async":
+        await engine.dispose()
+    else:
+        engine.dispose()
+    return {
+        "ops_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 99),
+        "p99_loop_lag_ms": percentile(lags, 99) if lags else 0.0,
+        "max_loop_lag_ms": max(lags, default=0.0),
+    }
+
+
+class _SyncScope:
+    """``async with`` adapter so sync and async sessions share one client loop."""
+
+    def __init__(self, factory) -> None:
+        self._factory = factory
+
+    def __call__(self) -> "_SyncScope":
+        scope = _SyncScope(self._factory)
+        scope._db = self._factory()
+        return scope
+
+    async def __aenter__(self):
+        return self._db
+
+    async def __aexit__(self, *exc) -> None:
+        self._db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=2000)
+    parser.add_argument("--interval-ms", type=float, default=50.0, help="per-client gap between requests")
+    args = parser.parse_args()
+
+    print(f"{'mode':<12}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'p99 lag ms':>12}{'max lag ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("inline", "threadpool", "async"):
+            path = Path(tmp) / f"{mode}.db"
+            _seed(path, args.seed)
+            result = asyncio.run(run_mode(mode, path, args.clients, args.ops, args.interval_ms / 1000))
+            print(
+                f"{mode:<12}{result['ops_per_s']:>10.1f}{result['p50_ms']:>10.2f}"
+                f"{result['p99_ms']:>10.2f}{result['p99_loop_lag_ms']:>12.2f}{result['max_loop_lag_ms']:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Effort estimation throughput: per-task vs batched, plus ``POST /v1/tasks:reestimate``.
+
+Seeds one owner with ``--tasks`` tasks (a tenth of them subtasks of earlier
+ones), times ``AIService.estimate_effort`` in a loop against
+``estimate_effort_many`` on the same texts, then times a full
+``TaskService.reestimate`` pass over the database.
+
+Usage: python -m benchmarks.bench_estimate [--tasks 100000] [--chunk 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.models import TaskModel
+from app.schemas import Task
+from app.services.ai_service import AIService
+from app.services.task_service import TaskService
+from benchmarks.bench_search import seed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=2000)
+    args = parser.parse_args()
+
+    ai, service, owner = AIService(), TaskService(), str(uuid.uuid4())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "estimate.db"
+        seed(path, {owner: args.tasks})
+        engine = create_engine(f"sqlite:///{path}")
+        with sessionmaker(bind=engine, expire_on_commit=False)() as db:
+            rows = db.execute(select(TaskModel.id, TaskModel.title, TaskModel.description)).all()
+            rng = random.Random(3)
+            parents = [
+                {"id": rows[i].id, "parent_task_id": rows[rng.randrange(i)].id}
+                for i in rng.sample(range(1, len(rows)), len(rows) // 10)
+            ]
+            db.execute(update(TaskModel), parents)
+            db.commit()
+
+            tasks = [Task(title=row.title, description=row.description) for row in rows]
+            started = time.perf_counter()
+            single = [ai.estimate_effort(task) for task in tasks]
+            looped = time.perf_counter() - started
+            started = time.perf_counter()
+            batched = ai.estimate_effort_many(tasks)
+            vectorised = time.perf_counter() - started
+            assert single == batched
+            print(f"estimate_effort loop   {len(tasks) / looped:>12,.0f} tasks/s")
+            print(f"estimate_effort_many   {len(tasks) / vectorised:>12,.0f} tasks/s ({looped / vectorised:.1f}x)")
+
+            started = time.perf_counter()
+            result = service.reestimate(db, owner, ai.predict_many, args.chunk)
+            elapsed = time.perf_counter() - started
+            print(
+                f"reestimate             {result.scanned / elapsed:>12,.0f} tasks/s "
+                f"({result.updated} of {result.scanned} updated in {elapsed:.1f}s)"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
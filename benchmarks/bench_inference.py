@@ -0,0 +1,86 @@
+"""Micro-batched inference: throughput and latency at batch sizes 1..256.
+
+For each backend, first calls ``estimate_effort`` directly on batches of each
+size (raw model throughput), then pushes ``--requests`` concurrent
+single-task requests through a ``MicroBatcher`` capped at that size, the way
+``/v1/tasks/{id}/estimate`` does, and reports per-request latency.
+
+Usage: python -m benchmarks.bench_inference [--requests 4096] [--backend heuristic numpy]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.schemas import Task
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_backend import create_model_backend
+from benchmarks.bench_search import FILLER, NOUNS, VERBS, percentile
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+def _tasks(count: int) -> list[Task]:
+    rng = random.Random(11)
+    return [
+        Task(
+            title=f"{rng.choice(VERBS).title()} {rng.choice(NOUNS)} {rng.choice(FILLER)}",
+            description=" ".join(rng.choice(FILLER + NOUNS) for _ in range(rng.randint(0, 20))) or None,
+        )
+        for _ in range(count)
+    ]
+
+
+def direct(backend, tasks: list[Task], size: int) -> float:
+    started = time.perf_counter()
+    for offset in range(0, len(tasks), size):
+        backend.estimate_effort(tasks[offset : offset + size])
+    return len(tasks) / (time.perf_counter() - started)
+
+
+async def batched(backend, tasks: list[Task], size: int) -> tuple[float, list[float], float]:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = MicroBatcher(backend.estimate_effort, executor, max_batch_size=size, max_wait_ms=2)
+        latencies: list[float] = []
+
+        async def request(task: Task) -> None:
+            began = time.perf_counter()
+            await batcher.submit(task)
+            latencies.append((time.perf_counter() - began) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request(task) for task in tasks))
+        elapsed = time.perf_counter() - started
+        return len(tasks) / elapsed, latencies, batcher.stats()["mean_batch_size"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=4096)
+    parser.add_argument("--backend", nargs="+", default=["heuristic", "numpy"])
+    args = parser.parse_args()
+
+    tasks = _tasks(args.requests)
+    for kind in args.backend:
+        try:
+            backend = create_model_backend(kind)
+        except ImportError as exc:
+            print(f"{kind}: skipped ({exc})")
+            continue
+        print(f"\nbackend={kind}")
+        print(f"{'batch':>6}{'direct/s':>12}{'batched/s':>12}{'mean batch':>12}{'p50 ms':>9}{'p99 ms':>9}")
+        for size in BATCH_SIZES:
+            raw = direct(backend, tasks, size)
+            throughput, latencies, mean_batch = asyncio.run(batched(backend, tasks, size))
+            print(
+                f"{size:>6}{raw:>12,.0f}{throughput:>12,.0f}{mean_batch:>12.1f}"
+                f"{statistics.median(latencies):>9.2f}{percentile(latencies, 0.99):>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Scheduler planning time for 10 / 1k / 10k tasks, then the whole route.
+
+The second table times ``POST /v1/schedule/optimize`` end to end (request
+parsing, loading the tasks from a seeded SQLite file, planning and the
+response) through ``TestClient``, for one user's 1k / 5k / 10k tasks.
+
+Usage: python -m benchmarks.bench_scheduler [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import orjson
+
+from app.services.scheduler import SchedulableTask, Scheduler, WorkingHours
+
+
+def make_tasks(count: int, rng: random.Random) -> list[SchedulableTask]:
+    start = datetime(2026, 1, 5, 9)
+    return [
+        SchedulableTask(
+            id=f"task-{i}",
+            priority_score=rng.uniform(0, 100),
+            estimated_minutes=rng.choice([15, 30, 45, 60, 90, 180]),
+            deadline=start + timedelta(hours=rng.randint(1, 24 * 60)) if rng.random() < 0.7 else None,
+        )
+        for i in range(count)
+    ]
+
+
+def bench_route(counts: tuple[int, ...], repeat: int) -> None:
+    # Before anything imports app.database; no rate limits on a benchmark.
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'schedule.db'}"
+    os.environ["ADMISSION_CONTROL"] = "0"
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+
+    from app.auth import create_access_token
+    from app.database import engine
+    from app.main import app
+    from app.models import TaskModel, User
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(f"{'tasks':>8}{'route ms':>10}")
+    with TestClient(app) as client:
+        for count in counts:
+            owner_id = str(uuid.uuid4())
+            rng = random.Random(count)
+            start = datetime(2026, 1, 5, 9)
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "title": f"Task {i}",
+                    "status": "todo",
+                    "priority_score": rng.uniform(0, 100),
+                    "estimated_minutes": rng.choice([15, 30, 45, 60, 90, 180]),
+                    "due_at": start + timedelta(hours=rng.randint(1, 24 * 60)) if rng.random() < 0.7 else None,
+                    "owner_id": owner_id,
+                    "created_at": start,
+                    "updated_at": start,
+                }
+                for i in range(count)
+            ]
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(User),
+                    {"id": owner_id, "username": owner_id[:8], "email": f"{owner_id[:8]}@example.com", "hashed_password": "x"},
+                )
+                conn.execute(insert(TaskModel), rows)
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': owner_id})}"}
+            body = {"tasks": [row["id"] for row in rows], "start_at": "2026-01-05T09:00:00"}
+            times = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.post("/v1/schedule/optimize", json=body, headers=headers)
+                times.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+            print(f"{count:>8}{statistics.median(times):>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    scheduler = Scheduler()
+    hours = WorkingHours()
+    print(f"{'tasks':>8}{'blocks':>8}{'plan ms':>10}{'+response ms':>14}")
+    for count in (10, 1_000, 5_000, 10_000):
+        tasks = make_tasks(count, random.Random(count))
+        plan_times, total_times = [], []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            blocks = scheduler.plan(tasks, datetime(2026, 1, 5, 9), hours)
+            planned = time.perf_counter()
+            orjson.dumps({"blocks": blocks})  # what the route sends
+            plan_times.append((planned - started) * 1000)
+            total_times.append((time.perf_counter() - started) * 1000)
+        print(f"{count:>8}{len(blocks):>8}{statistics.median(plan_times):>10.2f}{statistics.median(total_times):>14.2f}")
+    print()
+    bench_route((1_000, 5_000, 10_000), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""/v1/tasks/search latency on a 100k-task owner (FTS5, ranked, with snippets).
+
+Seeds one owner with ``--tasks`` tasks plus a second owner with a fifth as
+many, so owner scoping is exercised, then times ``TaskService.search`` for a
+mix of rare, common, multi-word and short-prefix queries.
+
+Usage: python -m benchmarks.bench_search [--tasks 100000] [--repeat 50]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import _create_schema
+from app.models import TaskModel, User
+from app.services.task_service import TaskService
+
+VERBS = ["review", "draft", "fix", "plan", "ship", "refactor", "call", "email", "prepare", "test"]
+NOUNS = [
+    "budget", "roadmap", "invoice", "release", "onboarding", "migration", "report", "dashboard",
+    "contract", "backlog", "slides", "hiring", "newsletter", "audit", "pipeline", "survey",
+]
+FILLER = ["with", "for", "the", "team", "client", "before", "after", "weekly", "quarterly", "notes", "draft"]
+QUERIES = ["invoice", "quarterly report", "mig", "re", "ship release te", "invoices", "zebra"]
+
+
+def _task_rows(owner_id: str, count: int, rng: random.Random) -> list[dict]:
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(count):
+        title = f"{rng.choice(VERBS).title()} {rng.choice(NOUNS)} {rng.choice(FILLER)} {rng.choice(NOUNS)}"
+        description = " ".join(rng.choice(FILLER + NOUNS) for _ in range(rng.randint(0, 20)))
+        created = start + timedelta(seconds=i)
+        rows.append(
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "title": title,
+                "description": description or None,
+                "status": "todo",
+                "priority_score": 50.0,
+                "estimated_minutes": 30,
+                "owner_id": owner_id,
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+    return rows
+
+
+def seed(path: Path, owners: dict[str, int]) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        _create_schema(conn)
+        for owner_id, count in owners.items():
+            conn.execute(
+                User.__table__.insert(),
+                {"id": owner_id, "username": owner_id[:8], "email": f"{owner_id[:8]}@example.com", "hashed_password": "x"},
+            )
+            conn.execute(TaskModel.__table__.insert(), _task_rows(owner_id, count, rng))
+        conn.execute(
+            text(
+                "INSERT INTO task_search (title, description, owner_key, task_key, task_id) "
+                "SELECT title, coalesce(description, ''), replace(owner_id, '-', ''), lower(hex(id)), id FROM tasks"
+            )
+        )
+        conn.execute(text("INSERT INTO task_search (task_search) VALUES ('optimize')"))
+    engine.dispose()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    owner, neighbour = str(uuid.uuid4()), str(uuid.uuid4())
+    service = TaskService()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "search.db"
+        started = time.perf_counter()
+        seed(path, {owner: args.tasks, neighbour: args.tasks // 5})
+        print(f"seeded {args.tasks + args.tasks // 5} tasks in {time.perf_counter() - started:.1f}s")
+
+        engine = create_engine(f"sqlite:///{path}")
+        with sessionmaker(bind=engine, expire_on_commit=False)() as db:
+            print(f"{'query':<22}{'hits':>6}{'p50 ms':>10}{'p99 ms':>10}")
+            for query in QUERIES:
+                samples = []
+                for _ in range(args.repeat):
+                    began = time.perf_counter()
+                    hits = service.search(db, owner, query, args.limit)
+                    samples.append((time.perf_counter() - began) * 1000)
+                    db.expunge_all()
+                print(f"{query!r:<22}{len(hits):>6}{statistics.median(samples):>10.2f}{percentile(samples, 0.99):>10.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Per-row cost of serialising task lists (``GET /v1/tasks``), before and after the fast path.
+
+Seeds one owner with ``--tasks`` tasks (a third of them tagged) and walks every
+page of 1000 both ways:
+
+* ``orm``:  ORM objects -> ``to_schema`` -> ``response_model`` validation ->
+  ``json.dumps``, which is what the endpoint used to do;
+* ``fast``: column tuples -> dicts -> ``ORJSONResponse``.
+
+Usage: python -m benchmarks.bench_serialize [--tasks 10000] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models import TaskModel, TaskTag
+from app.schemas import Task, TaskListFilters
+from app.services.task_service import TASK_FIELDS, TaskService
+from benchmarks.bench_search import seed
+
+PAGE = 1000
+
+
+def orm_pages(service: TaskService, db, owner: str) -> int:
+    adapter = TypeAdapter(list[Task])
+    size, cursor = 0, None
+    while True:
+        tasks, cursor = service.list_page(db, owner, TaskListFilters(), PAGE, cursor)
+        schemas = [service.to_schema(task) for task in tasks]
+        # FastAPI validates the return value against response_model, then dumps it.
+        body = JSONResponse(adapter.dump_python(adapter.validate_python(schemas), mode="json")).body
+        size += len(body)
+        db.expunge_all()
+        if cursor is None:
+            return size
+
+
+def fast_pages(service: TaskService, db, owner: str) -> int:
+    size, cursor = 0, None
+    while True:
+        items, cursor = service.list_page_fields(db, owner, TaskListFilters(), PAGE, list(TASK_FIELDS), cursor)
+        size += len(ORJSONResponse(items).body)
+        if cursor is None:
+            return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    service, owner = TaskService(), str(uuid.uuid4())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "serialize.db"
+        seed(path, {owner: args.tasks})
+        engine = create_engine(f"sqlite:///{path}")
+        with sessionmaker(bind=engine, expire_on_commit=False)() as db:
+            rng = random.Random(5)
+            ids = db.scalars(select(TaskModel.id)).all()
+            db.execute(
+                TaskTag.__table__.insert(),
+                [
+                    {"task_id": task_id, "owner_id": owner, "tag": tag, "position": position}
+                    for task_id in ids[::3]
+                    for position, tag in enumerate(rng.sample(["work", "home", "urgent", "q3"], 2))
+                ],
+            )
+            db.commit()
+
+            print(f"{'path':<6}{'µs/row p50':>12}{'µs/row min':>12}{'bytes':>11}")
+            for name, run in (("orm", orm_pages), ("fast", fast_pages)):
+                samples = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    size = run(service, db, owner)
+                    samples.append((time.perf_counter() - started) * 1e6 / args.tasks)
+                print(f"{name:<6}{statistics.median(samples):>12.1f}{min(samples):>12.1f}{size:>11,}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Concurrent task creation on SQLite: stock settings vs WAL + pragmas vs the write queue.
+
+``--writers`` concurrent callers each create ``--writes`` tasks through
+``TaskService.create`` while ``--readers`` threads list tasks every 20 ms, in
+three setups on a fresh database file each:
+
+* ``default``: rollback journal, stock pragmas, one session per write on the
+  threadpool (the app before this change);
+* ``wal``:     the same, with the pragmas from ``app.database.SQLITE_PRAGMAS``;
+* ``queue``:   WAL + pragmas, writes funnelled through ``WriteQueue``.
+
+Usage: python -m benchmarks.bench_writes [--writers 16] [--writes 100] [--readers 2]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.database import _apply_sqlite_pragmas, _create_schema, create_writer_engine
+from app.models import User
+from app.schemas import TaskCreate, TaskListFilters
+from app.services.task_service import TASK_FIELDS, TaskService
+from app.services.write_queue import WriteQueue
+from benchmarks.bench_search import percentile
+
+service = TaskService()
+
+
+def _engine(path: Path, pragmas: bool):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=32)
+    if pragmas:
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    with engine.begin() as conn:
+        _create_schema(conn)
+    return engine
+
+
+def _seed_owners(engine, count: int) -> list[str]:
+    owners = [str(uuid.uuid4()) for _ in range(count)]
+    with Session(engine) as db:
+        db.add_all(User(id=o, username=o[:12], email=f"{o[:12]}@example.com", hashed_password="x") for o in owners)
+        db.commit()
+    return owners
+
+
+def _read_loop(engine, owners: list[str], stop: threading.Event, latencies: list[float]) -> None:
+    with Session(engine) as db:
+        i = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            service.list_page_fields(db, owners[i % len(owners)], TaskListFilters(), 50, list(TASK_FIELDS))
+            latencies.append((time.perf_counter() - started) * 1000)
+            db.rollback()
+            i += 1
+            stop.wait(0.02)  # ~50 list requests/s per reader
+
+
+def _create(db: Session, owner: str, n: int) -> None:
+    service.create(db, TaskCreate(title=f"Write report {n}", description="draft the quarterly numbers"), owner)
+
+
+def run(mode: str, path: Path, args: argparse.Namespace) -> dict:
+    engine = _engine(path, pragmas=mode != "default")
+    owners = _seed_owners(engine, args.writers)
+    stop, read_latencies = threading.Event(), []
+    readers = [
+        threading.Thread(target=_read_loop, args=(engine, owners, stop, read_latencies)) for _ in range(args.readers)
+    ]
+    for reader in readers:
+        reader.start()
+    write_latencies: list[float] = []
+    errors = 0
+
+    def thread_write(owner: str, n: int) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            with Session(engine, expire_on_commit=False) as db:
+                _create(db, owner, n)
+        except Exception:
+            errors += 1
+        write_latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    if mode == "queue":
+        writer = WriteQueue(create_writer_engine(f"sqlite:///{path}"))
+
+        async def caller(owner: str) -> None:
+            nonlocal errors
+            for n in range(args.writes):
+                began = time.perf_counter()
+                try:
+                    await writer.submit(_create, owner, n)
+                except Exception:
+                    errors += 1
+                write_latencies.append((time.perf_counter() - began) * 1000)
+
+        async def load() -> None:
+            await asyncio.gather(*(caller(owner) for owner in owners))
+
+        asyncio.run(load())
+        writer.close()
+        groups = writer.stats()["mean_group_size"]
+    else:
+        with ThreadPoolExecutor(max_workers=args.writers) as pool:
+            futures = [pool.submit(thread_write, owner, n) for n in range(args.writes) for owner in owners]
+            for future in futures:
+                future.result()
+        groups = 1.0
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for reader in readers:
+        reader.join()
+    engine.dispose()
+    return {
+        "writes/s": len(write_latencies) / elapsed,
+        "errors": errors,
+        "write p50": statistics.median(write_latencies),
+        "write p99": percentile(write_latencies, 0.99),
+        "read p99": percentile(read_latencies, 0.99) if read_latencies else 0.0,
+        "group": groups,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=100)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'mode':<9}{'writes/s':>10}{'errors':>8}{'w p50 ms':>10}{'w p99 ms':>10}{'r p99 ms':>10}{'group':>7}")
+    for mode in ("default", "wal", "queue"):
+        with tempfile.TemporaryDirectory() as tmp:
+            r = run(mode, Path(tmp) / "writes.db", args)
+        print(
+            f"{mode:<9}{r['writes/s']:>10,.0f}{r['errors']:>8}{r['write p50']:>10.2f}"
+            f"{r['write p99']:>10.2f}{r['read p99']:>10.2f}{r['group']:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
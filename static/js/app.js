@@ -10,8 +10,12 @@ let currentUser = null;
 let tasks = [];
 let currentFilter = 'all';
 let searchQuery = '';
+let searchHits = null;   // server-ranked results for searchQuery, or null
+let searchTimer = null;
+let searchSeq = 0;
 let currentPage = 'dashboard';
 let ws = null;
+let changeCursor = null;  // /v1/tasks/changes cursor that `tasks` is current to
 
 // ── API Helpers ───────────────────────────────────────────────
 async function apiRequest(endpoint, options = {}) {
@@ -21,6 +25,7 @@ async function apiRequest(endpoint, options = {}) {
     }
     try {
         const res = await fetch(`${API}${endpoint}`, { ...options, headers });
+        if (options.onResponse) options.onResponse(res);
         if (res.status === 401) {
             handleLogout();
             throw new Error('Session expired. Please sign in again.');
@@ -165,6 +170,7 @@ function handleLogout() {
     localStorage.removeItem('token');
     localStorage.removeItem('user');
     if (ws) { ws.close(); ws = null; }
+    changeCursor = null;
     document.getElementById('authPage').style.display = 'flex';
     document.getElementById('appContainer').classList.remove('active');
     showToast('Signed out successfully', 'info');
@@ -200,16 +206,25 @@ function updateUserUI() {
 function connectWebSocket() {
     if (ws) ws.close();
     const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+    // With a cursor the server first sends whatever changed while we were away.
+    const resume = changeCursor !== null ? `&cursor=${encodeURIComponent(changeCursor)}` : '';
     try {
-        ws = new WebSocket(`${protocol}//${location.host}/v1/realtime`);
+        ws = new WebSocket(`${protocol}//${location.host}/v1/realtime?token=${encodeURIComponent(authToken)}${resume}`);
         ws.onmessage = (event) => {
             const msg = JSON.parse(event.data);
-            if (msg.type === 'task.created' || msg.type === 'task.updated' || msg.type === 'task.deleted') {
-                loadTasks();  // Refresh on real-time event
+            if (msg.type === 'tasks.changes') {
+                applyChanges(msg.payload);
+                if (msg.payload.has_more) syncTasks(); else renderChanges();
+            } else if (msg.type === 'tasks.resync' && msg.payload.reason === 'cursor_expired') {
+                loadTasks();
+            } else if (['task.created', 'task.updated', 'task.deleted', 'tasks.batch', 'tasks.resync'].includes(msg.type)) {
+                syncTasks();  // Fetch just the delta
             }
         };
-        ws.onclose = () => {
-            setTimeout(connectWebSocket, 3000);  // Auto-reconnect
+        ws.onclose = (event) => {
+            if (authToken && event.code !== 1008) {
+                setTimeout(connectWebSocket, 3000);  // Auto-reconnect
+            }
         };
     } catch (e) {
         console.log('WebSocket not available');
@@ -249,11 +264,26 @@ function toggleSidebar() {
 }
 
 // ── Tasks CRUD ────────────────────────────────────────────────
+async function fetchAllTasks() {
+    // The list endpoint is keyset-paginated; follow X-Next-Cursor to the end.
+    const all = [];
+    let cursor = null;
+    do {
+        const query = cursor ? `?limit=500&cursor=${encodeURIComponent(cursor)}` : '?limit=500';
+        const page = await apiRequest(`/v1/tasks${query}`, {
+            onResponse: (res) => { cursor = res.headers.get('X-Next-Cursor'); }
+        });
+        all.push(...page);
+    } while (cursor);
+    return all;
+}
+
 async function loadTasks() {
     try {
-        tasks = await apiRequest('/v1/tasks');
-        renderTasks();
-        updateStats();
+        // Cursor first: anything written during the full fetch is replayed by the next sync.
+        changeCursor = (await apiRequest('/v1/tasks/changes')).cursor;
+        tasks = await fetchAllTasks();
+        await renderChanges();
     } catch (err) {
         if (err.message !== 'Session expired') {
             showToast('Failed to load tasks', 'error');
@@ -261,6 +291,46 @@ async function loadTasks() {
     }
 }
 
+// Apply only what changed since changeCursor; falls back to loadTasks.
+async function syncTasks() {
+    if (changeCursor === null) return loadTasks();
+    let status = 200;
+    try {
+        let delta;
+        do {
+            delta = await apiRequest(`/v1/tasks/changes?since=${encodeURIComponent(changeCursor)}`, {
+                onResponse: (res) => { status = res.status; }
+            });
+            applyChanges(delta);
+        } while (delta.has_more);
+        await renderChanges();
+    } catch (err) {
+        if (status === 410) return loadTasks();  // history compacted past our cursor
+        if (err.message !== 'Session expired') {
+            showToast('Failed to sync tasks', 'error');
+        }
+    }
+}
+
+function applyChanges(delta) {
+    const byId = new Map(tasks.map(t => [t.id, t]));
+    for (const change of delta.changes) {
+        if (change.op === 'delete') byId.delete(change.task_id);
+        else byId.set(change.task_id, change.task);
+    }
+    // Same order as GET /v1/tasks: newest first.
+    tasks = [...byId.values()].sort(
+        (a, b) => (b.created_at || '').localeCompare(a.created_at || '') || b.id.localeCompare(a.id)
+    );
+    changeCursor = delta.cursor;
+}
+
+async function renderChanges() {
+    if (searchQuery.trim()) await runSearch();
+    renderTasks();
+    updateStats();
+}
+
 function renderTasks() {
     const filtered = getFilteredTasks();
     
@@ -276,24 +346,30 @@ function renderTasks() {
 }
 
 function getFilteredTasks() {
-    let filtered = [...tasks];
+    // While a search is active, show the server's ranked hits instead,
+    // then tagged matches: the search index covers only title and description.
+    let filtered = searchQuery && searchHits ? withTagMatches(searchHits.map(h => h.task), searchQuery) : [...tasks];
     
     if (currentFilter !== 'all') {
         filtered = filtered.filter(t => t.status === currentFilter);
     }
     
-    if (searchQuery) {
-        const q = searchQuery.toLowerCase();
-        filtered = filtered.filter(t => 
-            t.title.toLowerCase().includes(q) ||
-            (t.description && t.description.toLowerCase().includes(q)) ||
-            (t.tags && t.tags.some(tag => tag.toLowerCase().includes(q)))
-        );
-    }
-    
     return filtered;
 }
 
+function withTagMatches(hits, query) {
+    // Every word must match a tag, the last one as a prefix, like the server search.
+    const words = query.toLowerCase().split(/\s+/).filter(Boolean);
+    if (!words.length) return hits;
+    const seen = new Set(hits.map(t => t.id));
+    const tagged = tasks.filter(task => {
+        if (seen.has(task.id)) return false;
+        const tags = (task.tags || []).map(t => t.toLowerCase());
+        return words.every((w, i) => tags.some(t => (i === words.length - 1 ? t.startsWith(w) : t === w)));
+    });
+    return [...hits, ...tagged];
+}
+
 function renderTaskList(containerId, taskList) {
     const container = document.getElementById(containerId);
     if (!container) return;
@@ -309,6 +385,7 @@ function renderTaskList(containerId, taskList) {
         return;
     }
     
+    const snippets = new Map((searchQuery && searchHits || []).map(h => [h.task.id, h.title_snippet]));
     container.innerHTML = taskList.map(task => {
         const isDone = task.status === 'done';
         const priority = task.priority_score >= 70 ? 'high' : task.priority_score >= 40 ? 'medium' : 'low';
@@ -327,7 +404,7 @@ function renderTaskList(containerId, taskList) {
                     ${isDone ? '✓' : ''}
                 </div>
                 <div class="task-info" onclick="openEditModal('${task.id}')">
-                    <div class="task-title">${escapeHtml(task.title)}</div>
+                    <div class="task-title">${snippets.has(task.id) ? highlightSnippet(snippets.get(task.id)) : escapeHtml(task.title)}</div>
                     <div class="task-meta">
                         <span class="task-meta-item">${statusEmoji[task.status] || '📋'} ${formatStatus(task.status)}</span>
                         ${task.estimated_minutes ? `<span class="task-meta-item">⏱️ ${task.estimated_minutes}min</span>` : ''}
@@ -384,7 +461,7 @@ async function toggleTaskDone(taskId, isDone) {
             body: JSON.stringify({ status: newStatus }),
         });
         showToast(isDone ? 'Task reopened' : 'Task completed! 🎉', 'success');
-        await loadTasks();
+        await syncTasks();
     } catch (err) {
         showToast('Failed to update task', 'error');
     }
@@ -445,7 +522,7 @@ async function handleTaskSubmit(e) {
             showToast('Task created! 🎉', 'success');
         }
         closeModal();
-        await loadTasks();
+        await syncTasks();
     } catch (err) {
         showToast(err.message || 'Failed to save task', 'error');
     }
@@ -456,7 +533,7 @@ async function deleteTask(taskId) {
     try {
         await apiRequest(`/v1/tasks/${taskId}`, { method: 'DELETE' });
         showToast('Task deleted', 'info');
-        await loadTasks();
+        await syncTasks();
     } catch (err) {
         showToast('Failed to delete task', 'error');
     }
@@ -483,7 +560,27 @@ function filterTasks(filter) {
 
 function handleSearch(query) {
     searchQuery = query;
-    renderTasks();
+    clearTimeout(searchTimer);
+    if (!query.trim()) {
+        searchHits = null;
+        renderTasks();
+        return;
+    }
+    searchTimer = setTimeout(async () => {
+        await runSearch();
+        renderTasks();
+    }, 150);
+}
+
+async function runSearch() {
+    // Drop responses that arrive after a newer keystroke's request.
+    const seq = ++searchSeq;
+    try {
+        const hits = await apiRequest(`/v1/tasks/search?q=${encodeURIComponent(searchQuery)}&limit=100`);
+        if (seq === searchSeq) searchHits = hits;
+    } catch (err) {
+        if (seq === searchSeq) searchHits = [];
+    }
 }
 
 // ── Insights ──────────────────────────────────────────────────
@@ -568,6 +665,11 @@ function escapeHtml(text) {
     return div.innerHTML;
 }
 
+function highlightSnippet(snippet) {
+    // Snippets are raw task text plus <mark> tags; escape everything else.
+    return escapeHtml(snippet).replace(/&lt;(\/?)mark&gt;/g, '<$1mark>');
+}
+
 function formatStatus(status) {
     const map = { todo: 'To Do', in_progress: 'In Progress', done: 'Done', blocked: 'Blocked' };
     return map[status] || status;
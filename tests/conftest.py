@@ -0,0 +1,38 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# Point the app at a throwaway database before anything imports app.database.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+# Every test signs up users from one client address; admission control has its own tests.
+os.environ.setdefault("ADMISSION_CONTROL", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.dependencies import event_recorder  # noqa: E402
+from app.main import app, write_task_events  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client: TestClient) -> dict[str, str]:
+    name = f"user{uuid.uuid4().hex[:10]}"
+    resp = client.post(
+        "/api/auth/signup",
+        json={"username": name, "email": f"{name}@example.com", "password": "secret123"},
+    )
+    assert resp.status_code == 201, resp.text
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+@pytest.fixture
+def flush_events(client: TestClient):
+    """Write buffered task events now instead of waiting for the flusher."""
+    return lambda: client.portal.call(event_recorder.flush, write_task_events)
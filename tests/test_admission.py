@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from ipaddress import ip_network
+
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.admission import AdmissionController, AdmissionMiddleware, RouteLimit
+from app.services.rate_limit import BucketStore, Limit, SQLiteBucketStore
+
+
+def test_bucket_stores_refill_and_share_state(tmp_path) -> None:
+    limit = Limit(rate=1000, burst=2)
+    for store in (BucketStore(), SQLiteBucketStore(tmp_path / "buckets.db")):
+        assert store.take("k", limit) == 0.0 and store.take("k", limit) == 0.0
+        assert 0 < store.take("k", limit) <= 0.001
+        assert store.take("other", limit) == 0.0
+    peer = SQLiteBucketStore(tmp_path / "buckets.db")  # a second worker sees the same buckets
+    assert peer.take("k", Limit(rate=0.001, burst=2)) > 0
+
+
+def test_controller_applies_route_user_and_overload_limits(monkeypatch) -> None:
+    rules = (RouteLimit("POST", "/v1/tasks/{task_id}/estimate", Limit(rate=0.001, burst=1)),)
+    controller = AdmissionController(BucketStore(), Limit(rate=0.001, burst=3), rules, max_in_flight=2)
+
+    assert controller.check("POST", "/v1/tasks/abc/estimate", "u1", "1.2.3.4") is None
+    assert controller.check("POST", "/v1/tasks/abc/estimate/", "u1", "1.2.3.4").reason == "route_limit"
+    assert controller.check("POST", "/v1/tasks/abc/estimate", "u2", "1.2.3.4") is None  # per user
+    assert controller.check("GET", "/v1/tasks", "u1", "1.2.3.4").status == 503  # two in flight
+    for _ in range(2):  # u1's second and third tokens
+        controller.release()
+        assert controller.check("GET", "/v1/tasks", "u1", "1.2.3.4") is None
+    controller.release()
+    rejection = controller.check("GET", "/v1/tasks", "u1", "1.2.3.4")
+    assert (rejection.status, rejection.reason) == (429, "user_limit") and rejection.retry_after > 1
+
+    monkeypatch.setattr(metrics.LOOP_LAG, "value", lambda **labels: 1.0)
+    assert controller.check("GET", "/v1/tasks", "u3", "1.2.3.4").reason == "loop_lag"
+
+
+def test_blocking_store_is_asked_off_the_event_loop(tmp_path) -> None:
+    threads = []
+
+    class Spy(SQLiteBucketStore):
+        def take(self, key, limit):
+            threads.append(threading.current_thread())
+            return super().take(key, limit)
+
+    controller = AdmissionController(Spy(tmp_path / "buckets.db"), Limit(rate=0.001, burst=1), ())
+    assert asyncio.run(controller.check_async("GET", "/v1/tasks", "u1", "1.2.3.4")) is None
+    assert asyncio.run(controller.check_async("GET", "/v1/tasks", "u1", "1.2.3.4")).status == 429
+    assert controller.in_flight == 1  # the rejected check gave its slot back
+    assert threads and threading.main_thread() not in threads
+
+
+def test_client_address_honours_only_trusted_proxies() -> None:
+    controller = AdmissionController(BucketStore(), Limit(rate=1, burst=1), trusted_proxies=(ip_network("10.0.0.0/8"),))
+
+    def scope(peer: str, forwarded: str | None = None) -> dict:
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return {"client": (peer, 1234), "headers": headers}
+
+    assert controller.client_address(scope("203.0.113.9", "198.51.100.1")) == "203.0.113.9"  # untrusted peer
+    assert controller.client_address(scope("10.0.0.2", "198.51.100.1, 203.0.113.7, 10.0.0.5")) == "203.0.113.7"
+    assert controller.client_address(scope("10.0.0.2")) == "10.0.0.2"
+    assert AdmissionController(BucketStore(), Limit(rate=1, burst=1)).client_address(
+        scope("10.0.0.2", "198.51.100.1")
+    ) == "10.0.0.2"
+
+
+def test_middleware_sheds_with_429_and_counts() -> None:
+    async def ok(scope, receive, send) -> None:
+        await JSONResponse({"ok": True})(scope, receive, send)
+
+    rules = (RouteLimit("POST", "/v1/tasks:reestimate", Limit(rate=1 / 60, burst=2)),)
+    client = TestClient(AdmissionMiddleware(ok, AdmissionController(BucketStore(), Limit(rate=50, burst=100), rules)))
+    before = metrics.REQUESTS_SHED.value(reason="route_limit")
+    statuses = [client.post("/v1/tasks:reestimate", headers={"Authorization": "Bearer x"}) for _ in range(3)]
+    assert [r.status_code for r in statuses] == [200, 200, 429]
+    assert int(statuses[-1].headers["Retry-After"]) > 0
+    assert metrics.REQUESTS_SHED.value(reason="route_limit") == before + 1
+    assert client.get("/health").status_code == 200
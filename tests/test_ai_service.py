@@ -1,5 +1,8 @@
+import pytest
+
 from app.schemas import Task
 from app.services.ai_service import AIService
+from app.services.model_backend import MAX_COMPLEXITY, NumpyBackend, effort_for, extract_keywords
 
 
 def test_estimate_effort_reasonable_range() -> None:
@@ -9,3 +12,21 @@ def test_estimate_effort_reasonable_range() -> None:
 
     assert 20 <= minutes <= 480
     assert 0.35 <= confidence <= 0.92
+
+
+def test_backends_match_keyword_reference() -> None:
+    tasks = [
+        Task(title="Prepare board deck", description="Draft KPI summary and strategic narrative"),
+        Task(title="Call", description=None),
+        Task(title="Review review REVIEW budget", description="budget budget planning"),
+        Task(title=" ".join(f"word{chr(97 + i)}zz" for i in range(15))),
+    ]
+    expected = [
+        effort_for(max(1, len(extract_keywords(f"{t.title} {t.description or ''}", MAX_COMPLEXITY)))) for t in tasks
+    ]
+    assert AIService().estimate_effort_many(tasks) == expected
+    assert [AIService().estimate_effort(task) for task in tasks] == expected
+    assert AIService().estimate_effort_many([]) == []
+
+    pytest.importorskip("numpy")
+    assert AIService(NumpyBackend()).estimate_effort_many(tasks) == expected
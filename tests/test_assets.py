@@ -0,0 +1,53 @@
+import gzip
+
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from app.assets import IMMUTABLE, StaticAssets, build_assets
+from app.compression import negotiate
+
+
+def test_negotiate_honours_quality_values() -> None:
+    assert negotiate("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert negotiate("br;q=0.5, gzip", ("br", "gzip")) == "gzip"
+    assert negotiate("gzip;q=0, *;q=0.1", ("gzip",)) is None
+    assert negotiate("*", ("gzip",)) == "gzip"
+    assert negotiate("", ("br", "gzip")) is None
+
+
+def test_build_fingerprints_rewrites_index_and_serves_precompressed(tmp_path) -> None:
+    (tmp_path / "js").mkdir()
+    script = "console.log('hello');\n" * 100
+    (tmp_path / "js" / "app.js").write_text(script)
+    (tmp_path / "index.html").write_text('<script src="/static/js/app.js"></script>')
+
+    manifest = build_assets(tmp_path)
+    hashed = manifest["assets"]["js/app.js"]
+    assert hashed.startswith("js/app.") and hashed != "js/app.js"
+    assert (tmp_path / "dist" / "index.html").read_text() == f'<script src="/static/dist/{hashed}"></script>'
+    assert gzip.decompress((tmp_path / "dist" / f"{hashed}.gz").read_bytes()).decode() == script
+
+    client = TestClient(Starlette(routes=[Mount("/static", StaticAssets(directory=str(tmp_path)))]))
+    resp = client.get(f"/static/dist/{hashed}", headers={"Accept-Encoding": "gzip"})
+    assert resp.text == script
+    assert resp.headers["content-encoding"] == "gzip" and resp.headers["cache-control"] == IMMUTABLE
+    assert int(resp.headers["content-length"]) < len(script)
+    again = client.get(f"/static/dist/{hashed}", headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["etag"]})
+    assert again.status_code == 304
+    plain = client.get(f"/static/dist/{hashed}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.headers["etag"] != resp.headers["etag"]
+    assert client.get("/static/js/app.js").headers["cache-control"] == "no-cache"
+
+
+def test_large_json_responses_are_compressed(client, auth_headers) -> None:
+    for i in range(20):
+        client.post("/v1/tasks", json={"title": f"Compressible task {i}"}, headers=auth_headers)
+
+    resp = client.get("/v1/tasks", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip" and "Accept-Encoding" in resp.headers["vary"]
+    assert len(resp.json()) == 20
+    plain = client.get("/v1/tasks", headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.json() == resp.json()
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.services.backplane import UnixSocketBackplane
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_unix_backplane_delivers_to_peers_only(tmp_path) -> None:
+    async def scenario() -> tuple[list, list]:
+        first, second = UnixSocketBackplane(tmp_path), UnixSocketBackplane(tmp_path)
+        got_first: list = []
+        got_second: list = []
+        await first.start(lambda owner, text: got_first.append((owner, text)))
+        await second.start(lambda owner, text: got_second.append((owner, text)))
+        first.publish("alice", '{"type": "task.created"}')
+        await asyncio.sleep(0.05)
+        await first.close()
+        await second.close()
+        return got_first, got_second
+
+    got_first, got_second = asyncio.run(scenario())
+    assert got_first == []
+    assert got_second == [("alice", '{"type": "task.created"}')]
+    assert list(tmp_path.glob("*.sock")) == []
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def multi_worker_server(tmp_path):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'workers.db'}",
+        "REALTIME_BACKPLANE": "unix",
+        "REALTIME_BACKPLANE_DIR": str(tmp_path / "backplane"),
+        "BCRYPT_ROUNDS": "4",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--workers", "3", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while len(list((tmp_path / "backplane").glob("*.sock"))) < 3:
+            assert proc.poll() is None and time.monotonic() < deadline, "workers failed to start"
+            time.sleep(0.1)
+        yield base
+    finally:
+        proc.terminate()
+        proc.wait(timeout=15)
+
+
+def test_events_cross_workers(multi_worker_server) -> None:
+    websockets = pytest.importorskip("websockets")
+    base = multi_worker_server
+
+    async def scenario() -> list[float]:
+        async with httpx.AsyncClient(base_url=base) as http:
+            signup = await http.post(
+                "/api/auth/signup", json={"username": "fanout", "email": "fanout@example.com", "password": "secret123"}
+            )
+            token = signup.json()["access_token"]
+            sockets = [
+                await websockets.connect(f"{base.replace('http', 'ws')}/v1/realtime?token={token}") for _ in range(6)
+            ]
+            # Let every worker's peer cache see the others.
+            await asyncio.sleep(1.2)
+            latencies = []
+            for n in range(20):
+                started = time.perf_counter()
+                await http.post("/v1/tasks", json={"title": f"Fan-out {n}"}, headers={"Authorization": f"Bearer {token}"})
+                for ws in sockets:
+                    event = json.loads(await asyncio.wait_for(ws.recv(), timeout=5))
+                    assert event["payload"]["title"] == f"Fan-out {n}"
+                latencies.append((time.perf_counter() - started) * 1000)
+            for ws in sockets:
+                await ws.close()
+            return latencies
+
+    latencies = asyncio.run(scenario())
+    print(f"\nPOST -> all 6 sockets: p50 {statistics.median(latencies):.1f} ms, max {max(latencies):.1f} ms")
+    assert len(latencies) == 20
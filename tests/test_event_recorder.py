@@ -0,0 +1,61 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.services.event_recorder import EventRecorder
+
+
+def test_flushes_in_batches_and_requeues_failures() -> None:
+    recorder = EventRecorder(capacity=10, batch_size=3)
+    recorder.record({"n": n} for n in range(7))
+    batches: list[list[int]] = []
+    failures = [RuntimeError("disk full")]
+
+    async def flaky(rows):
+        if len(batches) == 1 and failures:
+            raise failures.pop()
+        batches.append([row["n"] for row in rows])
+
+    assert asyncio.run(recorder.flush(flaky)) == 3  # second batch failed and went back
+    assert asyncio.run(recorder.flush(flaky)) == 4
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    stats = recorder.stats()
+    assert (stats["flushed"], stats["failed_flushes"], stats["largest_batch"], stats["buffered"]) == (7, 1, 3, 0)
+
+
+def test_nothing_is_dropped_and_producers_wait_for_space() -> None:
+    recorder = EventRecorder(capacity=4, batch_size=2, interval=0.01)
+    recorder.record({"n": n} for n in range(6))
+    assert [row["n"] for row in recorder._buffer] == [0, 1, 2, 3, 4, 5]
+
+    written: list[int] = []
+
+    async def write(rows):
+        written.extend(row["n"] for row in rows)
+
+    async def main():
+        flusher = asyncio.create_task(recorder.run(write))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(recorder.wait_for_space(), 1)  # above high water until a flush
+        assert recorder.size() < recorder.high_water
+        flusher.cancel()
+
+    asyncio.run(main())
+    assert written[:2] == [0, 1] and recorder.stats()["producer_waits"] == 1
+
+
+def test_rows_are_recorded_only_when_the_session_commits() -> None:
+    recorder = EventRecorder()
+    engine = create_engine("sqlite://")
+    with Session(engine) as db:
+        recorder.record_on_commit(db, [{"n": 1}])
+        db.execute(text("select 1"))
+        assert recorder.size() == 0
+        db.commit()
+        assert recorder.size() == 1
+        recorder.record_on_commit(db, [{"n": 2}])
+        db.execute(text("select 1"))
+        db.rollback()
+        db.commit()
+    assert [row["n"] for row in recorder._buffer] == [1]
@@ -0,0 +1,76 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from app.schemas import Task
+from app.services.ai_service import MemoizedAIService
+from app.services.inference_cache import InferenceCache, content_key
+from app.services.model_backend import ModelBackend
+
+
+def test_lru_ttl_and_disk_persistence(tmp_path) -> None:
+    cache = InferenceCache(max_size=2, ttl_seconds=60, path=tmp_path / "inference.db")
+    cache.put("a", [1, 0.5])
+    cache.put("b", ["x"])
+    assert cache.get("a") == [1, 0.5]  # "a" is now most recently used
+    cache.put("c", {"k": 1})
+    assert "b" not in cache._entries and cache.stats()["evictions"] == 1
+    cache.flush()
+    assert cache.get("b") == ["x"]  # evicted from memory, served from disk
+    cache.close()
+
+    restarted = InferenceCache(max_size=2, ttl_seconds=60, path=tmp_path / "inference.db")
+    assert restarted.get("c") == {"k": 1}
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("missing") is None
+    restarted.close()
+
+    short = InferenceCache(ttl_seconds=0.01)
+    short.put("x", 1)
+    time.sleep(0.02)
+    assert short.get("x") is None
+
+
+def test_disk_writes_stay_off_the_caller_and_the_file_stays_bounded(tmp_path) -> None:
+    path = tmp_path / "inference.db"
+    cache = InferenceCache(max_size=10, ttl_seconds=60, path=path, disk_max_size=50)
+    for i in range(120):
+        cache.put(f"k{i}", i)
+    cache.flush()
+    assert cache.stats()["disk_writes"] == 120
+    cache.close()
+    rows = sqlite3.connect(path).execute("SELECT COUNT(*) FROM inference").fetchone()[0]
+    assert rows == 50
+
+    warm = InferenceCache(max_size=10, ttl_seconds=60, path=path, disk_max_size=50)
+    # The most recent writes survived; on the loop the file is read in a thread.
+    seen = []
+    original_read = warm._read_disk
+    warm._read_disk = lambda key: seen.append(threading.current_thread()) or original_read(key)
+    assert asyncio.run(warm.get_async("k119")) == 119
+    assert asyncio.run(warm.get_async("k0")) is None
+    assert seen and all(thread is not threading.main_thread() for thread in seen)
+    assert warm.stats()["disk_hits"] == 1
+    warm.clear()
+    assert warm.get("k119") is None
+    warm.close()
+
+
+def test_memoized_service_runs_inference_once_per_content(monkeypatch) -> None:
+    calls = []
+    original = ModelBackend.estimate_effort
+    monkeypatch.setattr(ModelBackend, "estimate_effort", lambda self, tasks: calls.append(tasks) or original(self, tasks))
+    service = MemoizedAIService(InferenceCache())
+    task = Task(title="Plan quarterly roadmap", description="Draft goals and milestones", owner_id="u1")
+
+    first = service.estimate_effort(task)
+    service.predict_deadline(task)
+    service.predict_batch([task, task.model_copy(update={"id": "other"})])
+    assert service.estimate_effort(task) == first
+    assert len(calls) == 1
+
+    service.estimate_effort(task.model_copy(update={"title": "Plan yearly roadmap"}))
+    assert len(calls) == 2
+    assert service.generate_subtasks(task) == service.generate_subtasks(task)
+    assert content_key("v", "a") != content_key("v", "b")
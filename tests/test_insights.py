@@ -0,0 +1,95 @@
+from datetime import datetime
+
+
+def test_insights_use_counters_and_completion_hours(client, auth_headers, flush_events) -> None:
+    ids = [client.post("/v1/tasks", json={"title": f"Task {i}"}, headers=auth_headers).json()["id"] for i in range(4)]
+    client.patch(f"/v1/tasks/{ids[0]}", json={"status": "done"}, headers=auth_headers)
+    client.patch(f"/v1/tasks/{ids[1]}", json={"status": "done"}, headers=auth_headers)
+    client.patch(f"/v1/tasks/{ids[1]}", json={"status": "in_progress"}, headers=auth_headers)
+    client.delete(f"/v1/tasks/{ids[2]}", headers=auth_headers)
+    flush_events()
+
+    insights = client.get("/v1/insights/behavior", headers=auth_headers).json()
+
+    # 3 tasks left, 1 done -> completion rate 1/3
+    assert insights["burnout_risk"] == round(0.25 + 3 / 100, 3)
+    assert insights["procrastination_risk"] == round(0.9 - 1 / 3, 3)
+    assert insights["peak_hours"] == [datetime.utcnow().hour]
+
+
+def test_forecast_follows_weekday_pattern() -> None:
+    from datetime import date, timedelta
+
+    from app.services.behavior_service import forecast_week
+
+    today = date(2026, 3, 2)  # a Monday
+    # Four completions every weekday, none at weekends.
+    history = {today - timedelta(days=n): 4 for n in range(1, 29) if (today - timedelta(days=n)).weekday() < 5}
+
+    forecast = forecast_week(history, today)
+
+    assert len(forecast) == 7
+    assert min(forecast[:5]) > max(forecast[5:])
+    assert forecast_week({}, today) == [0.0] * 7
+
+
+def test_seed_days_accept_text_or_date_from_the_backend() -> None:
+    from datetime import date
+
+    from app.services.behavior_service import _as_date
+
+    day = date(2026, 3, 2)
+    assert _as_date("2026-03-02") == _as_date(day) == _as_date(datetime(2026, 3, 2, 9, 30)) == day
+
+
+def test_rollup_folds_events_without_changing_insights(client, auth_headers, flush_events) -> None:
+    from app.database import SessionLocal
+    from app.dependencies import behavior_service
+    from app.models import RollupWatermark, TaskEventModel
+    from app.services.behavior_service import ROLLUP_NAME
+
+    ids = [client.post("/v1/tasks", json={"title": f"Task {i}"}, headers=auth_headers).json()["id"] for i in range(3)]
+    for task_id in ids[:2]:
+        client.patch(f"/v1/tasks/{task_id}", json={"status": "done"}, headers=auth_headers)
+    flush_events()
+    before = client.get("/v1/insights/behavior", headers=auth_headers).json()
+
+    with SessionLocal() as db:
+        behavior_service.roll_up_activity(db)
+        behavior_service.roll_up_activity(db)  # nothing new: must not double count
+        last_event = db.query(TaskEventModel.seq).order_by(TaskEventModel.seq.desc()).first()[0]
+        assert db.get(RollupWatermark, ROLLUP_NAME).seq == last_event
+        owner_id = db.query(TaskEventModel.owner_id).filter(TaskEventModel.task_id == ids[0]).first()[0]
+        hourly, daily = behavior_service.activity(db, owner_id, datetime.utcnow().date())
+    assert hourly == {datetime.utcnow().hour: 2}
+    assert daily == {datetime.utcnow().date(): 2}
+
+    client.patch(f"/v1/tasks/{ids[2]}", json={"status": "done"}, headers=auth_headers)
+    client.patch(f"/v1/tasks/{ids[0]}", json={"status": "todo"}, headers=auth_headers)
+    client.patch(f"/v1/tasks/{ids[0]}", json={"status": "todo"}, headers=auth_headers)
+    flush_events()
+    after = client.get("/v1/insights/behavior", headers=auth_headers).json()
+    assert after["peak_hours"] == before["peak_hours"] == [datetime.utcnow().hour]
+    with SessionLocal() as db:
+        hourly, _ = behavior_service.activity(db, owner_id, datetime.utcnow().date())
+    assert hourly == {datetime.utcnow().hour: 3}
+
+
+def test_insights_catch_up_once_events_flush_without_a_manual_flush(client, auth_headers) -> None:
+    import time
+
+    task_id = client.post("/v1/tasks", json={"title": "Late event"}, headers=auth_headers).json()["id"]
+    client.patch(f"/v1/tasks/{task_id}", json={"status": "done"}, headers=auth_headers)
+    first = client.get("/v1/insights/behavior", headers=auth_headers)  # may predate the flush
+
+    deadline = time.monotonic() + 5
+    while True:
+        resp = client.get(
+            "/v1/insights/behavior", headers={**auth_headers, "If-None-Match": first.headers["ETag"]}
+        )
+        if resp.status_code == 200 and resp.json()["peak_hours"] == [datetime.utcnow().hour]:
+            break
+        if first.json()["peak_hours"] == [datetime.utcnow().hour]:
+            break  # the flush won the race with the first GET
+        assert time.monotonic() < deadline, "insights never picked up the flushed completion"
+        time.sleep(0.05)
@@ -0,0 +1,24 @@
+from app import metrics
+
+
+def test_metrics_endpoint_reports_routes_queries_and_components(client, auth_headers, monkeypatch) -> None:
+    task = client.post("/v1/tasks", json={"title": "Measure me"}, headers=auth_headers).json()
+    client.get(f"/v1/tasks/{task['id']}", headers=auth_headers)
+
+    body = client.get("/metrics").text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/v1/tasks/{task_id}",status="200"}' in body
+    assert 'http_requests_in_flight{method="GET"}' in body
+    assert "realtime_connections 0" in body
+    assert "event_loop_lag_seconds" in body
+    assert metrics.REQUEST_QUERIES.count(route="/v1/tasks/{task_id}") >= 1
+
+
+def test_query_heavy_requests_are_flagged(client, auth_headers, monkeypatch, caplog) -> None:
+    monkeypatch.setattr(metrics, "QUERY_WARN_THRESHOLD", 2)
+    # Statements run on the writer thread still count toward the request.
+    created = client.post("/v1/tasks", json={"title": "Flag me"}, headers=auth_headers)
+    assert int(created.headers["x-db-queries"]) > 2
+    assert "likely N+1" in caplog.text
+    assert metrics.QUERY_HEAVY_REQUESTS.value(route="/v1/tasks") >= 1
+    assert "x-db-queries" not in client.get("/health").headers
@@ -0,0 +1,61 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.schemas import Task
+from app.services.ai_service import BatchedAIService
+from app.services.inference_cache import InferenceCache
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_backend import create_model_backend
+
+
+def test_coalesces_concurrent_calls_and_splits_at_max_size() -> None:
+    batches = []
+
+    def double(items: list[int]) -> list[int]:
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    async def scenario() -> list[int]:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = MicroBatcher(double, executor, max_batch_size=4, max_wait_ms=5)
+            return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert asyncio.run(scenario()) == [i * 2 for i in range(10)]
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_failed_batch_fails_every_caller() -> None:
+    def broken(items: list[int]) -> list[int]:
+        raise RuntimeError("model unavailable")
+
+    async def scenario() -> None:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = MicroBatcher(broken, executor, max_batch_size=8, max_wait_ms=1)
+            results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+            assert all(isinstance(result, RuntimeError) for result in results)
+            assert batcher.stats()["batches"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_batched_service_matches_sync_results_and_uses_cache() -> None:
+    service = BatchedAIService(InferenceCache(), max_batch_size=16, max_wait_ms=1)
+    tasks = [Task(title=f"Plan release {word}", description="Review checklist") for word in ("alpha", "beta", "gamma")]
+
+    async def scenario() -> list:
+        predictions = await service.predict_batch_async(tasks)
+        again = await service.estimate_effort_async(tasks[0])
+        subtasks = await service.generate_subtasks_async(tasks[0])
+        return [predictions, again, subtasks]
+
+    predictions, again, subtasks = asyncio.run(scenario())
+    service.close()
+    assert [minutes for minutes, _ in predictions] == [service.estimate_effort(t)[0] for t in tasks]
+    assert again == service.estimate_effort(tasks[0])
+    assert subtasks == service.generate_subtasks(tasks[0])
+    stats = service.stats()
+    assert stats["estimate_effort"]["batches"] == 1 and stats["estimate_effort"]["items"] == 3
+    with pytest.raises(ValueError):
+        create_model_backend("onnx")
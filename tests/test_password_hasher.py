@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+from passlib.context import CryptContext
+
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def test_rejects_when_queue_is_full() -> None:
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=4), max_workers=1, max_pending=1)
+
+    async def scenario() -> None:
+        first = asyncio.create_task(hasher.hash("first"))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy) as busy:
+            await hasher.hash("second")
+        assert busy.value.retry_after >= 1
+        assert await hasher.verify("first", await first)
+
+    asyncio.run(scenario())
+    assert hasher.rejected == 1
+
+
+def test_verify_and_update_rehashes_on_rounds_change() -> None:
+    stored = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("pw")
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=5), max_workers=1, max_pending=4)
+
+    valid, new_hash = asyncio.run(hasher.verify_and_update("pw", stored))
+
+    assert valid
+    assert new_hash is not None and new_hash.startswith("$2b$05$")
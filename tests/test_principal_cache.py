@@ -0,0 +1,33 @@
+import time
+
+from app.services.principal_cache import Principal, PrincipalCache
+
+
+def _principal(user_id: str) -> Principal:
+    return Principal(id=user_id, username=user_id, email=f"{user_id}@x.io", full_name=None, is_active=True, created_at=None)
+
+
+def test_lru_ttl_and_invalidation() -> None:
+    cache = PrincipalCache(max_size=2, ttl_seconds=60)
+    cache.put(_principal("a"))
+    cache.put(_principal("b"))
+    assert cache.get("a") is not None  # "a" is now most recently used
+    cache.put(_principal("c"))
+
+    assert cache.get("b") is None
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+    short = PrincipalCache(ttl_seconds=0.01)
+    short.put(_principal("x"))
+    time.sleep(0.02)
+    assert short.get("x") is None
+
+
+def test_authenticated_requests_hit_cache(client, auth_headers) -> None:
+    before = client.get("/health/caches").json()["principals"]["hits"]
+    client.get("/v1/tasks", headers=auth_headers)
+    client.get("/v1/tasks", headers=auth_headers)
+    after = client.get("/health/caches").json()["principals"]["hits"]
+    assert after - before >= 2
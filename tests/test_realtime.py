@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.services.realtime import ConnectionManager, OverflowPolicy
+
+
+class _SlowSocket:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+        self.closed_with: int | None = None
+        self.release = asyncio.Event()
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        await self.release.wait()
+        self.sent.append(text)
+
+    async def close(self, code: int) -> None:
+        self.closed_with = code
+
+
+def test_broadcast_is_per_owner_and_drops_oldest_when_full() -> None:
+    async def scenario() -> tuple[_SlowSocket, _SlowSocket, ConnectionManager]:
+        manager = ConnectionManager(max_queue=2, overflow=OverflowPolicy.DROP_OLDEST)
+        mine, other = _SlowSocket(), _SlowSocket()
+        await manager.connect(mine, "alice")
+        await manager.connect(other, "bob")
+        await asyncio.sleep(0)
+        for n in range(4):
+            assert manager.broadcast("alice", {"n": n}) == 1
+        mine.release.set()
+        other.release.set()
+        await asyncio.sleep(0.01)
+        return mine, other, manager
+
+    mine, other, manager = asyncio.run(scenario())
+    assert mine.sent == ['{"n": 2}', '{"n": 3}']
+    assert other.sent == []
+    assert manager.dropped_messages == 2
+
+
+def test_disconnect_policy_closes_slow_client() -> None:
+    async def scenario() -> tuple[_SlowSocket, ConnectionManager]:
+        manager = ConnectionManager(max_queue=1, overflow=OverflowPolicy.DISCONNECT)
+        socket = _SlowSocket()
+        await manager.connect(socket, "alice")
+        await asyncio.sleep(0)
+        for n in range(3):
+            manager.broadcast("alice", {"n": n})
+        assert len(manager._closing) == 1  # held until it has run
+        await asyncio.sleep(0.01)
+        return socket, manager
+
+    socket, manager = asyncio.run(scenario())
+    assert socket.closed_with == 1013
+    assert manager.stats()["connections"] == 0 and not manager._closing
+
+
+def test_websocket_requires_token_and_receives_own_events(client, auth_headers) -> None:
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/v1/realtime") as ws:
+            ws.receive_text()
+
+    token = auth_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/v1/realtime?token={token}") as ws:
+        client.post("/v1/tasks", json={"title": "Live"}, headers=auth_headers)
+        assert ws.receive_json()["type"] == "task.created"
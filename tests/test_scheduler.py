@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from app.schemas import ScheduleBlock
+from app.services.scheduler import SchedulableTask, Scheduler, WorkingHours
+
+
+def test_plan_orders_by_deadline_and_respects_working_hours() -> None:
+    tasks = [
+        SchedulableTask(id="later", priority_score=90, estimated_minutes=60, deadline=datetime(2026, 1, 9)),
+        SchedulableTask(id="undated", priority_score=99, estimated_minutes=30, deadline=None),
+        SchedulableTask(id="soon", priority_score=10, estimated_minutes=90, deadline=datetime(2026, 1, 5, 18)),
+    ]
+    blocks = Scheduler().plan(tasks, datetime(2026, 1, 5, 16, 0), WorkingHours(start_hour=9, end_hour=17))
+
+    assert [b["task_id"] for b in blocks] == ["soon", "soon", "later", "undated"]
+    # "soon" fills the rest of the day and spills into the next morning.
+    assert (blocks[0]["starts_at"], blocks[0]["ends_at"]) == (datetime(2026, 1, 5, 16), datetime(2026, 1, 5, 17))
+    assert (blocks[1]["starts_at"], blocks[1]["ends_at"]) == (datetime(2026, 1, 6, 9), datetime(2026, 1, 6, 9, 30))
+    assert blocks[1]["explanation"]["on_time"] is False
+    assert all(9 <= b["starts_at"].hour and b["ends_at"].hour <= 17 for b in blocks)
+    assert all(ScheduleBlock.model_validate(b) for b in blocks)  # still the documented schema
+
+
+def test_optimize_endpoint_batches_and_rejects_unknown_ids(client, auth_headers) -> None:
+    ids = [client.post("/v1/tasks", json={"title": f"Plan {i}"}, headers=auth_headers).json()["id"] for i in range(3)]
+    resp = client.post(
+        "/v1/schedule/optimize", json={"tasks": ids, "start_at": "2026-01-05T09:00:00"}, headers=auth_headers
+    )
+    assert resp.status_code == 200
+    assert {b["task_id"] for b in resp.json()["blocks"]} == set(ids)
+
+    missing = client.post(
+        "/v1/schedule/optimize", json={"tasks": ["nope"], "start_at": "2026-01-05T09:00:00"}, headers=auth_headers
+    )
+    assert missing.status_code == 404
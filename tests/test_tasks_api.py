@@ -0,0 +1,455 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import _create_schema, run_db
+from app.models import User
+from app.schemas import TaskCreate, TaskUpdate
+from app.services.task_service import TaskService
+
+
+def test_task_crud_roundtrip(client, auth_headers) -> None:
+    created = client.post("/v1/tasks", json={"title": "Write report", "tags": ["work"]}, headers=auth_headers)
+    assert created.status_code == 200
+    task_id = created.json()["id"]
+
+    updated = client.patch(f"/v1/tasks/{task_id}", json={"status": "done"}, headers=auth_headers)
+    assert updated.json()["status"] == "done"
+
+    listed = client.get("/v1/tasks", headers=auth_headers).json()
+    assert [t["id"] for t in listed] == [task_id]
+
+    assert client.delete(f"/v1/tasks/{task_id}", headers=auth_headers).status_code == 204
+    assert client.get(f"/v1/tasks/{task_id}", headers=auth_headers).status_code == 404
+
+
+def test_task_service_runs_on_async_session(tmp_path) -> None:
+    async def scenario() -> float:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(_create_schema)
+        service = TaskService()
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            db.add(User(id="u1", username="u1", email="u1@example.com", hashed_password="x"))
+            await db.commit()
+            task = await run_db(db, service.create, TaskCreate(title="Async"), "u1")
+            await run_db(db, service.update, task.id, "u1", TaskUpdate(status="done"))
+            rate = await run_db(db, service.completion_rate, "u1")
+        await engine.dispose()
+        return rate
+
+    assert asyncio.run(scenario()) == 1.0
+
+
+def test_app_boots_and_serves_tasks_in_async_mode(tmp_path) -> None:
+    # DATABASE_URL is read at import, so this needs a fresh interpreter.
+    script = textwrap.dedent(
+        """
+        from fastapi.testclient import TestClient
+        from app.database import ASYNC_MODE
+        from app.main import app
+
+        assert ASYNC_MODE
+        with TestClient(app) as client:
+            signup = client.post(
+                "/api/auth/signup",
+                json={"username": "asyncuser", "email": "a@example.com", "password": "secret123"},
+            )
+            headers = {"Authorization": "Bearer " + signup.json()["access_token"]}
+            created = client.post("/v1/tasks", json={"title": "Async"}, headers=headers)
+            assert created.status_code == 200, created.text
+            assert [t["title"] for t in client.get("/v1/tasks", headers=headers).json()] == ["Async"]
+        """
+    )
+    env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"}
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+
+def test_list_tasks_keyset_pagination_filters_and_fields(client, auth_headers) -> None:
+    ids = [client.post("/v1/tasks", json={"title": f"Task {i}"}, headers=auth_headers).json()["id"] for i in range(5)]
+    client.patch(f"/v1/tasks/{ids[0]}", json={"status": "done"}, headers=auth_headers)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = client.get("/v1/tasks", params=params, headers=auth_headers)
+        seen += [t["id"] for t in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == list(reversed(ids))
+
+    done = client.get("/v1/tasks", params={"status": "done", "fields": "id,status"}, headers=auth_headers).json()
+    assert done == [{"id": ids[0], "status": "done"}]
+
+    assert client.get("/v1/tasks", params={"fields": "nope"}, headers=auth_headers).status_code == 400
+    assert client.get("/v1/tasks", params={"cursor": "garbage"}, headers=auth_headers).status_code == 400
+
+
+def test_batch_applies_mixed_operations_in_one_commit(client, auth_headers) -> None:
+    from sqlalchemy import event
+
+    from app.database import engine, write_queue
+
+    # Writes commit on the writer's engine when the SQLite write queue is on.
+    writer = write_queue.engine if write_queue is not None else engine
+    existing = [client.post("/v1/tasks", json={"title": f"Old {i}"}, headers=auth_headers).json()["id"] for i in range(2)]
+    operations = [
+        {"op": "create", "data": {"title": "Imported A", "description": "Plan migration rollout"}},
+        {"op": "create", "data": {"title": "Imported B"}},
+        {"op": "update", "task_id": existing[0], "data": {"status": "done"}},
+        {"op": "delete", "task_id": existing[1]},
+        {"op": "delete", "task_id": "missing"},
+    ]
+    # Only commits that wrote tasks count; the event flusher commits on the same writer.
+    commits = []
+
+    def on_execute(conn, cursor, statement, *args) -> None:
+        if statement.lstrip().upper().startswith(("INSERT INTO TASKS ", "UPDATE TASKS ", "DELETE FROM TASKS ")):
+            conn.info["wrote_tasks"] = True
+
+    def on_commit(conn) -> None:
+        if conn.info.pop("wrote_tasks", False):
+            commits.append(conn)
+
+    event.listen(writer, "before_cursor_execute", on_execute)
+    event.listen(writer, "commit", on_commit)
+    try:
+        resp = client.post("/v1/tasks:batch", json={"operations": operations}, headers=auth_headers)
+    finally:
+        event.remove(writer, "before_cursor_execute", on_execute)
+        event.remove(writer, "commit", on_commit)
+
+    assert resp.status_code == 200
+    assert [r["status"] for r in resp.json()["results"]] == [201, 201, 200, 204, 404]
+    assert resp.json()["results"][0]["task"]["estimated_minutes"] > 20
+    assert len(commits) == 1
+    titles = {t["title"] for t in client.get("/v1/tasks", headers=auth_headers).json()}
+    assert titles == {"Imported A", "Imported B", "Old 0"}
+
+
+def test_tag_filters_counts_and_legacy_migration(client, auth_headers, tmp_path) -> None:
+    from sqlalchemy import create_engine, text
+
+    def create(title: str, tags: list[str]) -> str:
+        return client.post("/v1/tasks", json={"title": title, "tags": tags}, headers=auth_headers).json()["id"]
+
+    both = create("Both", ["work", "urgent", "work"])
+    work = create("Work", ["work"])
+    home = create("Home", ["home"])
+    client.patch(f"/v1/tasks/{home}", json={"tags": ["home", "urgent"]}, headers=auth_headers)
+
+    def ids(**params) -> set[str]:
+        return {t["id"] for t in client.get("/v1/tasks", params=params, headers=auth_headers).json()}
+
+    assert ids(tag=["work", "urgent"]) == {both}
+    assert ids(tag=["work", "urgent"], tag_mode="any") == {both, work, home}
+    assert client.get("/v1/tasks", params={"tag": "home", "fields": "id,tags"}, headers=auth_headers).json() == [
+        {"id": home, "tags": ["home", "urgent"]}
+    ]
+    counts = client.get("/v1/tasks/tags", headers=auth_headers).json()
+    assert counts == [{"tag": "urgent", "count": 2}, {"tag": "work", "count": 2}, {"tag": "home", "count": 1}]
+
+    client.delete(f"/v1/tasks/{both}", headers=auth_headers)
+    assert {c["tag"]: c["count"] for c in client.get("/v1/tasks/tags", headers=auth_headers).json()}["work"] == 1
+
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as conn:
+        conn.execute(text("CREATE TABLE tasks (id VARCHAR(36) PRIMARY KEY, title VARCHAR(255), owner_id VARCHAR(36), tags TEXT)"))
+        conn.execute(text("""INSERT INTO tasks VALUES ('t1', 'Old', 'u1', '["a", "b"]'), ('t2', 'None', 'u1', '[]')"""))
+        _create_schema(conn)
+        _create_schema(conn)
+        rows = conn.execute(text("SELECT task_id, tag, position FROM task_tags ORDER BY position")).all()
+    assert [tuple(row) for row in rows] == [("t1", "a", 0), ("t1", "b", 1)]
+
+
+def test_search_ranks_highlights_and_stays_in_sync(client, auth_headers) -> None:
+    def search(q: str) -> list[dict]:
+        resp = client.get("/v1/tasks/search", params={"q": q}, headers=auth_headers)
+        assert resp.status_code == 200
+        return resp.json()
+
+    in_title = client.post("/v1/tasks", json={"title": "Quarterly budget review"}, headers=auth_headers).json()["id"]
+    in_body = client.post(
+        "/v1/tasks", json={"title": "Finance sync", "description": "Bring the budget spreadsheet"}, headers=auth_headers
+    ).json()["id"]
+    other = client.post("/api/auth/signup", json={"username": "searcher", "email": "s@example.com", "password": "Secret123!"})
+    other_headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+    client.post("/v1/tasks", json={"title": "Budget of someone else"}, headers=other_headers)
+
+    hits = search("budg")
+    assert [hit["task"]["id"] for hit in hits] == [in_title, in_body]
+    assert hits[0]["title_snippet"] == "Quarterly <mark>budget</mark> review"
+    assert "<mark>budget</mark>" in hits[1]["description_snippet"]
+    assert search('budget" OR owner_id:*') == []
+
+    client.patch(f"/v1/tasks/{in_title}", json={"title": "Quarterly forecast"}, headers=auth_headers)
+    client.delete(f"/v1/tasks/{in_body}", headers=auth_headers)
+    assert search("budget") == []
+    assert [hit["task"]["id"] for hit in search("forecast quart")] == [in_title]
+
+
+def test_search_ranks_every_match_not_just_the_newest(client, auth_headers) -> None:
+    exact = client.post("/v1/tasks", json={"title": "Roadmap"}, headers=auth_headers).json()["id"]
+    newer = [
+        {"op": "create", "data": {"title": f"Sync {i}", "description": f"Bring notes on the roadmap and item {i}"}}
+        for i in range(150)
+    ]
+    assert client.post("/v1/tasks:batch", json={"operations": newer}, headers=auth_headers).status_code == 200
+
+    hits = client.get("/v1/tasks/search", params={"q": "roadmap", "limit": 5}, headers=auth_headers).json()
+    assert len(hits) == 5
+    assert hits[0]["task"]["id"] == exact
+    assert hits[0]["score"] > hits[1]["score"]
+
+
+def test_search_index_survives_a_vacuum_renumbering_task_rowids(client, auth_headers) -> None:
+    from app.database import engine
+
+    def search(q: str) -> list[str]:
+        return [hit["task"]["id"] for hit in client.get("/v1/tasks/search", params={"q": q}, headers=auth_headers).json()]
+
+    ids = [
+        client.post("/v1/tasks", json={"title": f"Vacuum {word}"}, headers=auth_headers).json()["id"]
+        for word in ("alpha", "bravo", "charlie")
+    ]
+    client.delete(f"/v1/tasks/{ids[0]}", headers=auth_headers)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+        # VACUUM may renumber implicit rowids but current SQLite usually
+        # keeps them; swap two tasks' rowids to make the renumbering certain.
+        rowids = dict(conn.execute(text("SELECT id, rowid FROM tasks WHERE id IN (:b, :c)"), {"b": ids[1], "c": ids[2]}).all())
+        for task_id, rowid in ((ids[1], -1), (ids[2], rowids[ids[1]]), (ids[1], rowids[ids[2]])):
+            conn.execute(text("UPDATE tasks SET rowid = :rowid WHERE id = :id"), {"rowid": rowid, "id": task_id})
+
+    client.patch(f"/v1/tasks/{ids[1]}", json={"title": "Vacuum delta"}, headers=auth_headers)
+    assert search("bravo") == []
+    assert search("delta") == [ids[1]]
+    assert search("charlie") == [ids[2]]
+    assert search("alpha") == []
+
+
+def test_subtree_rollups_and_recursive_delete(client, auth_headers) -> None:
+    def create(title: str, parent: str | None = None) -> dict:
+        body = {"title": title, **({"parent_task_id": parent} if parent else {})}
+        return client.post("/v1/tasks", json=body, headers=auth_headers).json()
+
+    root = create("Launch")
+    child = create("Build", root["id"])
+    grandchild = create("Write tests", child["id"])
+    sibling = create("Announce", root["id"])
+    client.patch(f"/v1/tasks/{grandchild['id']}", json={"status": "done"}, headers=auth_headers)
+
+    tree = client.get(f"/v1/tasks/{root['id']}/tree", headers=auth_headers).json()
+    minutes = sum(t["estimated_minutes"] for t in (root, child, grandchild, sibling))
+    assert tree["rollup"] == {"task_count": 4, "done_count": 1, "estimated_minutes": minutes, "done_ratio": 0.25}
+    assert [c["id"] for c in tree["children"]] == [child["id"], sibling["id"]]
+    assert tree["children"][0]["children"][0]["id"] == grandchild["id"]
+    assert tree["children"][0]["rollup"]["done_ratio"] == 0.5
+
+    assert client.delete(f"/v1/tasks/{child['id']}", headers=auth_headers).status_code == 204
+    assert client.get(f"/v1/tasks/{grandchild['id']}", headers=auth_headers).status_code == 404
+    tree = client.get(f"/v1/tasks/{root['id']}/tree", headers=auth_headers).json()
+    assert tree["rollup"]["task_count"] == 2 and tree["rollup"]["done_count"] == 0
+    assert tree["rollup"]["estimated_minutes"] == root["estimated_minutes"] + sibling["estimated_minutes"]
+    assert client.get("/v1/tasks/missing/tree", headers=auth_headers).status_code == 404
+
+
+def test_batch_updating_one_task_twice_propagates_rollups_once(client, auth_headers) -> None:
+    root = client.post("/v1/tasks", json={"title": "Parent"}, headers=auth_headers).json()
+    child = client.post("/v1/tasks", json={"title": "Child", "parent_task_id": root["id"]}, headers=auth_headers).json()
+    operations = [
+        {"op": "update", "task_id": child["id"], "data": {"status": "in_progress", "title": "Child v2"}},
+        {"op": "update", "task_id": child["id"], "data": {"status": "done"}},
+    ]
+    assert client.post("/v1/tasks:batch", json={"operations": operations}, headers=auth_headers).status_code == 200
+
+    tree = client.get(f"/v1/tasks/{root['id']}/tree", headers=auth_headers).json()
+    minutes = root["estimated_minutes"] + child["estimated_minutes"]
+    assert tree["rollup"] == {"task_count": 2, "done_count": 1, "estimated_minutes": minutes, "done_ratio": 0.5}
+    assert tree["children"][0]["rollup"]["done_count"] == 1 and tree["children"][0]["rollup"]["done_ratio"] == 1.0
+
+
+def test_reestimate_updates_stale_estimates_and_rollups(client, auth_headers) -> None:
+    root = client.post("/v1/tasks", json={"title": "Plan"}, headers=auth_headers).json()
+    child = client.post(
+        "/v1/tasks", json={"title": "Draft", "parent_task_id": root["id"]}, headers=auth_headers
+    ).json()
+    # Title edits keep the old estimate until the tasks are re-estimated.
+    client.patch(
+        f"/v1/tasks/{child['id']}",
+        json={"title": "Draft quarterly budget review with finance stakeholders"},
+        headers=auth_headers,
+    )
+
+    result = client.post("/v1/tasks:reestimate", headers=auth_headers).json()
+    assert result == {"scanned": 2, "updated": 1}
+    refreshed = client.get(f"/v1/tasks/{child['id']}", headers=auth_headers).json()
+    assert refreshed["estimated_minutes"] > child["estimated_minutes"]
+    tree = client.get(f"/v1/tasks/{root['id']}/tree", headers=auth_headers).json()
+    assert tree["rollup"]["estimated_minutes"] == root["estimated_minutes"] + refreshed["estimated_minutes"]
+    assert client.post("/v1/tasks:reestimate", headers=auth_headers).json() == {"scanned": 2, "updated": 0}
+
+
+def test_reestimate_writes_each_chunk_as_its_own_job_with_inference_off_the_writer(
+    client, auth_headers, monkeypatch
+) -> None:
+    import threading
+
+    from app.dependencies import ai_service, task_service
+
+    ids = [client.post("/v1/tasks", json={"title": f"Chunked {i}"}, headers=auth_headers).json()["id"] for i in range(2)]
+    for task_id in ids:
+        client.patch(f"/v1/tasks/{task_id}", json={"title": "Migrate the billing service to the new cluster"}, headers=auth_headers)
+    writes, inference_threads = [], []
+    open_tasks_after, write_estimates, predict_many = (
+        task_service.open_tasks_after, task_service.write_estimates, ai_service.predict_many
+    )
+    monkeypatch.setattr(task_service, "open_tasks_after", lambda db, owner, after: open_tasks_after(db, owner, after, 1))
+    monkeypatch.setattr(
+        task_service, "write_estimates", lambda db, owner, changes: writes.append(len(changes)) or write_estimates(db, owner, changes)
+    )
+    monkeypatch.setattr(
+        ai_service, "predict_many", lambda rows: inference_threads.append(threading.current_thread().name) or predict_many(rows)
+    )
+
+    assert client.post("/v1/tasks:reestimate", headers=auth_headers).json() == {"scanned": 2, "updated": 2}
+    assert writes == [1, 1]
+    assert inference_threads and "db-writer" not in inference_threads
+
+
+def test_reestimate_chunks_carry_rollup_deltas_up_shared_ancestors() -> None:
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import Session
+
+    from app.models import TaskModel
+    from app.services.rollups import subtree_totals
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        _create_schema(conn)
+    service = TaskService()
+    with Session(engine) as db:
+        db.add(User(id="u1", username="u1", email="u1@example.com", hashed_password="x"))
+        db.commit()
+        root = service.create(db, TaskCreate(title="Root"), "u1", 30, None)
+        mid = service.create(db, TaskCreate(title="Mid", parent_task_id=root.id), "u1", 30, None)
+        for i in range(5):
+            service.create(db, TaskCreate(title=f"Leaf {i}", parent_task_id=mid.id if i % 2 else root.id), "u1", 30, None)
+
+        result = service.reestimate(db, "u1", lambda rows: [(45 + i, None) for i, _ in enumerate(rows)], chunk_size=3)
+        assert result.updated == 7
+        rows = db.execute(
+            select(
+                TaskModel.id, TaskModel.parent_task_id, TaskModel.status, TaskModel.estimated_minutes,
+                TaskModel.subtree_tasks, TaskModel.subtree_done, TaskModel.subtree_minutes,
+            )
+        ).all()
+        expected = subtree_totals(row[:4] for row in rows)
+        assert {row.id: tuple(row[4:]) for row in rows} == expected
+
+
+def test_list_fast_path_matches_single_task_schema(client, auth_headers) -> None:
+    body = {"title": "Ship v2", "description": "Cut release", "due_at": "2026-03-01T09:30:00.250000", "tags": ["b", "a"]}
+    created = client.post("/v1/tasks", json=body, headers=auth_headers).json()
+    client.post("/v1/tasks", json={"title": "Plain"}, headers=auth_headers)
+
+    listed = client.get("/v1/tasks", headers=auth_headers)
+    assert listed.headers["content-type"] == "application/json"
+    by_id = {task["id"]: task for task in listed.json()}
+    assert by_id[created["id"]]["tags"] == ["b", "a"]
+    for task_id in by_id:
+        assert by_id[task_id] == client.get(f"/v1/tasks/{task_id}", headers=auth_headers).json()
+
+
+def test_conditional_get_returns_304_until_tasks_change(client, auth_headers) -> None:
+    task_id = client.post("/v1/tasks", json={"title": "Cache me"}, headers=auth_headers).json()["id"]
+    for path in ("/v1/tasks", f"/v1/tasks/{task_id}", "/v1/insights/behavior"):
+        first = client.get(path, headers=auth_headers)
+        etag = first.headers["ETag"]
+        again = client.get(path, headers={**auth_headers, "If-None-Match": etag})
+        assert again.status_code == 304 and again.headers["ETag"] == etag
+        assert client.get(path, headers=auth_headers).json() == first.json()  # served from the body cache
+
+    etag = client.get("/v1/tasks", headers=auth_headers).headers["ETag"]
+    client.patch(f"/v1/tasks/{task_id}", json={"title": "Renamed"}, headers=auth_headers)
+    changed = client.get("/v1/tasks", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert changed.json()[0]["title"] == "Renamed"
+
+
+def test_delta_sync_returns_changes_tombstones_and_resumes_websocket(client, auth_headers) -> None:
+    from datetime import timedelta
+
+    from app.database import SessionLocal
+    from app.dependencies import task_service
+
+    keep = client.post("/v1/tasks", json={"title": "Keep"}, headers=auth_headers).json()["id"]
+    parent = client.post("/v1/tasks", json={"title": "Parent"}, headers=auth_headers).json()["id"]
+    child = client.post("/v1/tasks", json={"title": "Child", "parent_task_id": parent}, headers=auth_headers).json()["id"]
+    cursor = client.get("/v1/tasks/changes", headers=auth_headers).json()["cursor"]
+
+    client.patch(f"/v1/tasks/{keep}", json={"status": "in_progress"}, headers=auth_headers)
+    client.patch(f"/v1/tasks/{keep}", json={"title": "Kept"}, headers=auth_headers)
+    client.delete(f"/v1/tasks/{parent}", headers=auth_headers)
+    delta = client.get("/v1/tasks/changes", params={"since": cursor}, headers=auth_headers).json()
+    by_id = {change["task_id"]: change for change in delta["changes"]}
+    assert set(by_id) == {keep, parent, child} and not delta["has_more"]
+    assert by_id[keep]["op"] == "upsert" and by_id[keep]["task"]["title"] == "Kept"
+    assert by_id[parent]["op"] == by_id[child]["op"] == "delete"
+    assert client.get("/v1/tasks/changes", params={"since": delta["cursor"]}, headers=auth_headers).json()["changes"] == []
+
+    token = auth_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/v1/realtime?token={token}&cursor={cursor}") as ws:
+        message = ws.receive_json()
+    assert message["type"] == "tasks.changes" and message["payload"]["cursor"] == delta["cursor"]
+
+    with SessionLocal() as db:
+        assert task_service.compact_changes(db, timedelta(0)) > 0
+    expired = client.get("/v1/tasks/changes", params={"since": cursor}, headers=auth_headers)
+    assert expired.status_code == 410
+    assert client.get("/v1/tasks/changes", params={"since": delta["cursor"]}, headers=auth_headers).status_code == 200
+
+
+@pytest.mark.parametrize("upsert", [True, False])
+def test_concurrent_first_writers_both_count(monkeypatch, upsert) -> None:
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import Session
+
+    from app.models import TaskStats
+    from app.services import task_service as task_service_module
+
+    if not upsert:
+        monkeypatch.setattr(task_service_module, "_UPSERTS", {})
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        _create_schema(conn)
+    service = TaskService()
+    count_statuses = service._count_statuses
+
+    def another_writer_seeds_first(db, owner_id):
+        db.execute(insert(TaskStats).values(owner_id=owner_id, total=1, todo=1, version=1))
+        return count_statuses(db, owner_id)
+
+    monkeypatch.setattr(service, "_count_statuses", another_writer_seeds_first)
+    with Session(engine) as db:
+        db.add(User(id="u1", username="u1", email="u1@example.com", hashed_password="x"))
+        db.flush()
+        service._adjust_stats(db, "u1", {"total": 1, "todo": 1})
+        stats = db.get(TaskStats, "u1")
+        assert (stats.total, stats.todo, stats.version) == (2, 2, 2)
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, text
+
+from app.database import create_writer_engine
+from app.services.event_recorder import EventRecorder
+from app.services.write_queue import WriteQueue
+
+
+def test_group_commit_isolates_failing_jobs(tmp_path) -> None:
+    engine = create_writer_engine(f"sqlite:///{tmp_path / 'writes.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)"))
+    writer = WriteQueue(engine, max_batch=16)
+
+    def insert(db, name: str) -> str:
+        db.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": name})
+        db.commit()
+        if name == "bad":
+            db.execute(text("INSERT INTO items (name) VALUES ('after-commit')"))
+            raise ValueError("rejected")
+        return name
+
+    async def scenario() -> list:
+        return await asyncio.gather(
+            *(writer.submit(insert, name) for name in ["a", "b", "bad", "c"] * 10), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    writer.close()
+    assert sum(isinstance(result, ValueError) for result in results) == 10
+    with engine.connect() as conn:
+        names = [row.name for row in conn.execute(text("SELECT name FROM items"))]
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    # A job's own commit only releases its savepoint; what it wrote before
+    # failing is kept, what it wrote after is rolled back with the job.
+    assert sorted(set(names)) == ["a", "b", "bad", "c"] and len(names) == 40
+    stats = writer.stats()
+    assert stats["jobs"] == 40 and stats["groups"] < 40 and stats["failed"] == 10
+    engine.dispose()
+
+
+def test_write_behind_events_wait_for_the_group_commit(tmp_path) -> None:
+    engine = create_writer_engine(f"sqlite:///{tmp_path / 'writes.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)"))
+    recorder = EventRecorder()
+    writer = WriteQueue(engine)
+    buffered_at_job_commit = []
+
+    def insert(db, name: str) -> None:
+        db.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": name})
+        recorder.record_on_commit(db, [{"name": name}])
+        db.commit()
+        buffered_at_job_commit.append(recorder.size())
+
+    asyncio.run(writer.submit(insert, "kept"))
+    assert buffered_at_job_commit == [0] and [row["name"] for row in recorder._buffer] == ["kept"]
+
+    def fail_commit(conn) -> None:
+        raise RuntimeError("disk I/O error")
+
+    event.listen(engine, "commit", fail_commit)
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(writer.submit(insert, "lost"))
+    finally:
+        event.remove(engine, "commit", fail_commit)
+    asyncio.run(writer.submit(insert, "next"))
+    writer.close()
+    # The failed group's events were discarded, not carried into the next group.
+    assert [row["name"] for row in recorder._buffer] == ["kept", "next"]
+    engine.dispose()